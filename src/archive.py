@@ -0,0 +1,274 @@
+"""
+Archive output backends that write the built site straight into a tar or zip.
+
+Instead of writing thousands of small files into a directory and tarring
+them up afterwards, a build can stream every rendered page and copied asset
+into an archive as it is produced. Archives are reproducible: members are
+added in the order the build produces them (which is deterministic), and
+every member gets the same timestamp, owner and permissions. That order is
+the order the input source lists files in: sorted, except for tar sources,
+which list members in archive order (see sources.TarSource). The timestamp
+is taken from SOURCE_DATE_EPOCH when it is set.
+
+The archive is written to a temporary file next to its final path and only
+renamed into place when the build finishes, so a failed build never leaves
+a truncated archive behind.
+
+Build functions treat the archive path like an output directory: a page for
+"blog/post.html" is written to os.path.join(archive_path, "blog/post.html")
+and the backend turns that into the member name "blog/post.html".
+"""
+
+import gzip
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+
+
+# 1980-01-01, the earliest timestamp a zip file can store
+DEFAULT_EPOCH = 315532800
+
+_TAR_MODES = {
+    ".tar": "",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.bz2": "bz2",
+    ".tar.xz": "xz",
+}
+
+
+def is_archive_path(path):
+    """Return True if an output path names a tar or zip archive.
+
+    Args:
+        path (str): Output path given on the command line
+    """
+    return path.endswith(".zip") or any(path.endswith(suffix) for suffix in _TAR_MODES)
+
+
+def source_date_epoch():
+    """Return the timestamp given to every archive member.
+
+    Returns:
+        int: SOURCE_DATE_EPOCH if set, otherwise DEFAULT_EPOCH
+    """
+    value = os.environ.get("SOURCE_DATE_EPOCH")
+    if not value:
+        return DEFAULT_EPOCH
+    try:
+        return max(int(value), DEFAULT_EPOCH)
+    except ValueError:
+        raise ValueError(f"Invalid SOURCE_DATE_EPOCH '{value}': expected seconds since 1970")
+
+
+class _ArchiveOutput:
+    """Shared path handling and atomic replacement for archive outputs.
+
+    Attributes:
+        path (str): Final path of the archive
+        count (int): Number of members written
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.mtime = source_date_epoch()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        # mkstemp creates the file private; give it the usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self._tmp_path, 0o666 & ~umask)
+        self._file = os.fdopen(fd, 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def member_name(self, dest_path):
+        """Map an output path below the archive path to a member name.
+
+        Args:
+            dest_path (str): Path joined onto the archive path
+
+        Returns:
+            str: Member name using '/'
+
+        Raises:
+            ValueError: If dest_path is not below the archive path
+        """
+        rel = os.path.relpath(dest_path, self.path)
+        if rel == "." or rel.startswith(".."):
+            raise ValueError(f"{dest_path} is not inside the output archive {self.path}")
+        return rel.replace(os.sep, '/')
+
+    def write_bytes(self, dest_path, data):
+        """Add a file with the given contents.
+
+        Args:
+            dest_path (str): Output path below the archive path
+            data (bytes): File contents
+        """
+        self.write_stream(dest_path, len(data), lambda fileobj: fileobj.write(data))
+
+    def copy_from(self, source, src_path, dest_path):
+        """Stream a file from an input source into the archive.
+
+        Args:
+            source: Input source (see sources.py)
+            src_path (str): Path of the file within the source
+            dest_path (str): Output path below the archive path
+        """
+        self.write_stream(dest_path, source.size(src_path),
+                          lambda fileobj: source.copy_to(src_path, fileobj))
+
+    def _finish(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the archive and move it into place."""
+        self._finish()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard a partially written archive."""
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class TarOutput(_ArchiveOutput):
+    """Writes the site into a tar file, optionally compressed."""
+
+    def __init__(self, path, compression=""):
+        """Start a new archive.
+
+        Args:
+            path (str): Final path of the archive
+            compression (str): "", "gz", "bz2" or "xz"
+        """
+        super().__init__(path)
+        self._gzip = None
+        if compression == "gz":
+            # tarfile's own gzip mode stores the current time in the header
+            self._gzip = gzip.GzipFile(filename="", mode='wb', fileobj=self._file, mtime=self.mtime)
+            self._tar = tarfile.open(fileobj=self._gzip, mode='w', format=tarfile.PAX_FORMAT)
+        else:
+            self._tar = tarfile.open(fileobj=self._file, mode=f"w:{compression}" if compression else 'w',
+                                     format=tarfile.PAX_FORMAT)
+
+    def write_stream(self, dest_path, size, copy):
+        """Add a file whose contents are produced by a callback.
+
+        Args:
+            dest_path (str): Output path below the archive path
+            size (int): Exact size of the contents in bytes
+            copy (callable): Called with a writable binary file object
+        """
+        info = tarfile.TarInfo(self.member_name(dest_path))
+        info.size = size
+        info.mtime = self.mtime
+        info.mode = 0o644
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+
+        # Equivalent to TarFile.addfile(), but the contents are pushed by the
+        # caller instead of being pulled from a file object
+        tar = self._tar
+        header = info.tobuf(tar.format, tar.encoding, tar.errors)
+        tar.fileobj.write(header)
+        tar.offset += len(header)
+        counter = _CountingWriter(tar.fileobj)
+        copy(counter)
+        if counter.written != size:
+            raise ValueError(f"{dest_path}: expected {size} bytes, got {counter.written}")
+        blocks, remainder = divmod(size, tarfile.BLOCKSIZE)
+        if remainder:
+            tar.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            blocks += 1
+        tar.offset += blocks * tarfile.BLOCKSIZE
+        self.count += 1
+
+    def _finish(self):
+        self._tar.close()
+        if self._gzip is not None:
+            self._gzip.close()
+
+
+class ZipOutput(_ArchiveOutput):
+    """Writes the site into a deflate-compressed zip file."""
+
+    def __init__(self, path):
+        """Start a new archive.
+
+        Args:
+            path (str): Final path of the archive
+        """
+        super().__init__(path)
+        self._zip = zipfile.ZipFile(self._file, 'w', zipfile.ZIP_DEFLATED)
+
+    def write_stream(self, dest_path, size, copy):
+        """Add a file whose contents are produced by a callback.
+
+        Args:
+            dest_path (str): Output path below the archive path
+            size (int): Size of the contents in bytes
+            copy (callable): Called with a writable binary file object
+        """
+        info = zipfile.ZipInfo(self.member_name(dest_path), _zip_time(self.mtime))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        info.file_size = size
+        with self._zip.open(info, 'w', force_zip64=size > 0x7fffffff) as f:
+            copy(f)
+        self.count += 1
+
+    def _finish(self):
+        self._zip.close()
+
+
+class _CountingWriter:
+    """Passes writes through to another file object and counts the bytes."""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self.written = 0
+
+    def write(self, data):
+        self._fileobj.write(data)
+        self.written += len(data)
+        return len(data)
+
+
+def _zip_time(timestamp):
+    """Convert a UNIX timestamp to a zip (year, month, day, h, m, s) tuple in UTC."""
+    return time.gmtime(timestamp)[:6]
+
+
+def open_archive_output(path):
+    """Start writing a site archive at path.
+
+    Args:
+        path (str): Output path ending in .zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz
+
+    Returns:
+        TarOutput or ZipOutput
+
+    Raises:
+        ValueError: If the path does not name a supported archive type
+    """
+    if path.endswith(".zip"):
+        return ZipOutput(path)
+    for suffix, compression in _TAR_MODES.items():
+        if path.endswith(suffix):
+            return TarOutput(path, compression)
+    raise ValueError(f"Unsupported archive type: {path}")
@@ -0,0 +1,113 @@
+"""
+Benchmark comparing the serial, process-pool, thread-pool and (on Python
+3.14+) subinterpreter-pool page builds.
+
+Generates a synthetic content tree in a temporary directory and times a full
+render with each executor. On a free-threaded (no-GIL) CPython build the
+thread pool should scale with cores without the pickling overhead of the
+process pool; on a regular build it is limited by the GIL.
+
+Usage:
+    python3 src/bench_executors.py [--pages N] [--jobs N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from main import find_markdown_files, generate_pages, write_page
+from parallel import InterpreterPoolExecutor, default_jobs, generate_pages_pipelined
+
+
+SAMPLE_PAGE = """# Page {i}
+
+This is a paragraph with **bold**, _italic_ and `code` text, plus a
+[link](/blog/{i}) and an ![image](/images/{i}.png).
+
+> A quote that spans
+> a couple of lines.
+
+- first item
+- second item with **emphasis**
+- third item
+
+1. one
+2. two
+3. three
+
+```
+def example():
+    return {i}
+```
+"""
+
+
+def make_site(root, pages):
+    """Write a synthetic content tree and template under root.
+
+    Args:
+        root (str): Directory to create the site in
+        pages (int): Number of markdown pages to generate
+
+    Returns:
+        tuple: (content_dir, template_path)
+    """
+    content = os.path.join(root, "content")
+    for i in range(pages):
+        body = "\n".join(SAMPLE_PAGE.format(i=i) for _ in range(5))
+        write_page(os.path.join(content, f"section{i % 20}", f"page{i}.md"), body)
+    template_path = os.path.join(root, "template.html")
+    write_page(template_path, "<title>{{ Title }}</title><body>{{ Content }}</body>")
+    return content, template_path
+
+
+def run(name, content, template_path, dest, jobs, executor=None):
+    """Time one full build and return the elapsed seconds.
+
+    Without an executor the pages are rendered serially. With one they
+    always go through the worker pool, even with a single job, which
+    generate_pages would render serially instead.
+    """
+    pages = find_markdown_files(content, dest)
+    start = time.perf_counter()
+    if executor is None:
+        generate_pages(pages, template_path, "/")
+    else:
+        generate_pages_pipelined(pages, template_path, write_page, "/", jobs, executor=executor)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {elapsed:8.3f}s  ({len(pages) / elapsed:,.0f} pages/s)", file=sys.stderr)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page build executors.")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=default_jobs())
+    args = parser.parse_args()
+
+    gil = "disabled" if getattr(sys, "_is_gil_enabled", lambda: True)() is False else "enabled"
+    print(f"Python {sys.version.split()[0]}, GIL {gil}, {args.pages} pages, {args.jobs} jobs",
+          file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as root:
+        content, template_path = make_site(root, args.pages)
+        # Silence the per-page progress lines while timing
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                run("serial", content, template_path, os.path.join(root, "serial"), 1)
+                run(f"processes (x{args.jobs})", content, template_path,
+                    os.path.join(root, "processes"), args.jobs, "processes")
+                run(f"threads (x{args.jobs})", content, template_path,
+                    os.path.join(root, "threads"), args.jobs, "threads")
+                if InterpreterPoolExecutor is not None:
+                    run(f"interpreters (x{args.jobs})", content, template_path,
+                        os.path.join(root, "interpreters"), args.jobs, "interpreters")
+            finally:
+                sys.stdout = stdout
+
+
+if __name__ == "__main__":
+    main()
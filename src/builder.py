@@ -0,0 +1,266 @@
+"""
+Programmatic API for building the site from a long-lived process.
+
+main() reads sys.argv and sets everything up again on every run, so a tool
+that builds the site repeatedly would have to start a subprocess per build.
+A Site is configured once and keeps, across calls:
+
+- the template, re-read only when its size, mtime and digest say it changed,
+- the worker pool used with jobs > 1, restarted only when the template
+  changes (process workers load the template when they start) or when
+  basepath, jobs or executor are changed,
+- the render cache configuration.
+
+    with Site(basepath="/static-site-generator/", jobs=4) as site:
+        site.build()
+        site.build_paths(["content/index.md"])
+        html = site.render_string("# Preview")
+
+Paths are relative to the current directory, as on the command line.
+"""
+
+import os
+
+from archive import is_archive_path
+from cache import RenderCache, cache_key
+from directory import DirectoryOutput, remove_output
+from main import copy_static, find_markdown_files, open_output
+from manifest import check_input
+from page import render_page
+from parallel import EXECUTORS, default_jobs, generate_pages_pipelined, open_pool
+from render import html_output_path, write_page
+from sources import DirectorySource
+
+
+class Site:
+    """A configured site that can be built any number of times.
+
+    Attributes:
+        basepath (str): Base path for the site
+        jobs (int): Number of render workers
+        executor (str): Worker pool kind (see parallel.EXECUTORS)
+        cache (RenderCache): Render cache of the last build, or None
+    """
+
+    def __init__(self, content_dir="content", template_path="template.html", static_dir="static",
+                 output_path="docs", basepath="/", jobs=1, executor="processes", cache_dir=None,
+                 atomic=False):
+        """Configure the site; nothing is read until the first call.
+
+        Args:
+            content_dir (str): Path to the content directory
+            template_path (str): Path to the HTML template file
+            static_dir (str): Path to the static files directory
+            output_path (str): Directory to build into, or an archive path
+                (see archive.py)
+            basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+            jobs (int): Number of render workers (0 = one per CPU)
+            executor (str): "processes", "threads" or "interpreters"
+            cache_dir (str, optional): Render cache directory shared with
+                other builds
+            atomic (bool): Build directories in a staging directory and swap
+                them into place (see staging.py)
+
+        Raises:
+            ValueError: If the executor name is not recognised
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor} (expected one of {', '.join(EXECUTORS)})")
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.output_path = output_path
+        self.basepath = basepath
+        self.jobs = jobs if jobs > 0 else default_jobs()
+        self.executor = executor
+        self.cache_dir = cache_dir
+        self.atomic = atomic
+        self.cache = None
+        self._template_entry = None
+        self._template = None
+        self._template_bytes = None
+        self._pool = None
+        self._pool_settings = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool[0].shutdown()
+            self._pool = None
+
+    def _load_template(self):
+        """Return the template text, re-reading it only if it changed."""
+        changed, self._template_entry = check_input(self.template_path, self._template_entry)
+        if changed or self._template is None:
+            with open(self.template_path, 'r') as f:
+                self._template = f.read()
+            with open(self.template_path, 'rb') as f:
+                self._template_bytes = f.read()
+            # Workers hold their own copy of the old template
+            self.close()
+        return self._template
+
+    def _render_pages(self, pages, output):
+        """Render pages, using the cache and pool, and write them through output.
+
+        Args:
+            pages (list): List of (source_path, dest_path) tuples
+            output: Output backend to write through
+
+        Returns:
+            int: Number of pages rendered (cache hits are not rendered)
+        """
+        template = self._load_template()
+        cache = self.cache
+        keys = {}
+        to_render = []
+        # Cache hits are written ahead of misses, so archives render in order
+        parallel = self.jobs > 1 and not (cache is not None and is_archive_path(self.output_path))
+
+        def write(dest_path, html):
+            write_page(dest_path, html, output)
+            if cache is not None:
+                cache.put(keys[dest_path], html)
+
+        for src_path, dest_path in pages:
+            if cache is not None:
+                with open(src_path, 'rb') as f:
+                    keys[dest_path] = cache_key(f.read(), self._template_bytes, self.basepath)
+                html = cache.get(keys[dest_path])
+                if html is not None:
+                    print(f"Using cached page for {src_path} -> {dest_path}")
+                    write_page(dest_path, html, output)
+                    continue
+            if parallel:
+                to_render.append((src_path, dest_path))
+                continue
+            with open(src_path, 'r') as f:
+                markdown_content = f.read()
+            print(f"Generating page from {src_path} to {dest_path} using {self.template_path}")
+            write(dest_path, render_page(markdown_content, template, self.basepath))
+            to_render.append((src_path, dest_path))
+
+        if parallel and to_render:
+            # Workers render with the settings the pool was opened with
+            settings = (self.executor, self.jobs, self.basepath)
+            if self._pool is not None and self._pool_settings != settings:
+                self.close()
+            if self._pool is None:
+                self._pool = open_pool(self.executor, self.jobs, self.template_path, self.basepath)
+                self._pool_settings = settings
+            generate_pages_pipelined(to_render, self.template_path, write, self.basepath, self.jobs,
+                                     executor=self.executor, pool=self._pool)
+        return len(to_render)
+
+    def _finish(self):
+        if self.cache is not None:
+            self.cache.record_stats()
+
+    def build(self):
+        """Build the whole site, like `main.py` without incremental options.
+
+        Unchanged outputs are left untouched and stale ones are removed
+        (see directory.py).
+
+        Returns:
+            dict: Number of "pages" in the site and how many were "rendered"
+        """
+        self.cache = RenderCache(self.cache_dir) if self.cache_dir else None
+        with open_output(self.output_path, self.atomic) as output:
+            copy_static(self.static_dir, self.output_path, output=output)
+            # Archive members follow the order generate_pages_recursive uses
+            pages = sorted(find_markdown_files(self.content_dir, self.output_path))
+            rendered = self._render_pages(pages, output)
+        self._finish()
+        return {"pages": len(pages), "rendered": rendered}
+
+    def build_paths(self, paths):
+        """Update only the outputs of the given input files.
+
+        A markdown file under the content directory re-renders its page, a
+        file under the static directory is copied, and the template
+        re-renders every page. Inputs that no longer exist have their
+        outputs removed. Nothing else is read or walked.
+
+        Args:
+            paths (list): Changed input paths (e.g. "content/blog/post.md")
+
+        Returns:
+            dict: Counts of "rendered" pages, "copied" static files and
+                "removed" outputs, and the "ignored" paths that are not inputs
+
+        Raises:
+            ValueError: If the site is built into an archive
+        """
+        if is_archive_path(self.output_path):
+            raise ValueError("build_paths needs a directory output; use build() for archives")
+        self.cache = RenderCache(self.cache_dir) if self.cache_dir else None
+        counts = {"rendered": 0, "copied": 0, "removed": 0, "ignored": []}
+        content_dir = os.path.normpath(self.content_dir).replace(os.sep, '/')
+        static_dir = os.path.normpath(self.static_dir).replace(os.sep, '/')
+        template_key = os.path.normpath(self.template_path).replace(os.sep, '/')
+
+        page_keys = set()
+        static_keys = set()
+        rebuild_all = False
+        for path in paths:
+            path = os.path.normpath(path).replace(os.sep, '/')
+            if path == template_key:
+                rebuild_all = True
+            elif path.startswith(content_dir + "/") and path.endswith('.md'):
+                page_keys.add(path[len(content_dir) + 1:])
+            elif path.startswith(static_dir + "/"):
+                static_keys.add(path[len(static_dir) + 1:])
+            else:
+                counts["ignored"].append(path)
+
+        with DirectoryOutput(self.output_path, prune=False) as output:
+            source = DirectorySource()
+            for key in sorted(static_keys):
+                src_path = f"{static_dir}/{key}"
+                dest_path = os.path.join(self.output_path, *key.split('/'))
+                if os.path.isfile(src_path):
+                    print(f"Copying file: {src_path} -> {dest_path}")
+                    output.copy_from(source, src_path, dest_path)
+                    counts["copied"] += 1
+                elif not os.path.isdir(src_path):
+                    remove_output(dest_path, self.output_path)
+                    counts["removed"] += 1
+
+            if rebuild_all:
+                pages = find_markdown_files(self.content_dir, self.output_path)
+            else:
+                pages = []
+                for key in sorted(page_keys):
+                    src_path = f"{content_dir}/{key}"
+                    dest_path = os.path.join(self.output_path, *html_output_path(key).split('/'))
+                    if os.path.exists(src_path):
+                        pages.append((src_path, dest_path))
+                    else:
+                        remove_output(dest_path, self.output_path)
+                        counts["removed"] += 1
+            counts["rendered"] = self._render_pages(pages, output)
+        self._finish()
+        return counts
+
+    def render_string(self, markdown):
+        """Render markdown text with the site's template and basepath.
+
+        Nothing is read from the content directory or written to the output.
+
+        Args:
+            markdown (str): Markdown source of a page
+
+        Returns:
+            str: The final HTML page
+
+        Raises:
+            ValueError: If the markdown has no h1 title
+        """
+        return render_page(markdown, self._load_template(), self.basepath)
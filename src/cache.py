@@ -0,0 +1,318 @@
+"""
+Content-addressed cache of rendered pages shared between builds.
+
+Rendered page bodies are stored under a key derived from everything that
+affects the output: the markdown bytes, the template bytes, the basepath and
+the generator version. Identical inputs therefore map to the same entry no
+matter which checkout, commit or machine produced them, so several builds
+can share one cache directory (locally or on an NFS mount).
+
+Entries are written to a temporary file and renamed into place, so readers
+only ever see complete entries and concurrent writers of the same key
+simply replace each other with identical content. The shared statistics
+file is updated under an exclusive file lock.
+
+Every hit refreshes the entry's mtime, which serves as its last-access time
+(atime is unreliable on noatime mounts). gc() evicts the least recently
+used entries until the cache fits a size budget, and drops entries that
+have not been used for longer than a maximum age. Eviction only unlinks
+files, so a build that is reading the cache at the same time at worst sees
+an extra miss.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from manifest import GENERATOR_VERSION
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, statistics are best effort
+    fcntl = None
+
+
+STATS_FILENAME = "stats.json"
+LOCK_FILENAME = "stats.lock"
+
+# Temporary files older than this are leftovers from interrupted writes
+_STALE_TMP_SECONDS = 3600
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_size(text):
+    """Parse a byte size such as "500M" or "2G".
+
+    Args:
+        text (str): Number of bytes with an optional K, M, G or T suffix
+
+    Returns:
+        int: Size in bytes
+
+    Raises:
+        ValueError: If the size cannot be parsed
+    """
+    text = text.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    number = text[:-1] if unit else text
+    try:
+        return int(float(number) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid size '{text}': expected e.g. 500M or 2G")
+
+
+def parse_age(text):
+    """Parse a duration such as "90m", "12h" or "7d".
+
+    Args:
+        text (str): Number of seconds with an optional s, m, h, d or w suffix
+
+    Returns:
+        float: Duration in seconds
+
+    Raises:
+        ValueError: If the duration cannot be parsed
+    """
+    text = text.strip().lower()
+    unit = text[-1:] if text[-1:] in _AGE_UNITS else "s"
+    number = text[:-1] if text[-1:] in _AGE_UNITS else text
+    try:
+        return float(number) * _AGE_UNITS[unit]
+    except ValueError:
+        raise ValueError(f"Invalid age '{text}': expected e.g. 12h or 7d")
+
+
+def cache_key(markdown_bytes, template_bytes, basepath):
+    """Compute the cache key for a page.
+
+    Each field is length-prefixed so that different field boundaries can
+    never produce the same digest.
+
+    Args:
+        markdown_bytes (bytes): Raw markdown source
+        template_bytes (bytes): Raw template file
+        basepath (str): Base path for the site
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for field in (GENERATOR_VERSION.encode('utf-8'), template_bytes,
+                  basepath.encode('utf-8'), markdown_bytes):
+        digest.update(len(field).to_bytes(8, 'big'))
+        digest.update(field)
+    return digest.hexdigest()
+
+
+def blob_cache_key(markdown_id, template_id, basepath):
+    """Compute the cache key for a page from content identifiers.
+
+    Used when the inputs come with an identifier that already is a content
+    hash, such as git blob SHAs, so that a cache hit needs no file reads.
+    These keys never collide with those of cache_key().
+
+    Args:
+        markdown_id (str): Content identifier of the markdown source
+        template_id (str): Content identifier of the template
+        basepath (str): Base path for the site
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return cache_key(f"blob:{markdown_id}".encode('utf-8'),
+                     f"blob:{template_id}".encode('utf-8'), basepath)
+
+
+class RenderCache:
+    """On-disk cache of rendered HTML pages.
+
+    Attributes:
+        cache_dir (str): Root directory of the cache
+        hits (int): Lookups answered from the cache during this build
+        misses (int): Lookups that had to render the page
+    """
+
+    def __init__(self, cache_dir):
+        """Initialize the cache, creating its directory if needed.
+
+        Args:
+            cache_dir (str): Root directory of the cache
+        """
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(cache_dir, "pages"), exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, "pages", key[:2], key[2:] + ".html")
+
+    def get(self, key):
+        """Look up a rendered page.
+
+        Args:
+            key (str): Key from cache_key()
+
+        Returns:
+            str: The cached HTML, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                html = f.read().decode('utf-8')
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            # Mark the entry as recently used for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass  # Evicted by a concurrent gc after we read it
+        return html
+
+    def put(self, key, html):
+        """Store a rendered page atomically.
+
+        Args:
+            key (str): Key from cache_key()
+            html (str): The rendered HTML page
+        """
+        path = self._entry_path(key)
+        entry_dir = os.path.dirname(path)
+        os.makedirs(entry_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(html.encode('utf-8'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def record_stats(self):
+        """Add this build's hit and miss counts to the shared statistics.
+
+        Returns:
+            dict: The updated totals
+        """
+        lock_path = os.path.join(self.cache_dir, LOCK_FILENAME)
+        stats_path = os.path.join(self.cache_dir, STATS_FILENAME)
+        with open(lock_path, 'a') as lock:
+            if fcntl:
+                fcntl.lockf(lock, fcntl.LOCK_EX)
+            try:
+                with open(stats_path, 'r') as f:
+                    stats = json.load(f)
+            except (OSError, ValueError):
+                stats = {"hits": 0, "misses": 0}
+            stats["hits"] = stats.get("hits", 0) + self.hits
+            stats["misses"] = stats.get("misses", 0) + self.misses
+            tmp_path = stats_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, stats_path)
+        return stats
+
+    def _entries(self):
+        """Yield (path, size, last_used) for every entry in the cache.
+
+        Also removes temporary files left behind by interrupted writes.
+        """
+        pages_dir = os.path.join(self.cache_dir, "pages")
+        now = time.time()
+        for bucket in os.scandir(pages_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.startswith(".tmp-"):
+                    if now - st.st_mtime > _STALE_TMP_SECONDS:
+                        _unlink(entry.path)
+                    continue
+                yield entry.path, st.st_size, st.st_mtime
+
+    def stats(self):
+        """Report the size of the cache and its cumulative hit rate.
+
+        Returns:
+            dict: "entries", "bytes", "hits", "misses" and "hit_rate"
+        """
+        entries = 0
+        total = 0
+        for _, size, _ in self._entries():
+            entries += 1
+            total += size
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILENAME), 'r') as f:
+                counts = json.load(f)
+        except (OSError, ValueError):
+            counts = {}
+        hits = counts.get("hits", 0)
+        misses = counts.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "bytes": total,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def gc(self, max_bytes=None, max_age=None):
+        """Evict entries to fit a size budget and drop unused ones.
+
+        Entries not used for longer than max_age are removed first; then the
+        least recently used entries are removed until the total size is at
+        most max_bytes.
+
+        Args:
+            max_bytes (int, optional): Maximum total size of the cache
+            max_age (float, optional): Maximum seconds since an entry was used
+
+        Returns:
+            dict: "removed" entry count and "freed" bytes
+        """
+        now = time.time()
+        removed = 0
+        freed = 0
+        kept = []
+        for path, size, last_used in self._entries():
+            if max_age is not None and now - last_used > max_age:
+                if _unlink(path):
+                    removed += 1
+                    freed += size
+            else:
+                kept.append((last_used, size, path))
+
+        if max_bytes is not None:
+            total = sum(size for _, size, _ in kept)
+            kept.sort()
+            for _, size, path in kept:
+                if total <= max_bytes:
+                    break
+                if _unlink(path):
+                    removed += 1
+                    freed += size
+                total -= size
+        return {"removed": removed, "freed": freed}
+
+
+def _unlink(path):
+    """Remove a file, tolerating a concurrent removal.
+
+    Returns:
+        bool: True if this call removed the file
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
@@ -0,0 +1,245 @@
+"""
+Distributed build coordinator and worker.
+
+The coordinator enumerates the pages of a build and hands them out one at a
+time over TCP to any number of workers (`main.py --worker HOST:PORT`).
+Workers pull the next page as soon as they finish the previous one, so fast
+workers naturally take more pages than slow ones and a few huge pages do not
+leave the rest of the fleet idle. Rendered HTML is streamed back to the
+coordinator, which writes every output file itself.
+
+Protocol: newline-delimited JSON messages over one connection per worker.
+
+    worker -> {"op": "hello"}
+    coord  -> {"op": "welcome", "template": ..., "basepath": ...}
+    worker -> {"op": "next"}
+    coord  -> {"op": "page", "id": N, "path": ..., "markdown": ...}
+            | {"op": "wait"}                      (pages in flight elsewhere)
+            | {"op": "done"}                      (build finished or failed)
+    worker -> {"op": "result", "id": N, "html": ...}
+            | {"op": "error", "id": N, "message": ...}
+    coord  -> the next page, wait or done, as for "next"
+
+Workers may join at any time. If a worker's connection drops, the page it
+was working on goes back to the front of the queue for another worker.
+"""
+
+import collections
+import json
+import socket
+import socketserver
+import threading
+import time
+
+from page import render_page
+from parallel import PageRenderError
+
+
+def parse_address(address):
+    """Parse a "HOST:PORT" string.
+
+    Args:
+        address (str): Address such as "127.0.0.1:8765" or ":8765"
+
+    Returns:
+        tuple: (host, port), with host defaulting to 127.0.0.1
+
+    Raises:
+        ValueError: If the port is missing or not a number
+    """
+    host, sep, port = address.rpartition(':')
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid address '{address}': expected HOST:PORT")
+    return host or "127.0.0.1", int(port)
+
+
+def _send(wfile, message):
+    """Write one JSON message to a binary stream."""
+    wfile.write((json.dumps(message) + "\n").encode('utf-8'))
+    wfile.flush()
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Serves one worker connection for the lifetime of the connection."""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        wfile = self.wfile
+        assigned = set()
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "hello":
+                    _send(wfile, {"op": "welcome", "template": coordinator.template_content,
+                                  "basepath": coordinator.basepath})
+                    continue
+                if op == "result":
+                    assigned.discard(message["id"])
+                    coordinator._complete(message["id"], message["html"])
+                elif op == "error":
+                    assigned.discard(message["id"])
+                    coordinator._fail(message["id"], message["message"])
+                _send(wfile, coordinator._next_task(assigned))
+        except (OSError, ValueError):
+            pass
+        finally:
+            # Anything still assigned was lost with the worker
+            coordinator._requeue(assigned)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class BuildCoordinator:
+    """Hands out pages to remote workers and writes the results.
+
+    Attributes:
+        template_content (str): Template sent to every worker on connect
+        basepath (str): Base path sent to every worker on connect
+    """
+
+    def __init__(self, pages, template_content, write, basepath="/", host="127.0.0.1", port=0):
+        """Initialize the coordinator and start listening.
+
+        Args:
+            pages (list): List of (source_path, dest_path) tuples
+            template_content (str): HTML template text
+            write (callable): Called as write(dest_path, html) for each result
+            basepath (str): Base path for the site
+            host (str): Interface to listen on
+            port (int): Port to listen on; 0 picks a free port
+        """
+        self.pages = pages
+        self.template_content = template_content
+        self.basepath = basepath
+        self._write = write
+        self._pending = collections.deque(range(len(pages)))
+        self._finished = set()
+        self._errors = []
+        self._cond = threading.Condition()
+        self._server = _Server((host, port), _WorkerHandler)
+        self._server.coordinator = self
+
+    @property
+    def address(self):
+        """tuple: The (host, port) the coordinator is listening on."""
+        return self._server.server_address[:2]
+
+    def _is_done(self):
+        return bool(self._errors) or len(self._finished) == len(self.pages)
+
+    def _next_task(self, assigned):
+        with self._cond:
+            if self._is_done():
+                return {"op": "done"}
+            if not self._pending:
+                return {"op": "wait"}
+            page_id = self._pending.popleft()
+            assigned.add(page_id)
+
+        src_path = self.pages[page_id][0]
+        try:
+            with open(src_path, 'r') as f:
+                markdown_content = f.read()
+        except OSError as e:
+            assigned.discard(page_id)
+            self._fail(page_id, f"{type(e).__name__}: {e}")
+            return {"op": "done"}
+        return {"op": "page", "id": page_id, "path": src_path, "markdown": markdown_content}
+
+    def _complete(self, page_id, html):
+        src_path, dest_path = self.pages[page_id]
+        try:
+            print(f"Generating page from {src_path} to {dest_path} (remote)")
+            self._write(dest_path, html)
+        except Exception as e:
+            self._fail(page_id, f"{type(e).__name__}: {e}")
+            return
+        with self._cond:
+            self._finished.add(page_id)
+            self._cond.notify_all()
+
+    def _fail(self, page_id, message):
+        with self._cond:
+            self._errors.append(PageRenderError(f"{self.pages[page_id][0]}: {message}"))
+            self._cond.notify_all()
+
+    def _requeue(self, page_ids):
+        if not page_ids:
+            return
+        with self._cond:
+            for page_id in sorted(page_ids, reverse=True):
+                if page_id not in self._finished:
+                    print(f"Worker lost; requeueing {self.pages[page_id][0]}")
+                    self._pending.appendleft(page_id)
+            page_ids.clear()
+
+    def serve(self, timeout=None):
+        """Serve workers until every page is written.
+
+        Args:
+            timeout (float, optional): Give up after this many seconds
+
+        Raises:
+            PageRenderError: If a page failed to render or write
+            TimeoutError: If the timeout expires first
+        """
+        thread = threading.Thread(target=self._server.serve_forever, name="coordinator", daemon=True)
+        thread.start()
+        try:
+            with self._cond:
+                if not self._cond.wait_for(self._is_done, timeout):
+                    remaining = len(self.pages) - len(self._finished)
+                    raise TimeoutError(f"Build timed out with {remaining} pages unfinished")
+                if self._errors:
+                    raise self._errors[0]
+        finally:
+            self._server.shutdown()
+
+    def close(self):
+        """Stop listening and release the socket."""
+        self._server.server_close()
+
+
+def run_worker(host, port, poll_interval=0.1):
+    """Pull pages from a coordinator and render them until the build is done.
+
+    Args:
+        host (str): Coordinator host
+        port (int): Coordinator port
+        poll_interval (float): Seconds to wait when no page is available yet
+
+    Returns:
+        int: Number of pages this worker rendered
+    """
+    rendered = 0
+    with socket.create_connection((host, port)) as sock, \
+            sock.makefile('rb') as rfile, sock.makefile('wb') as wfile:
+        _send(wfile, {"op": "hello"})
+        welcome = json.loads(rfile.readline())
+        template_content = welcome["template"]
+        basepath = welcome["basepath"]
+
+        _send(wfile, {"op": "next"})
+        for line in rfile:
+            message = json.loads(line)
+            op = message["op"]
+            if op == "done":
+                break
+            if op == "wait":
+                time.sleep(poll_interval)
+                _send(wfile, {"op": "next"})
+                continue
+
+            try:
+                html = render_page(message["markdown"], template_content, basepath)
+            except Exception as e:
+                _send(wfile, {"op": "error", "id": message["id"],
+                              "message": f"{type(e).__name__}: {e}"})
+                continue
+            _send(wfile, {"op": "result", "id": message["id"], "html": html})
+            rendered += 1
+    return rendered
@@ -0,0 +1,202 @@
+"""
+Copy strategies for static files.
+
+shutil.copy reads every byte of a file into userspace and writes it back
+out, and copies the source's permission bits along the way. For a large
+media tree that is most of a build's I/O, even though the bytes never
+change. FileCopier copies each file with the cheapest method the source
+and destination file systems support:
+
+- "reflink": the FICLONE ioctl (btrfs, XFS with reflink=1, bcachefs, ...).
+  The copy shares the source's extents copy-on-write, so no data is
+  written and the time taken does not depend on the file size.
+- "kernel": os.copy_file_range, falling back to os.sendfile. The kernel
+  moves the data without userspace buffers, and NFS 4.2 or SMB can copy
+  on the server side.
+- "copy": plain reads and writes, which work everywhere.
+- "hardlink": the output becomes another name for the source file. This is
+  only used when asked for: an in-place edit of the source then changes the
+  output too, before any rebuild.
+
+The "auto" strategy tries reflink, then kernel, then copy. The first method
+that works is remembered for each pair of source and destination file
+systems, so an unsupported method costs one failed call per build rather
+than one per file. An explicitly chosen method falls back the same way when
+the file systems cannot do it.
+
+Copies never carry over permission bits: outputs get the default mode for
+the umask, like the rendered pages.
+"""
+
+import errno
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+COPY_STRATEGIES = ("auto", "reflink", "kernel", "hardlink", "copy")
+
+# From <linux/fs.h>: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# Errors meaning "this method cannot copy between these files", as opposed
+# to a failure that the next method would hit as well
+_UNSUPPORTED = {
+    errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.ENOSYS,
+    errno.ENOTTY, errno.EPERM, errno.EMLINK, errno.EBADF,
+}
+
+# Methods that share the source's data instead of copying it
+_SHARED = ("reflink", "hardlink")
+
+
+def _fallbacks(strategy):
+    """Return the methods to try, in order, for a strategy."""
+    chain = ["reflink", "kernel", "copy"]
+    if strategy == "auto":
+        return chain
+    if strategy == "hardlink":
+        return ["hardlink"] + chain
+    return chain[chain.index(strategy):]
+
+
+class FileCopier:
+    """Copies files with the cheapest supported method and counts the bytes.
+
+    Attributes:
+        strategy (str): One of COPY_STRATEGIES
+        bytes_copied (int): Bytes written to outputs (kernel or plain copies,
+            and files streamed from git objects or archives)
+        bytes_shared (int): Bytes of outputs reflinked or hardlinked to
+            their source, which were not written at all
+        methods (dict): Method name -> number of files copied with it
+    """
+
+    def __init__(self, strategy="auto"):
+        """Initialize the copier.
+
+        Args:
+            strategy (str): "auto", "reflink", "kernel", "hardlink" or "copy"
+
+        Raises:
+            ValueError: If the strategy is not recognised
+        """
+        if strategy not in COPY_STRATEGIES:
+            raise ValueError(f"Unknown copy strategy: {strategy} "
+                             f"(expected one of {', '.join(COPY_STRATEGIES)})")
+        self.strategy = strategy
+        self.bytes_copied = 0
+        self.bytes_shared = 0
+        self.methods = {}
+        self._chain = _fallbacks(strategy)
+        self._detected = {}
+        self._lock = threading.Lock()
+
+    def copy(self, src_path, dest_path):
+        """Copy a file's contents to dest_path, replacing any existing file.
+
+        Args:
+            src_path (str): File to copy
+            dest_path (str): Destination file path
+
+        Returns:
+            str: The method that copied the file
+        """
+        with open(src_path, 'rb') as src:
+            st = os.fstat(src.fileno())
+            dest_dir = os.path.dirname(os.path.abspath(dest_path))
+            devices = (st.st_dev, os.stat(dest_dir).st_dev)
+            start = self._detected.get(devices, 0)
+            for position in range(start, len(self._chain)):
+                method = self._chain[position]
+                if getattr(self, "_" + method)(src, src_path, dest_path, st.st_size):
+                    break
+        with self._lock:
+            self._detected.setdefault(devices, position)
+        self.record(method, st.st_size)
+        return method
+
+    def record(self, method, size):
+        """Count a copied file.
+
+        Sources that cannot be copied by path (git objects, archive members)
+        stream their bytes and record them as a plain "copy".
+
+        Args:
+            method (str): How the file was copied
+            size (int): Size of the file in bytes
+        """
+        with self._lock:
+            self.methods[method] = self.methods.get(method, 0) + 1
+            if method in _SHARED:
+                self.bytes_shared += size
+            else:
+                self.bytes_copied += size
+
+    def _hardlink(self, src, src_path, dest_path, size):
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(src_path, dest_path)
+        except OSError as e:
+            if e.errno in _UNSUPPORTED:
+                return False
+            raise
+        return True
+
+    def _reflink(self, src, src_path, dest_path, size):
+        if fcntl is None:
+            return False
+        with open(dest_path, 'wb') as dest:
+            try:
+                fcntl.ioctl(dest.fileno(), _FICLONE, src.fileno())
+            except OSError as e:
+                if e.errno in _UNSUPPORTED:
+                    return False
+                raise
+        return True
+
+    def _kernel(self, src, src_path, dest_path, size):
+        with open(dest_path, 'wb') as dest:
+            for name in ("copy_file_range", "sendfile"):
+                if not hasattr(os, name):
+                    continue
+                try:
+                    getattr(self, "_" + name)(src.fileno(), dest.fileno(), size)
+                except OSError as e:
+                    if e.errno not in _UNSUPPORTED:
+                        raise
+                    # Start over with the next call; a failed one may have
+                    # copied part of the file
+                    dest.truncate(0)
+                    os.lseek(dest.fileno(), 0, os.SEEK_SET)
+                    continue
+                return True
+        return False
+
+    def _copy_file_range(self, src_fd, dest_fd, size):
+        offset = 0
+        while offset < size:
+            copied = os.copy_file_range(src_fd, dest_fd, size - offset, offset, offset)
+            if copied == 0:
+                break  # The source shrank while being copied
+            offset += copied
+
+    def _sendfile(self, src_fd, dest_fd, size):
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(dest_fd, src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+    def _copy(self, src, src_path, dest_path, size):
+        src.seek(0)
+        with open(dest_path, 'wb') as dest:
+            for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                dest.write(chunk)
+        return True
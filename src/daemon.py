@@ -0,0 +1,305 @@
+"""
+Long-running build daemon that keeps the site's state warm in memory.
+
+Every `main.py` run pays for interpreter startup, imports, reading the
+template and walking the whole tree. The daemon pays those once and then
+serves rebuild requests over a unix socket, keeping in memory:
+
+- the template text and its stat signature and digest,
+- the content index with a stat signature and digest per page,
+- the rendered HTML of every page and the stat of its output file,
+- the stat signature and digest of every static file.
+
+A rebuild therefore only stats files. It re-renders changed pages and
+rewrites an output only when it changed or was modified behind the
+daemon's back. When the caller already knows which files changed (an
+editor on save, a file watcher), "rebuild these paths" skips the tree
+walk entirely.
+
+Protocol: one JSON request per connection, answered with one JSON line.
+
+    {"op": "rebuild"}                     check every input
+    {"op": "rebuild", "paths": [...]}     check only these input paths
+    {"op": "status"}                      report the daemon's state
+    {"op": "stop"}                        shut the daemon down
+
+Responses have "ok": true plus the result, or "ok": false and "error".
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from directory import DirectoryOutput, remove_output
+from gitchanges import under
+from manifest import check_input
+from page import render_page
+from render import html_output_path
+from sources import DirectorySource
+
+
+DEFAULT_SOCKET = ".ssg-daemon.sock"
+
+
+class BuildDaemon:
+    """Incremental builder that keeps every input and output in memory.
+
+    Attributes:
+        builds (int): Number of rebuilds served
+        last_build (dict): Result of the most recent rebuild
+    """
+
+    def __init__(self, dir_path_content, template_path, static_dir, dest_dir_path, basepath="/"):
+        """Initialize the daemon's state; nothing is read until the first rebuild.
+
+        Args:
+            dir_path_content (str): Path to the content directory
+            template_path (str): Path to the HTML template file
+            static_dir (str): Path to the static files directory
+            dest_dir_path (str): Path to the destination directory
+            basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+        """
+        self.dir_path_content = dir_path_content
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.dest_dir_path = dest_dir_path
+        self.basepath = basepath
+        self.builds = 0
+        self.last_build = None
+        self.started = time.time()
+        self._template_entry = None
+        self._template_content = None
+        # key -> {"entry": input state, "html": rendered page, "output": (size, mtime_ns)}
+        self._pages = {}
+        # relative path -> {"entry": input state, "output": (size, mtime_ns)}
+        self._static = {}
+        self._lock = threading.Lock()
+
+    def _load_template(self):
+        """Re-read the template if it changed. Returns True if it did."""
+        changed, entry = check_input(self.template_path, self._template_entry)
+        self._template_entry = entry
+        if changed or self._template_content is None:
+            with open(self.template_path, 'r') as f:
+                self._template_content = f.read()
+            return True
+        return False
+
+    def _output_current(self, dest_path, recorded):
+        try:
+            st = os.stat(dest_path)
+        except OSError:
+            return False
+        return recorded == (st.st_size, st.st_mtime_ns)
+
+    def _output_stat(self, dest_path):
+        st = os.stat(dest_path)
+        return (st.st_size, st.st_mtime_ns)
+
+    def _build_page(self, key, output, counts, force):
+        src_path = os.path.join(self.dir_path_content, key)
+        dest_path = os.path.join(self.dest_dir_path, html_output_path(key))
+        state = self._pages.get(key)
+        if not os.path.exists(src_path):
+            if state is not None:
+                del self._pages[key]
+                remove_output(dest_path, self.dest_dir_path)
+                counts["removed"] += 1
+            return
+
+        changed, entry = check_input(src_path, state and state["entry"])
+        if force or changed or state is None:
+            with open(src_path, 'r') as f:
+                markdown_content = f.read()
+            print(f"Generating page from {src_path} to {dest_path}")
+            html = render_page(markdown_content, self._template_content, self.basepath)
+            state = {"entry": entry, "html": html, "output": None}
+            self._pages[key] = state
+            counts["rendered"] += 1
+        else:
+            state["entry"] = entry
+        if not self._output_current(dest_path, state["output"]):
+            if output.write_bytes(dest_path, state["html"].encode('utf-8')):
+                counts["written"] += 1
+            state["output"] = self._output_stat(dest_path)
+
+    def _build_static(self, rel_path, output, counts):
+        src_path = os.path.join(self.static_dir, rel_path)
+        dest_path = os.path.join(self.dest_dir_path, rel_path)
+        state = self._static.get(rel_path)
+        if not os.path.exists(src_path):
+            if state is not None:
+                del self._static[rel_path]
+                remove_output(dest_path, self.dest_dir_path)
+                counts["removed"] += 1
+            return
+
+        changed, entry = check_input(src_path, state and state["entry"])
+        if changed or state is None or not self._output_current(dest_path, state["output"]):
+            if output.copy_from(DirectorySource(self.static_dir), rel_path, dest_path):
+                counts["written"] += 1
+            state = {"entry": entry, "output": self._output_stat(dest_path)}
+            self._static[rel_path] = state
+        else:
+            state["entry"] = entry
+
+    def rebuild(self, paths=None):
+        """Bring the output directory up to date.
+
+        Args:
+            paths (list, optional): Input paths known to have changed, as
+                given on the command line (e.g. "content/blog/post.md"). When
+                omitted, every input is checked and new files are found by
+                walking the content and static directories.
+
+        Returns:
+            dict: Counts of "rendered" pages, "written" outputs and "removed"
+                outputs, the "ignored" paths that are not inputs, and "seconds"
+        """
+        with self._lock:
+            start = time.perf_counter()
+            counts = {"rendered": 0, "written": 0, "removed": 0, "ignored": []}
+            output = DirectoryOutput(self.dest_dir_path, prune=False)
+            template_key = os.path.normpath(self.template_path)
+
+            if paths is None:
+                force = self._load_template()
+                page_keys = [key for key in DirectorySource(self.dir_path_content).list_files(".")
+                             if key.endswith('.md')]
+                page_keys = sorted(set(page_keys) | set(self._pages))
+                static_keys = sorted(set(DirectorySource(self.static_dir).list_files(".")) | set(self._static))
+            else:
+                force = False
+                page_keys = []
+                static_keys = []
+                for path in paths:
+                    path = os.path.normpath(path).replace(os.sep, '/')
+                    page_key = under(path, self.dir_path_content)
+                    static_key = under(path, self.static_dir)
+                    if path == template_key.replace(os.sep, '/'):
+                        force = self._load_template() or force
+                    elif page_key and page_key.endswith('.md'):
+                        page_keys.append(page_key)
+                    elif static_key:
+                        static_keys.append(static_key)
+                    else:
+                        counts["ignored"].append(path)
+                if force:
+                    # Every page embeds the template
+                    page_keys = sorted(set(page_keys) | set(self._pages))
+
+            for key in static_keys:
+                self._build_static(key, output, counts)
+            for key in page_keys:
+                self._build_page(key, output, counts, force)
+
+            counts["seconds"] = round(time.perf_counter() - start, 6)
+            self.builds += 1
+            self.last_build = counts
+            return counts
+
+    def status(self):
+        """Report what the daemon holds in memory.
+
+        Returns:
+            dict: Page and static file counts, builds served, uptime and the
+                result of the last rebuild
+        """
+        with self._lock:
+            return {
+                "pages": len(self._pages),
+                "static": len(self._static),
+                "builds": self.builds,
+                "uptime": round(time.time() - self.started, 3),
+                "basepath": self.basepath,
+                "last_build": self.last_build,
+            }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers one request per connection."""
+
+    def handle(self):
+        server = self.server
+        try:
+            request = json.loads(self.rfile.readline())
+            op = request.get("op")
+            if op == "rebuild":
+                response = {"ok": True, **server.daemon.rebuild(request.get("paths"))}
+            elif op == "status":
+                response = {"ok": True, **server.daemon.status()}
+            elif op == "stop":
+                response = {"ok": True}
+                # shutdown() waits for serve_forever(), which is running this handler
+                threading.Thread(target=server.shutdown).start()
+            else:
+                response = {"ok": False, "error": f"Unknown request: {op!r}"}
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+
+
+class _Server(socketserver.UnixStreamServer):
+    pass
+
+
+def serve(daemon, socket_path=DEFAULT_SOCKET, ready=None):
+    """Serve requests for a daemon until it is asked to stop.
+
+    Requests are handled one at a time, so rebuilds never overlap.
+
+    Args:
+        daemon (BuildDaemon): The daemon to serve
+        socket_path (str): Path of the unix socket to listen on
+        ready (threading.Event, optional): Set once the socket is listening
+
+    Raises:
+        RuntimeError: If another daemon is already listening on socket_path
+    """
+    if os.path.exists(socket_path):
+        try:
+            request(socket_path, {"op": "status"}, timeout=1)
+        except OSError:
+            os.remove(socket_path)  # Left behind by a daemon that died
+        else:
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+    server = _Server(socket_path, _RequestHandler)
+    server.daemon = daemon
+    try:
+        if ready is not None:
+            ready.set()
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def request(socket_path, message, timeout=None):
+    """Send one request to a running daemon and return its response.
+
+    Args:
+        socket_path (str): Path of the daemon's unix socket
+        message (dict): The request, e.g. {"op": "status"}
+        timeout (float, optional): Socket timeout in seconds
+
+    Returns:
+        dict: The daemon's response
+
+    Raises:
+        OSError: If no daemon is listening on socket_path
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        with sock.makefile('rb') as rfile, sock.makefile('wb') as wfile:
+            wfile.write((json.dumps(message) + "\n").encode('utf-8'))
+            wfile.flush()
+            line = rfile.readline()
+    if not line:
+        raise ConnectionError(f"The daemon on {socket_path} closed the connection")
+    return json.loads(line)
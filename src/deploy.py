@@ -0,0 +1,79 @@
+"""
+Deploy manifest listing every output file and what changed since last time.
+
+Uploading a site to object storage only needs the files that changed.
+Rather than re-hashing the output directory after the build, the output
+backends record the size and SHA-256 digest of every file as they produce
+it (see directory.py and staging.py). This module compares that listing
+with the one saved by the previous build and writes both to a JSON file:
+
+    {
+      "version": 1,
+      "files": {"blog/post.html": {"size": 1234, "digest": "ab12..."}, ...},
+      "diff": {"added": [...], "modified": [...], "deleted": [...]}
+    }
+
+An upload script can push "added" and "modified" and delete "deleted".
+"""
+
+import json
+
+from manifest import save_manifest
+
+
+DEPLOY_MANIFEST_VERSION = 1
+
+
+def load_deploy_files(path):
+    """Load the file listing of a previous deploy manifest.
+
+    A missing or unreadable manifest counts as an empty listing, so every
+    output is reported as added.
+
+    Args:
+        path (str): Path of the deploy manifest
+
+    Returns:
+        dict: Output-relative path -> {"size", "digest"}
+    """
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    files = manifest.get("files") if isinstance(manifest, dict) else None
+    return files if isinstance(files, dict) else {}
+
+
+def diff_files(old_files, new_files):
+    """Compare two file listings.
+
+    Args:
+        old_files (dict): Listing from the previous build
+        new_files (dict): Listing from this build
+
+    Returns:
+        dict: Sorted "added", "modified" and "deleted" path lists
+    """
+    return {
+        "added": sorted(set(new_files) - set(old_files)),
+        "modified": sorted(path for path, entry in new_files.items()
+                           if path in old_files and old_files[path].get("digest") != entry["digest"]),
+        "deleted": sorted(set(old_files) - set(new_files)),
+    }
+
+
+def write_deploy_manifest(path, files, old_files):
+    """Write a deploy manifest with its diff against the previous build.
+
+    Args:
+        path (str): Path of the deploy manifest
+        files (dict): Listing recorded by this build's output backend
+        old_files (dict): Listing from load_deploy_files() before the build
+
+    Returns:
+        dict: The diff that was written
+    """
+    diff = diff_files(old_files, files)
+    save_manifest({"version": DEPLOY_MANIFEST_VERSION, "files": files, "diff": diff}, path)
+    return diff
@@ -0,0 +1,338 @@
+"""
+Output backend that writes the site in place, skipping unchanged files.
+
+Rewriting a file with the same bytes still bumps its mtime, which makes
+rsync, CDN sync tools and browser caches treat it as new. DirectoryOutput
+compares every output with the file already on disk, first by size and
+then by SHA-256 digest, and leaves the file untouched when they match.
+
+Changed files are written to a temporary file and renamed over the old
+one, so readers never see a partly written file and a file that happens to
+be hardlinked elsewhere is replaced rather than modified through the link.
+
+Instead of deleting the output directory before a full build, the backend
+remembers which files the build produced and, when closed, removes the
+ones that were not produced again (pages and assets whose source was
+deleted) along with any directories left empty.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from copier import FileCopier
+from manifest import file_digest
+
+
+class HashWriter:
+    """File-like object that hashes whatever is written to it.
+
+    Attributes:
+        digest: The running hashlib.sha256 object
+        size (int): Number of bytes written
+    """
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return len(data)
+
+
+def source_digest(source, src_path):
+    """Compute the SHA-256 hex digest of a file in an input source.
+
+    Args:
+        source: Input source (see sources.py)
+        src_path (str): Path of the file within the source
+    """
+    hasher = HashWriter()
+    source.copy_to(src_path, hasher)
+    return hasher.digest.hexdigest()
+
+
+def stat_matches(path, size, mtime_ns):
+    """Check whether a file on disk has the given size and modification time.
+
+    Static files are copied with their source's mtime (see
+    DirectoryOutput.copy_from), so this detects unchanged copies without
+    reading either file.
+
+    Args:
+        path (str): File to compare against; it may not exist
+        size (int): Expected size in bytes
+        mtime_ns (int): Expected modification time in nanoseconds
+
+    Returns:
+        bool: True if both match
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_size == size and st.st_mtime_ns == mtime_ns
+
+
+def file_matches(path, size, digest):
+    """Check whether a file on disk has the given size and digest.
+
+    The size is compared first so most changed files are never hashed.
+
+    Args:
+        path (str): File to compare against; it may not exist
+        size (int): Expected size in bytes
+        digest (callable or str): Expected SHA-256 hex digest, or a callable
+            computing it, which is only called when the sizes match
+
+    Returns:
+        bool: True if the sizes and digests match
+    """
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        return file_digest(path) == (digest() if callable(digest) else digest)
+    except OSError:
+        return False
+
+
+class DirectoryOutput:
+    """Writes outputs into a directory, leaving unchanged files untouched.
+
+    Build functions pass their destination paths unchanged; the backend only
+    decides whether each file needs writing.
+
+    Attributes:
+        path (str): The output directory
+        prune (bool): Remove files that were not produced when closing
+        written (int): Outputs that were created or changed
+        skipped (int): Outputs whose bytes were already on disk
+        removed (int): Stale files pruned when closing
+        files (dict): Output-relative path -> {"size", "digest"} of every
+            output, or None when not tracking (see deploy.py)
+        trust_mtime (bool): Treat copied files whose size and mtime match
+            their source as unchanged without hashing them
+        copier (FileCopier): Copies static files and counts the bytes moved
+    """
+
+    def __init__(self, path, prune=True, track=False, trust_mtime=True, copier=None):
+        """Initialize the backend, creating the directory if needed.
+
+        Args:
+            path (str): The output directory
+            prune (bool): Remove files that were not produced when closing.
+                Full builds use this instead of deleting the directory first.
+            track (bool): Record the size and digest of every output in
+                files. Static files are then always hashed, not just when
+                their size matches the existing output.
+            trust_mtime (bool): Skip copying files whose size and mtime match
+                the source's. False compares every same-size file by digest.
+            copier (FileCopier, optional): Copy strategy for static files;
+                defaults to FileCopier("auto")
+        """
+        self.path = path
+        self.prune = prune
+        self.trust_mtime = trust_mtime
+        self.copier = copier if copier is not None else FileCopier()
+        self.written = 0
+        self.skipped = 0
+        self.removed = 0
+        self.files = {} if track else None
+        self._produced = set()
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failed build must not prune the outputs it did not get to
+        if exc_type is None:
+            self.close()
+
+    def _prepare(self, dest_path):
+        # Raises for paths outside the output directory (e.g. from archive members)
+        output_key(dest_path, self.path)
+        with self._lock:
+            self._produced.add(os.path.abspath(dest_path))
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+
+    def _count(self, dest_path, written, size, digest):
+        with self._lock:
+            if written:
+                self.written += 1
+            else:
+                self.skipped += 1
+            if self.files is not None:
+                self.files[output_key(dest_path, self.path)] = {"size": size, "digest": digest}
+
+    def write_bytes(self, dest_path, data):
+        """Write a file unless it already has exactly these contents.
+
+        Args:
+            dest_path (str): Output file path
+            data (bytes): File contents
+
+        Returns:
+            bool: True if the file was written
+        """
+        self._prepare(dest_path)
+        digest = hashlib.sha256(data).hexdigest()
+        written = not file_matches(dest_path, len(data), digest)
+        if written:
+            _replace(dest_path, lambda tmp_path: _write_file(tmp_path, data))
+        self._count(dest_path, written, len(data), digest)
+        return written
+
+    def copy_from(self, source, src_path, dest_path):
+        """Copy a file from an input source unless the output already matches.
+
+        The output is given the source's mtime, so the next build can tell
+        it is unchanged from its size and mtime alone. A file that matches
+        by digest but not by mtime gets its mtime updated once.
+
+        Args:
+            source: Input source (see sources.py)
+            src_path (str): Path of the file within the source
+            dest_path (str): Output file path
+
+        Returns:
+            bool: True if the file was copied
+        """
+        self._prepare(dest_path)
+        size = source.size(src_path)
+        mtime_ns = source.mtime_ns(src_path)
+        digest = source_digest(source, src_path) if self.files is not None else None
+        if self.trust_mtime and mtime_ns is not None and stat_matches(dest_path, size, mtime_ns):
+            written = False
+        else:
+            written = not file_matches(dest_path, size, digest or (lambda: source_digest(source, src_path)))
+            if written:
+                _replace(dest_path, lambda tmp_path: source.copy_file(src_path, tmp_path, self.copier))
+            if mtime_ns is not None:
+                os.utime(dest_path, ns=(mtime_ns, mtime_ns))
+        self._count(dest_path, written, size, digest)
+        return written
+
+    def link_from(self, existing_path, dest_path):
+        """Hardlink a file that is already on disk into the output.
+
+        Used to share identical files between several outputs. Falls back
+        to copying where hardlinks are not possible (e.g. across devices).
+
+        Args:
+            existing_path (str): File to share, typically in another output
+            dest_path (str): Output file path
+
+        Returns:
+            bool: True if the file was linked or copied, False if dest_path
+                already was that file
+        """
+        self._prepare(dest_path)
+        size = os.path.getsize(existing_path)
+        digest = file_digest(existing_path) if self.files is not None else None
+        try:
+            written = not os.path.samefile(existing_path, dest_path)
+        except OSError:
+            written = True
+        if written:
+            _replace(dest_path, lambda tmp_path: _link_file(existing_path, tmp_path))
+        self._count(dest_path, written, size, digest)
+        return written
+
+    def close(self):
+        """Remove stale outputs if pruning is enabled."""
+        if not self.prune:
+            return
+        for dirpath, dirnames, filenames in os.walk(self.path, topdown=False):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if os.path.abspath(path) not in self._produced:
+                    print(f"Removing stale output: {path}")
+                    os.remove(path)
+                    self.removed += 1
+            if dirpath != self.path and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+
+def remove_output(dest_path, dest_dir_path):
+    """Remove a generated file and any directories it leaves empty.
+
+    Args:
+        dest_path (str): Path of the generated file to remove
+        dest_dir_path (str): Root output directory, which is never removed
+    """
+    if os.path.exists(dest_path):
+        print(f"Removing stale output: {dest_path}")
+        os.remove(dest_path)
+
+    parent = os.path.dirname(dest_path)
+    root = os.path.abspath(dest_dir_path)
+    while os.path.abspath(parent) != root and os.path.isdir(parent) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+def output_key(dest_path, root):
+    """Return the output-relative path of a file, using '/'.
+
+    Args:
+        dest_path (str): Output file path
+        root (str): Output directory
+
+    Raises:
+        ValueError: If dest_path is not below root
+    """
+    rel = os.path.relpath(dest_path, root)
+    if rel == "." or rel.startswith(".."):
+        raise ValueError(f"{dest_path} is not inside the output directory {root}")
+    return rel.replace(os.sep, '/')
+
+
+def _write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _link_file(existing_path, path):
+    os.remove(path)
+    try:
+        os.link(existing_path, path)
+    except OSError:
+        shutil.copyfile(existing_path, path)
+
+
+def _replace(dest_path, fill):
+    """Create dest_path by filling a temporary file and renaming it into place.
+
+    Args:
+        dest_path (str): File to create or replace
+        fill (callable): Called with the temporary path to write the contents
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path) or ".", prefix=".tmp-")
+    os.close(fd)
+    try:
+        # mkstemp creates the file private; fill() may copy the source's mode
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        fill(tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _current_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Read once: changing the umask is not thread-safe
+_UMASK = _current_umask()
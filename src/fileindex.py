@@ -0,0 +1,108 @@
+"""
+One up-front index of the input trees, shared by every build stage.
+
+Without it, the static copy, page discovery and change detection each walk
+their directories and stat their files again (os.listdir followed by
+os.path.isfile, os.path.getsize and os.stat per entry), which adds up on
+network file systems where every metadata call is a round trip.
+
+FileIndex walks each tree once with os.scandir, which tells files from
+directories without a stat call, and stats every file exactly once. The
+results (size, mtime, inode, ...) are then served from memory to:
+
+- sources.DirectorySource (static copy and generate_pages_recursive),
+- main.find_markdown_files (page discovery for parallel and incremental builds),
+- manifest.check_input (incremental change detection).
+"""
+
+import os
+
+
+class FileIndex:
+    """Stat results of every file below a set of directories.
+
+    Attributes:
+        roots (list): The indexed directories, normalised
+    """
+
+    def __init__(self, roots):
+        """Walk each directory and stat its files.
+
+        Directories that do not exist are indexed as missing, so lookups
+        below them report no files instead of walking the disk again.
+
+        Args:
+            roots (list): Directories to index
+        """
+        self.roots = []
+        self._files = {}
+        self._stats = {}
+        for root in roots:
+            root = os.path.normpath(root)
+            if root in self._files:
+                continue
+            self.roots.append(root)
+            files = []
+            if os.path.isdir(root):
+                self._scan(root, "", files)
+            files.sort()
+            self._files[root] = files
+
+    def _scan(self, directory, prefix, files):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel = prefix + entry.name
+                if entry.is_dir():
+                    # Like os.walk, list symlinked directories but do not follow them
+                    if not entry.is_symlink():
+                        self._scan(entry.path, rel + "/", files)
+                    continue
+                try:
+                    self._stats[os.path.normpath(entry.path)] = entry.stat()
+                except OSError:
+                    continue  # Dangling symlink or removed during the walk
+                files.append(rel)
+
+    def _root_of(self, path):
+        path = os.path.normpath(path)
+        for root in self.roots:
+            if path == root or path.startswith(root + os.sep):
+                return root
+            if root == "." and not os.path.isabs(path) and path.split(os.sep)[0] != "..":
+                return root
+        return None
+
+    def covers(self, path):
+        """Return True if path is inside an indexed directory."""
+        return self._root_of(path) is not None
+
+    def list_files(self, directory):
+        """List every file below a directory, recursively.
+
+        Args:
+            directory (str): An indexed directory or a directory inside one
+
+        Returns:
+            list: Sorted paths relative to directory, using '/', or None if
+                the directory is not covered by the index
+        """
+        directory = os.path.normpath(directory)
+        root = self._root_of(directory)
+        if root is None:
+            return None
+        if directory == root:
+            return list(self._files[root])
+        prefix = os.path.relpath(directory, root).replace(os.sep, '/') + "/"
+        return [rel[len(prefix):] for rel in self._files[root] if rel.startswith(prefix)]
+
+    def stat(self, path):
+        """Return the cached os.stat_result of a file.
+
+        Args:
+            path (str): Path of a file inside an indexed directory
+
+        Returns:
+            os.stat_result: The file's stat result, or None if the file is
+                not in the index
+        """
+        return self._stats.get(os.path.normpath(path))
@@ -0,0 +1,46 @@
+"""
+File helpers shared by the test modules.
+"""
+
+import os
+
+
+def write_file(path, data):
+    """Write text or bytes to a file, creating its parent directories.
+
+    Args:
+        path (str): File to write
+        data (str or bytes): Contents; text is encoded as UTF-8
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data if isinstance(data, bytes) else data.encode("utf-8"))
+
+
+def read_file(path):
+    """Return the text of a file."""
+    with open(path) as f:
+        return f.read()
+
+
+def read_bytes(path):
+    """Return the bytes of a file."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def read_tree(root):
+    """Read every file below a directory.
+
+    Args:
+        root (str): Directory to read
+
+    Returns:
+        dict: Path relative to root, using '/' -> file bytes
+    """
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            files[os.path.relpath(path, root).replace(os.sep, "/")] = read_bytes(path)
+    return files
@@ -0,0 +1,145 @@
+"""
+Git-based change detection for incremental builds.
+
+When the site lives in a git repository, git already knows which files
+changed since the commit the previous build was produced from. Asking git
+for that list is much cheaper than stat-ing and hashing every file in a
+large content tree, and it also reports renames, which lets an incremental
+build move outputs instead of re-rendering them.
+"""
+
+import os
+import subprocess
+
+
+class GitError(RuntimeError):
+    """Raised when a git command fails or git is not available."""
+
+
+def run_git(args, cwd="."):
+    """Run a git command and return its standard output.
+
+    Args:
+        args (list): Arguments after "git"
+        cwd (str): Directory to run git in
+
+    Returns:
+        str: Standard output of the command
+
+    Raises:
+        GitError: If git is missing or exits with an error
+    """
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+    except OSError as e:
+        raise GitError(f"Could not run git: {e}")
+    if result.returncode != 0:
+        raise GitError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def head_commit(cwd="."):
+    """Return the full SHA of HEAD.
+
+    Args:
+        cwd (str): Directory inside the repository
+
+    Returns:
+        str: Commit SHA
+
+    Raises:
+        GitError: If cwd is not inside a git repository with commits
+    """
+    return run_git(["rev-parse", "--verify", "HEAD"], cwd).strip()
+
+
+def _normalize(path):
+    return os.path.normpath(path).replace(os.sep, '/')
+
+
+def changed_files(since, paths, cwd="."):
+    """List files changed between a commit and the working tree.
+
+    Includes committed changes, uncommitted edits and untracked files.
+    Renames are detected with git's default similarity threshold.
+
+    Args:
+        since (str): Commit to compare against
+        paths (list): Paths (relative to cwd) to restrict the comparison to
+        cwd (str): Directory inside the repository
+
+    Returns:
+        list: (status, old_path, new_path) tuples. status is "A", "M", "D"
+            or "R"; old_path is None for additions and new_path is None for
+            deletions. "R" is only used for pure renames (identical content);
+            a rename with edits is reported as a deletion plus an addition.
+            Paths are relative to cwd and use '/'.
+
+    Raises:
+        GitError: If git fails, e.g. because the commit no longer exists
+    """
+    output = run_git(["diff", "--name-status", "-M", "-z", "--relative", since, "--", *paths], cwd)
+    tokens = output.split('\0')
+    changes = []
+    i = 0
+    while i < len(tokens) - 1:
+        status = tokens[i]
+        if status[0] in "RC":
+            old_path, new_path = _normalize(tokens[i + 1]), _normalize(tokens[i + 2])
+            i += 3
+            if status == "R100":
+                changes.append(("R", old_path, new_path))
+            else:
+                # A copy, or a rename with edits, still needs the new page rendered
+                if status[0] == "R":
+                    changes.append(("D", old_path, None))
+                changes.append(("A", None, new_path))
+            continue
+        status = status[0]
+        path = _normalize(tokens[i + 1])
+        i += 2
+        if status == "A":
+            changes.append(("A", None, path))
+        elif status == "D":
+            changes.append(("D", path, None))
+        else:
+            changes.append(("M", path, path))
+
+    untracked = run_git(["ls-files", "--others", "--exclude-standard", "-z", "--", *paths], cwd)
+    for path in untracked.split('\0'):
+        if path:
+            changes.append(("A", None, _normalize(path)))
+    return changes
+
+
+def dirty_files(paths, cwd="."):
+    """List files under paths that differ from HEAD in the working tree.
+
+    Args:
+        paths (list): Paths (relative to cwd) to check
+        cwd (str): Directory inside the repository
+
+    Returns:
+        list: Sorted paths relative to cwd, using '/'
+    """
+    dirty = set()
+    for _, old_path, new_path in changed_files("HEAD", paths, cwd):
+        dirty.update(path for path in (old_path, new_path) if path)
+    return sorted(dirty)
+
+
+def under(path, directory):
+    """Return path relative to directory, or None if it is outside it.
+
+    Args:
+        path (str): Path using '/'
+        directory (str): Directory using '/'
+
+    Returns:
+        str: The relative path, or None
+    """
+    directory = _normalize(directory)
+    if directory == ".":
+        return path
+    prefix = directory + "/"
+    return path[len(prefix):] if path.startswith(prefix) else None
@@ -1,11 +1,39 @@
+import argparse
+import contextlib
+import fnmatch
 import os
 import shutil
 import sys
 from textnode import TextNode, TextType
-from markdown import markdown_to_html_node
+# extract_title and generate_page lived here originally and are still
+# importable from main
+from page import apply_basepath, extract_title, render_page
+from render import generate_page, html_output_path, write_page
+from parallel import EXECUTORS, default_jobs, generate_pages_pipelined
+from timings import TIMINGS_FILENAME, BuildTimings
+from cache import RenderCache, blob_cache_key, cache_key, parse_age, parse_size
+from sources import DirectorySource, GitSource, open_source
+from fileindex import FileIndex
+from archive import is_archive_path, open_archive_output
+from staging import StagingOutput
+from copier import COPY_STRATEGIES, FileCopier
+from directory import DirectoryOutput, remove_output
+from deploy import load_deploy_files, write_deploy_manifest
+from gitchanges import GitError, changed_files, dirty_files, head_commit, under
+from coordinator import BuildCoordinator, parse_address, run_worker
+from daemon import DEFAULT_SOCKET, BuildDaemon, request, serve
+from shard import ShardMergeError, check_shards, merge_shards, parse_shard, shard_of
+from manifest import (
+    MANIFEST_FILENAME,
+    check_input,
+    load_manifest,
+    new_manifest,
+    save_manifest,
+    settings_changed,
+)
 
 
-def copy_static(src_dir, dest_dir):
+def copy_static(src_dir, dest_dir, clean=True, source=None, output=None):
     """
     Recursively copy all contents from source directory to destination directory.
     
@@ -15,175 +43,1302 @@ def copy_static(src_dir, dest_dir):
     Args:
         src_dir (str): Path to source directory
         dest_dir (str): Path to destination directory
+        clean (bool): Delete the destination directory first. Incremental
+            builds pass False so previously generated pages are kept.
+            Ignored with an output backend, which handles stale files itself.
+        source (optional): Input source src_dir is read from (see sources.py);
+            defaults to the file system
+        output (optional): Output backend to write through (see archive.py,
+            staging.py and directory.py)
     """
+    if output is not None:
+        _copy_directory_contents(src_dir, dest_dir, source, output)
+        return
+    
     # First, clean the destination directory
-    if os.path.exists(dest_dir):
+    if clean and os.path.exists(dest_dir):
         print(f"Cleaning destination directory: {dest_dir}")
         shutil.rmtree(dest_dir)
     
     # Create the destination directory
-    print(f"Creating destination directory: {dest_dir}")
-    os.mkdir(dest_dir)
+    if not os.path.exists(dest_dir):
+        print(f"Creating destination directory: {dest_dir}")
+        os.mkdir(dest_dir)
     
     # Copy contents recursively
-    _copy_directory_contents(src_dir, dest_dir)
+    _copy_directory_contents(src_dir, dest_dir, source)
 
 
-def _copy_directory_contents(src_dir, dest_dir):
+def _copy_directory_contents(src_dir, dest_dir, source=None, output=None):
     """
     Helper function to recursively copy directory contents.
     
     Args:
         src_dir (str): Source directory path
         dest_dir (str): Destination directory path
+        source (optional): Input source src_dir is read from; defaults to
+            the file system
+        output (optional): Archive to write into instead of dest_dir
+        
+    Returns:
+        list: Paths of the copied files relative to src_dir
     """
-    if not os.path.exists(src_dir):
+    if source is None:
+        source = DirectorySource()
+    if not source.is_dir(src_dir):
         print(f"Source directory does not exist: {src_dir}")
-        return
+        return []
     
-    # List all items in source directory
-    for item in os.listdir(src_dir):
-        src_path = os.path.join(src_dir, item)
-        dest_path = os.path.join(dest_dir, item)
+    # Files are copied in the order the source lists them, which for
+    # archives is the order they can be streamed in
+    files = source.list_files(src_dir)
+    for rel_path in files:
+        src_path = f"{src_dir}/{rel_path}"
+        dest_path = os.path.join(dest_dir, *rel_path.split('/'))
         
-        if os.path.isfile(src_path):
-            # Copy file
+        if output is not None:
             print(f"Copying file: {src_path} -> {dest_path}")
-            shutil.copy(src_path, dest_path)
-        else:
-            # Create subdirectory and recursively copy its contents
-            print(f"Creating directory: {dest_path}")
-            os.mkdir(dest_path)
-            _copy_directory_contents(src_path, dest_path)
+            output.copy_from(source, src_path, dest_path)
+            continue
+        parent = os.path.dirname(dest_path)
+        if not os.path.exists(parent):
+            print(f"Creating directory: {parent}")
+            os.makedirs(parent)
+        print(f"Copying file: {src_path} -> {dest_path}")
+        source.copy_file(src_path, dest_path)
+    return files
 
 
-def extract_title(markdown):
+def sync_static(src_dir, dest_dir, recorded, source=None, output=None):
     """
-    Extract the title from markdown content.
-    Looks for the first h1 heading (# Title).
+    Copy new and changed static files and remove outputs of deleted ones.
+    
+    Incremental builds keep the output directory instead of pruning it, so
+    an output is only removed when it is listed in recorded (the static
+    files of the previous build) and its source is gone. Generated pages
+    and other files with no counterpart in src_dir are never touched.
     
     Args:
-        markdown (str): Markdown content
+        src_dir (str): Path to the static directory
+        dest_dir (str): Path to the destination directory
+        recorded (list): Static files copied by the previous build, relative
+            to src_dir; None if unknown, which removes nothing
+        source (optional): Input source src_dir is read from; defaults to
+            the file system
+        output (optional): Output backend to copy through; defaults to a
+            non-pruning DirectoryOutput of dest_dir
         
     Returns:
-        str: The title text without the # symbol
+        list: The static files copied by this build, to record for the next
+    """
+    if source is None:
+        source = DirectorySource()
+    if output is None:
+        with DirectoryOutput(dest_dir, prune=False) as output:
+            return sync_static(src_dir, dest_dir, recorded, source, output)
+    files = _copy_directory_contents(src_dir, dest_dir, source, output)
+    current = set(files)
+    for rel_path in sorted(recorded or ()):
+        if rel_path not in current:
+            remove_output(os.path.join(dest_dir, *rel_path.split('/')), dest_dir)
+    return files
+
+
+def _write_cached_pages(pages, template_path, basepath, cache, output=None):
+    """
+    Write every page that is already in the render cache.
+    
+    Args:
+        pages (list): List of (source_path, dest_path) tuples
+        template_path (str): Path to the HTML template file
+        basepath (str): Base path for the site
+        cache (RenderCache): Cache to look pages up in
+        output (optional): Output backend to write through (see write_page)
         
-    Raises:
-        ValueError: If no h1 heading is found
+    Returns:
+        tuple: (misses, keys) where misses is the list of pages still to be
+            rendered and keys maps each missed dest_path to its cache key
     """
-    lines = markdown.split('\n')
-    for line in lines:
-        stripped = line.strip()
-        if stripped.startswith('# '):
-            return stripped[2:].strip()
+    with open(template_path, 'rb') as f:
+        template_bytes = f.read()
     
-    raise ValueError("No h1 heading found in markdown")
+    misses = []
+    keys = {}
+    for src_path, dest_path in pages:
+        with open(src_path, 'rb') as f:
+            key = cache_key(f.read(), template_bytes, basepath)
+        html = cache.get(key)
+        if html is None:
+            misses.append((src_path, dest_path))
+            keys[dest_path] = key
+        else:
+            print(f"Using cached page for {src_path} -> {dest_path}")
+            write_page(dest_path, html, output)
+    return misses, keys
 
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
+def generate_pages(pages, template_path, basepath="/", jobs=1, executor="processes", cache=None,
+                   output=None, timings=None):
     """
-    Generate an HTML page from markdown content and template.
+    Generate a list of pages, serially or across a process pool.
+    
+    With more than one job, reading, rendering and writing run as a bounded
+    pipeline (see parallel.generate_pages_pipelined).
     
     Args:
-        from_path (str): Path to the markdown file
-        template_path (str): Path to the HTML template
-        dest_path (str): Path where the generated HTML should be saved
+        pages (list): List of (source_path, dest_path) tuples
+        template_path (str): Path to the HTML template file
         basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+        jobs (int): Number of workers; 1 renders in this process
+        executor (str): "processes", "threads" or "interpreters" (see parallel.EXECUTORS)
+        cache (RenderCache, optional): Shared render cache; hits are written
+            without rendering and newly rendered pages are added to it
+        output (optional): Output backend to write through (see archive.py
+            and directory.py). Archives take pages in list order, so the
+            cache must not be used with them.
+        timings (BuildTimings, optional): With more than one job, render the
+            pages longest expected first and record how long each took.
+            Pages are then written in that order, so not into archives.
+    """
+    write = write_page
+    if output is not None:
+        def write(dest_path, html):
+            write_page(dest_path, html, output)
+    
+    if cache is not None:
+        pages, keys = _write_cached_pages(pages, template_path, basepath, cache, output)
+        
+        def write(dest_path, html):
+            write_page(dest_path, html, output)
+            cache.put(keys[dest_path], html)
+    
+    if jobs == 1:
+        with open(template_path, 'r') as f:
+            template_content = f.read()
+        for src_path, dest_path in pages:
+            print(f"Generating page from {src_path} to {dest_path} using {template_path}")
+            with open(src_path, 'r') as f:
+                markdown_content = f.read()
+            write(dest_path, render_page(markdown_content, template_content, basepath))
+        return
+    
+    if timings is not None:
+        pages = timings.order(pages)
+    generate_pages_pipelined(pages, template_path, write, basepath, jobs, executor=executor,
+                             durations=timings.durations if timings is not None else None)
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/",
+                             source=None, cache=None, output=None):
     """
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    Recursively generate HTML pages for all markdown files in a directory tree.
     
-    # Read the markdown file
-    with open(from_path, 'r') as f:
-        markdown_content = f.read()
+    Crawls the content directory and generates HTML pages for every markdown file found,
+    maintaining the same directory structure in the destination.
     
-    # Read the template file
-    with open(template_path, 'r') as f:
-        template_content = f.read()
+    Args:
+        dir_path_content (str): Path to the content directory to crawl
+        template_path (str): Path to the HTML template file
+        dest_dir_path (str): Path to the destination directory for generated HTML
+        basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+        source (optional): Input source the content and template are read
+            from (see sources.py); defaults to the file system
+        cache (RenderCache, optional): Shared render cache. When the source
+            provides content identifiers (git blob SHAs), they are used as
+            cache keys so cached pages are written without reading them.
+        output (optional): Archive to add the pages to, in which case
+            dest_dir_path is the archive path (see archive.py)
+        
+    Returns:
+        int: Number of pages written
+    """
+    if source is None:
+        source = DirectorySource()
     
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
+    # Ensure the destination directory exists
+    if output is None and not os.path.exists(dest_dir_path):
+        os.makedirs(dest_dir_path)
     
-    # Extract title from markdown
-    title = extract_title(markdown_content)
+    # Read the template once: a compressed tar can only be read from the
+    # start, and each git read is a cat-file round trip
+    template_bytes = source.read_bytes(template_path)
+    template_content = template_bytes.decode('utf-8')
+    if cache is not None:
+        template_id = source.blob_id(template_path)
     
-    # Replace placeholders in template
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_content)
+    def render(src_path, dest_path):
+        print(f"Generating page from {src_path} to {dest_path} using {template_path}")
+        markdown_content = source.read_bytes(src_path).decode('utf-8')
+        html = render_page(markdown_content, template_content, basepath)
+        write_page(dest_path, html, output)
+        return html
     
-    # Fix paths for basepath
-    final_html = final_html.replace('href="/', f'href="{basepath}')
-    final_html = final_html.replace('src="/', f'src="{basepath}')
+    count = 0
+    for rel_path in source.list_files(dir_path_content):
+        # Only markdown files become pages
+        if not rel_path.endswith('.md'):
+            continue
+        src_path = f"{dir_path_content}/{rel_path}"
+        dest_path = os.path.join(dest_dir_path, *html_output_path(rel_path).split('/'))
+        count += 1
+        
+        if cache is None:
+            render(src_path, dest_path)
+            continue
+        
+        markdown_id = source.blob_id(src_path)
+        if markdown_id and template_id:
+            key = blob_cache_key(markdown_id, template_id, basepath)
+        else:
+            key = cache_key(source.read_bytes(src_path), template_bytes, basepath)
+        html = cache.get(key)
+        if html is None:
+            html = render(src_path, dest_path)
+            cache.put(key, html)
+        else:
+            print(f"Using cached page for {src_path} -> {dest_path}")
+            write_page(dest_path, html, output)
+    return count
+
+
+def find_markdown_files(dir_path_content, dest_dir_path, index=None):
+    """
+    Find every markdown file in a content tree and its destination HTML path.
     
-    # Ensure destination directory exists
-    dest_dir = os.path.dirname(dest_path)
-    if dest_dir and not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
+    Returns the pages in the order generate_pages_recursive writes them
+    (sorted by path below the content directory).
     
-    # Write the final HTML to the destination
-    with open(dest_path, 'w') as f:
-        f.write(final_html)
+    Args:
+        dir_path_content (str): Path to the content directory to crawl
+        dest_dir_path (str): Path to the destination directory for generated HTML
+        index (FileIndex, optional): Index covering the content directory;
+            the directory is walked if not given
+        
+    Returns:
+        list: List of (source_path, dest_path) tuples
+    """
+    if index is None or not index.covers(dir_path_content):
+        index = FileIndex([dir_path_content])
+    pages = []
+    for rel_path in index.list_files(dir_path_content):
+        if rel_path.endswith('.md'):
+            pages.append((os.path.join(dir_path_content, *rel_path.split('/')),
+                          os.path.join(dest_dir_path, *html_output_path(rel_path).split('/'))))
+    return pages
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
+def _glob_root(pattern):
+    """Return the directory part of a glob pattern before its first wildcard."""
+    parts = pattern.split('/')[:-1]
+    root = []
+    for part in parts:
+        if any(char in part for char in "*?["):
+            break
+        root.append(part)
+    return '/'.join(root)
+
+
+def find_pages_matching(dir_path_content, dest_dir_path, patterns, static_dir=None):
     """
-    Recursively generate HTML pages for all markdown files in a directory tree.
+    Find the pages whose content-relative path matches a glob pattern.
     
-    Crawls the content directory and generates HTML pages for every markdown file found,
-    maintaining the same directory structure in the destination.
+    Only the directories the patterns can match in are walked, in both the
+    content and the destination directory, so selecting one section of a
+    large site costs about as much as the section itself.
+    
+    Stale outputs are taken from the pages recorded in the destination's
+    build manifest when there is one. Otherwise any matching .html file
+    without a markdown source counts as stale, except copies of files in
+    static_dir, which are not pages.
+    
+    Args:
+        dir_path_content (str): Path to the content directory
+        dest_dir_path (str): Path to the destination directory
+        patterns (list): fnmatch-style patterns relative to the content
+            directory, e.g. "blog/*" (a "*" also matches "/")
+        static_dir (str, optional): Path to the static files directory
+        
+    Returns:
+        tuple: (pages, stale) where pages is a sorted list of
+            (source_path, dest_path) tuples and stale lists the outputs of
+            matching pages whose markdown source no longer exists
+    """
+    def matches(key):
+        return any(fnmatch.fnmatchcase(key, pattern) for pattern in patterns)
+    
+    pages = {}
+    stale = set()
+    recorded = load_manifest(os.path.join(dest_dir_path, MANIFEST_FILENAME))["pages"]
+    for key, entry in recorded.items():
+        if matches(key) and entry.get("output") and not os.path.exists(os.path.join(dir_path_content, key)):
+            stale.add(os.path.join(dest_dir_path, *entry["output"].split('/')))
+    
+    for root in sorted({_glob_root(pattern) for pattern in patterns}):
+        content_root = os.path.join(dir_path_content, *root.split('/'))
+        dest_root = os.path.join(dest_dir_path, *root.split('/'))
+        if os.path.isdir(content_root):
+            for src_path, dest_path in find_markdown_files(content_root, dest_root):
+                key = os.path.relpath(src_path, dir_path_content).replace(os.sep, '/')
+                if matches(key):
+                    pages[key] = (src_path, dest_path)
+        
+        if recorded:
+            continue
+        for dirpath, _, filenames in os.walk(dest_root):
+            for filename in filenames:
+                if not filename.endswith('.html'):
+                    continue
+                dest_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, '/')
+                key = rel_path[:-len('.html')] + '.md'
+                if (matches(key) and not os.path.exists(os.path.join(dir_path_content, key))
+                        and not (static_dir and os.path.exists(os.path.join(static_dir, rel_path)))):
+                    stale.add(dest_path)
+    return sorted(pages.values()), sorted(stale)
+
+
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, basepath="/",
+                               jobs=1, executor="processes", shard=None, cache=None, timings=None,
+                               index=None, static_files=None, output=None):
+    """
+    Generate HTML pages, re-rendering only pages whose inputs changed.
+    
+    Uses a manifest stored in the destination directory to remember the state
+    of every markdown file, the template, the basepath and the generator
+    version from the previous build. Pages whose inputs are unchanged are
+    skipped, and outputs whose markdown source was deleted are removed.
     
     Args:
         dir_path_content (str): Path to the content directory to crawl
         template_path (str): Path to the HTML template file
         dest_dir_path (str): Path to the destination directory for generated HTML
         basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+        jobs (int): Number of workers used to render changed pages
+        executor (str): "processes", "threads" or "interpreters" (see parallel.EXECUTORS)
+        shard (tuple, optional): (index, count) to build only the pages of one
+            shard; the manifest then only lists that shard's pages
+        cache (RenderCache, optional): Shared render cache for changed pages
+        timings (BuildTimings, optional): Render timings (see generate_pages)
+        index (FileIndex, optional): Index of the content directory, whose
+            stat results are used instead of statting every page again
+        static_files (list, optional): Static files copied by this build (see
+            sync_static), recorded so the next build can remove deleted ones
+        output (DirectoryOutput, optional): Non-pruning output the rendered
+            pages are written through, so identical pages are not rewritten
+        
+    Returns:
+        dict: Counts of "rendered", "unchanged" and "removed" pages
     """
-    # Ensure the destination directory exists
     if not os.path.exists(dest_dir_path):
         os.makedirs(dest_dir_path)
     
-    # Get all items in the content directory
-    for item in os.listdir(dir_path_content):
-        item_path = os.path.join(dir_path_content, item)
-        
-        if os.path.isfile(item_path):
-            # Check if it's a markdown file
-            if item.endswith('.md'):
-                # Generate the destination HTML path
-                html_filename = item.replace('.md', '.html')
-                dest_file_path = os.path.join(dest_dir_path, html_filename)
-                
-                # Generate the HTML page
-                generate_page(item_path, template_path, dest_file_path, basepath)
+    manifest_path = os.path.join(dest_dir_path, MANIFEST_FILENAME)
+    old_manifest = load_manifest(manifest_path)
+    manifest = new_manifest(basepath)
+    if shard:
+        manifest["shard"] = {"index": shard[0], "count": shard[1]}
+    if static_files is not None:
+        manifest["static"] = static_files
+    
+    _, manifest["template"] = check_input(template_path, old_manifest.get("template"))
+    rebuild_all = settings_changed(old_manifest, basepath, manifest["template"])
+    
+    counts = {"rendered": 0, "unchanged": 0, "removed": 0}
+    to_render = []
+    old_pages = old_manifest["pages"]
+    if index is None or not index.covers(dir_path_content):
+        index = FileIndex([dir_path_content])
+    for src_path, dest_path in find_markdown_files(dir_path_content, dest_dir_path, index):
+        key = os.path.relpath(src_path, dir_path_content).replace(os.sep, '/')
+        if shard and shard_of(key, shard[1]) != shard[0]:
+            continue
+        changed, entry = check_input(src_path, old_pages.get(key), index.stat(src_path))
+        entry["output"] = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, '/')
+        manifest["pages"][key] = entry
+        
+        if rebuild_all or changed or not os.path.exists(dest_path):
+            to_render.append((src_path, dest_path))
         else:
-            # It's a directory, recurse into it
-            nested_dest_dir = os.path.join(dest_dir_path, item)
-            generate_pages_recursive(item_path, template_path, nested_dest_dir, basepath)
+            counts["unchanged"] += 1
+    
+    generate_pages(to_render, template_path, basepath, jobs, executor, cache, output, timings)
+    counts["rendered"] = len(to_render)
+    
+    # Remove outputs whose markdown source no longer exists
+    for key, entry in old_pages.items():
+        if key not in manifest["pages"] and entry.get("output"):
+            remove_output(os.path.join(dest_dir_path, entry["output"]), dest_dir_path)
+            counts["removed"] += 1
+    
+    save_manifest(manifest, manifest_path)
+    return counts
 
 
-def main():
-    # Get basepath from command line argument, default to "/"
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+def _move_output(old_path, new_path, dest_dir_path):
+    """
+    Move a generated file, pruning directories it leaves empty.
     
-    # Copy static files to docs directory
-    static_dir = "static"
-    docs_dir = "docs"
+    Args:
+        old_path (str): Current path of the generated file
+        new_path (str): Path to move it to
+        dest_dir_path (str): Root output directory
+    """
+    print(f"Moving output: {old_path} -> {new_path}")
+    os.makedirs(os.path.dirname(new_path) or ".", exist_ok=True)
+    os.replace(old_path, new_path)
+    remove_output(old_path, dest_dir_path)
+
+
+def generate_site_from_git(dir_path_content, template_path, static_dir, dest_dir_path, basepath="/",
+                           jobs=1, executor="processes", cache=None, timings=None, output=None):
+    """
+    Incrementally rebuild the site using git to find what changed.
+    
+    The manifest records the commit the previous build was made from. This
+    build asks git for the files changed since then (including uncommitted
+    and untracked files) instead of walking the content and static trees:
+    changed pages are re-rendered, deleted pages and static files are
+    removed from the output, and renamed files have their outputs moved.
+    
+    Falls back to a regular incremental build (generate_pages_incremental
+    plus sync_static) when there is no recorded commit, git is not
+    available, or the template, basepath or generator version changed.
+    
+    Args:
+        dir_path_content (str): Path to the content directory
+        template_path (str): Path to the HTML template file
+        static_dir (str): Path to the static files directory
+        dest_dir_path (str): Path to the destination directory
+        basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+        jobs (int): Number of workers used to render changed pages
+        executor (str): "processes", "threads" or "interpreters" (see parallel.EXECUTORS)
+        cache (RenderCache, optional): Shared render cache for changed pages
+        timings (BuildTimings, optional): Render timings (see generate_pages)
+        output (DirectoryOutput, optional): Non-pruning output that pages
+            and static files are written through; one is opened if not given
+        
+    Returns:
+        dict: Counts of "rendered", "removed", "moved" pages and "static" files updated
+    """
+    if output is None:
+        with DirectoryOutput(dest_dir_path, prune=False) as output:
+            return generate_site_from_git(dir_path_content, template_path, static_dir, dest_dir_path,
+                                          basepath, jobs, executor, cache, timings, output)
+    
+    manifest_path = os.path.join(dest_dir_path, MANIFEST_FILENAME)
+    manifest = load_manifest(manifest_path)
+    watched = [dir_path_content, static_dir, template_path]
+    
+    changes = None
+    try:
+        commit = head_commit()
+        _, template_entry = check_input(template_path, manifest.get("template"))
+        if manifest.get("commit") and not settings_changed(manifest, basepath, template_entry):
+            changes = changed_files(manifest["commit"], watched)
+            # Files that were uncommitted during the last build may have been reverted since
+            for path in manifest.get("git_dirty", []):
+                changes.append(("M", path, path) if os.path.exists(path) else ("D", path, None))
+    except GitError as e:
+        print(f"Git change detection unavailable: {e}")
+        commit = None
+    
+    template_key = os.path.normpath(template_path).replace(os.sep, '/')
+    if changes is None or any(template_key in (old, new) for _, old, new in changes):
+        print("Falling back to a full incremental check")
+        static_files = sync_static(static_dir, dest_dir_path, manifest.get("static"), output=output)
+        counts = generate_pages_incremental(dir_path_content, template_path, dest_dir_path,
+                                            basepath, jobs, executor, cache=cache, timings=timings,
+                                            static_files=static_files, output=output)
+        counts = {"rendered": counts["rendered"], "removed": counts["removed"], "moved": 0, "static": None}
+        manifest = load_manifest(manifest_path)
+    else:
+        counts = {"rendered": 0, "removed": 0, "moved": 0, "static": 0}
+        pages = manifest["pages"]
+        static_files = set(manifest.get("static", ()))
+        to_render = {}
+        for status, old_path, new_path in changes:
+            old_key = old_path and under(old_path, dir_path_content)
+            new_key = new_path and under(new_path, dir_path_content)
+            old_static = old_path and under(old_path, static_dir)
+            new_static = new_path and under(new_path, static_dir)
+            if new_path and not os.path.exists(new_path):
+                new_key = new_static = None
+            
+            if old_key and old_key.endswith('.md') and old_key in pages and old_key != new_key:
+                entry = pages.pop(old_key)
+                old_output = os.path.join(dest_dir_path, entry["output"])
+                if status == "R" and new_key and new_key.endswith('.md') and os.path.exists(old_output):
+                    # Same markdown under a new name: the rendered page is identical
+                    entry["output"] = html_output_path(new_key)
+                    _move_output(old_output, os.path.join(dest_dir_path, entry["output"]), dest_dir_path)
+                    _, pages[new_key] = check_input(new_path, entry)
+                    counts["moved"] += 1
+                    continue
+                remove_output(old_output, dest_dir_path)
+                counts["removed"] += 1
+            if new_key and new_key.endswith('.md'):
+                _, entry = check_input(new_path, pages.get(new_key))
+                entry["output"] = html_output_path(new_key)
+                pages[new_key] = entry
+                to_render[new_key] = (new_path, os.path.join(dest_dir_path, entry["output"]))
+            
+            if old_static and old_static != new_static:
+                static_files.discard(old_static)
+                old_output = os.path.join(dest_dir_path, old_static)
+                if status == "R" and new_static and os.path.exists(old_output):
+                    _move_output(old_output, os.path.join(dest_dir_path, new_static), dest_dir_path)
+                    static_files.add(new_static)
+                    counts["static"] += 1
+                    continue
+                remove_output(old_output, dest_dir_path)
+                counts["static"] += 1
+            if new_static:
+                dest_path = os.path.join(dest_dir_path, new_static)
+                print(f"Copying file: {new_path} -> {dest_path}")
+                output.copy_from(DirectorySource(), new_path, dest_path)
+                static_files.add(new_static)
+                counts["static"] += 1
+        if "static" in manifest:
+            manifest["static"] = sorted(static_files)
+        
+        generate_pages(sorted(to_render.values()), template_path, basepath, jobs, executor, cache,
+                       output, timings)
+        counts["rendered"] = len(to_render)
+    
+    if commit:
+        manifest["commit"] = commit
+        manifest["git_dirty"] = dirty_files(watched)
+    save_manifest(manifest, manifest_path)
+    return counts
+
+
+def generate_site_from_source(source, dir_path_content, template_path, static_dir, dest_dir_path,
+                              basepath="/", cache=None, output=None):
+    """
+    Build the whole site from an input source instead of the working tree.
+    
+    Static files are streamed from the source straight into the output and
+    pages are rendered from the source's bytes, using the same walk as a
+    regular build.
+    
+    Args:
+        source: Input source, e.g. sources.GitSource or sources.TarSource
+        dir_path_content (str): Content directory within the source
+        template_path (str): Template path within the source
+        static_dir (str): Static files directory within the source
+        dest_dir_path (str): Path to the destination directory (recreated)
+        basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+        cache (RenderCache, optional): Shared render cache
+        output (optional): Archive to write into, in which case dest_dir_path
+            is the archive path (see archive.py)
+        
+    Returns:
+        int: Number of pages written
+    """
+    copy_static(static_dir, dest_dir_path, source=source, output=output)
+    return generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath,
+                                    source, cache, output)
+
+
+def check_output_dir(dest_dir_path, input_dirs, template_path):
+    """
+    Check that a build into dest_dir_path cannot overwrite or prune its inputs.
+    
+    Directory outputs delete every file the build did not write, so an
+    output of "content" or "." would delete the site's sources (and with
+    ".", the git checkout). The output may not be, contain or sit inside an
+    input directory, and may not be or contain the template's directory or
+    the current directory; a subdirectory of those, like "docs", is fine.
+    
+    Args:
+        dest_dir_path (str): Output directory or archive path
+        input_dirs (list): Content and static directories
+        template_path (str): Path to the HTML template
+        
+    Raises:
+        ValueError: If the output overlaps an input
+    """
+    dest = os.path.realpath(dest_dir_path)
+    
+    def within(path, parent):
+        return os.path.commonpath([path, parent]) == parent
+    
+    for input_dir in input_dirs:
+        input_path = os.path.realpath(input_dir)
+        if within(dest, input_path) or within(input_path, dest):
+            raise ValueError(f"Output {dest_dir_path} overlaps the input directory {input_dir}")
+    for input_dir in (os.path.dirname(template_path) or os.curdir, os.curdir):
+        if within(os.path.realpath(input_dir), dest):
+            raise ValueError(f"Output {dest_dir_path} contains the input directory "
+                             f"{os.path.realpath(input_dir)}")
+
+
+def parse_target(spec):
+    """
+    Parse a build target of the form "BASEPATH=DIR".
+    
+    Args:
+        spec (str): Target specification, e.g. "/static-site-generator/=docs"
+        
+    Returns:
+        tuple: (basepath, dest_dir_path)
+        
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    basepath, sep, dest_dir_path = spec.partition('=')
+    if not sep or not basepath.startswith('/') or not dest_dir_path:
+        raise ValueError(f"Invalid target '{spec}': expected BASEPATH=DIR, e.g. /=docs")
+    return basepath, dest_dir_path
+
+
+def check_target_dirs(targets):
+    """
+    Check that no two build targets write into the same directory tree.
+    
+    Each target's output prunes files it did not write, so a target inside
+    another target's directory would be deleted by the outer one.
+    
+    Args:
+        targets (list): (basepath, dest_dir_path) pairs from parse_target()
+        
+    Raises:
+        ValueError: If two targets share an output directory or one is
+            inside another
+    """
+    dest_dirs = [(dest_dir_path, os.path.abspath(dest_dir_path)) for _, dest_dir_path in targets]
+    for i, (outer, outer_path) in enumerate(dest_dirs):
+        for inner, inner_path in dest_dirs[i + 1:]:
+            if inner_path == outer_path:
+                raise ValueError(f"Every target needs its own output directory: {inner} is used twice")
+            if os.path.commonpath([outer_path, inner_path]) in (outer_path, inner_path):
+                raise ValueError(f"Target directories cannot be nested: {outer} and {inner}")
+
+
+def generate_site_targets(dir_path_content, template_path, static_dir, targets, jobs=1,
+                          executor="processes"):
+    """
+    Build the site for several basepaths in one pass.
+    
+    Every page is parsed and rendered once with basepath "/"; each target
+    then only rewrites the root-relative URLs for its basepath (see
+    page.apply_basepath), which gives exactly the page a separate build
+    with that basepath would. Static files are copied into the first
+    target and hardlinked into the others.
+    
+    Args:
+        dir_path_content (str): Path to the content directory
+        template_path (str): Path to the HTML template file
+        static_dir (str): Path to the static files directory
+        targets (list): (basepath, dest_dir_path) pairs from parse_target()
+        jobs (int): Number of workers; 1 renders in this process
+        executor (str): "processes", "threads" or "interpreters" (see parallel.EXECUTORS)
+        
+    Returns:
+        list: The DirectoryOutput of each target, in order
+        
+    Raises:
+        ValueError: If two targets share an output directory or one is
+            inside another (see check_target_dirs)
+    """
+    check_target_dirs(targets)
+    
+    index = FileIndex([dir_path_content, static_dir])
+    source = DirectorySource(index=index)
+    with contextlib.ExitStack() as stack:
+        outputs = [stack.enter_context(DirectoryOutput(dest_dir_path)) for _, dest_dir_path in targets]
+        first_dest = targets[0][1]
+        copy_static(static_dir, first_dest, source=source, output=outputs[0])
+        if source.is_dir(static_dir):
+            for rel_path in source.list_files(static_dir):
+                existing_path = os.path.join(first_dest, *rel_path.split('/'))
+                for (_, dest_dir_path), output in zip(targets[1:], outputs[1:]):
+                    dest_path = os.path.join(dest_dir_path, *rel_path.split('/'))
+                    print(f"Linking file: {existing_path} -> {dest_path}")
+                    output.link_from(existing_path, dest_path)
+        
+        def write(rel_dest_path, html):
+            for (basepath, dest_dir_path), output in zip(targets, outputs):
+                write_page(os.path.join(dest_dir_path, rel_dest_path), apply_basepath(html, basepath), output)
+        
+        # Destination paths relative to each target's directory
+        pages = find_markdown_files(dir_path_content, "", index)
+        if jobs == 1:
+            with open(template_path, 'r') as f:
+                template_content = f.read()
+            for src_path, rel_dest_path in pages:
+                print(f"Generating page from {src_path} for {len(targets)} targets")
+                with open(src_path, 'r') as f:
+                    write(rel_dest_path, render_page(f.read(), template_content, "/"))
+        else:
+            generate_pages_pipelined(pages, template_path, write, "/", jobs, executor=executor)
+    return outputs
+
+
+def open_output(path, atomic=False, prune=True, track=False, trust_mtime=True, copy_strategy="auto"):
+    """
+    Open the output backend for an --output path.
+    
+    Args:
+        path (str): The --output path
+        atomic (bool): Build a directory output in a staging directory and
+            swap it into place at the end (archives are always atomic)
+        prune (bool): Remove files from a directory output that the build
+            did not produce; incremental builds pass False
+        track (bool): Record the size and digest of every directory output
+            for a deploy manifest
+        trust_mtime (bool): Treat static files whose size and mtime match
+            the existing output as unchanged; False compares digests
+        copy_strategy (str): How directory outputs copy static files (see
+            copier.COPY_STRATEGIES); archives always stream them
+        
+    Returns:
+        An archive, staging or directory output backend
+    """
+    if is_archive_path(path):
+        return open_archive_output(path)
+    if atomic:
+        return StagingOutput(path, track, trust_mtime, FileCopier(copy_strategy))
+    return DirectoryOutput(path, prune, track, trust_mtime, FileCopier(copy_strategy))
+
+
+def _report_output(output):
+    """
+    Print what a directory or staging output did once the build is finished.
+    
+    Args:
+        output: The build's output backend
+    """
+    if isinstance(output, DirectoryOutput):
+        print(f"Outputs: {output.written} written, {output.skipped} unchanged (not rewritten), "
+              f"{output.removed} stale removed")
+    elif isinstance(output, StagingOutput):
+        swap = "atomically" if output.atomic else "with a fallback rename"
+        print(f"Staged build: {output.written} files written, "
+              f"{output.linked} hardlinked from the previous build; swapped {swap}")
+    copier = getattr(output, "copier", None)
+    if copier is not None and copier.methods:
+        methods = ", ".join(f"{count} {method}" for method, count in sorted(copier.methods.items()))
+        print(f"Static copies: {methods}; {copier.bytes_copied} bytes moved, "
+              f"{copier.bytes_shared} bytes shared with the source")
+
+
+def _report_deploy(path, output, old_files):
+    """
+    Write the deploy manifest for a finished build and print its diff.
+    
+    Args:
+        path (str, optional): Deploy manifest path, or None if not requested
+        output: The build's directory or staging output backend
+        old_files (dict): File listing of the previous deploy manifest
+    """
+    if not path:
+        return
+    diff = write_deploy_manifest(path, output.files, old_files)
+    print(f"Deploy manifest {path}: {len(diff['added'])} added, "
+          f"{len(diff['modified'])} modified, {len(diff['deleted'])} deleted")
+
+
+def _report_timings(timings, jobs):
+    """
+    Save this build's render timings and print the page that bounds it.
+    
+    Args:
+        timings (BuildTimings, optional): The build's timings, or None
+        jobs (int): Number of workers the pages were rendered on
+    """
+    if timings is None:
+        return
+    timings.save()
+    critical = timings.critical_path(jobs)
+    if critical:
+        print(f"Critical path: {critical['page']} took {critical['seconds']:.3f}s; "
+              f"{critical['total']:.3f}s of rendering on {jobs} workers needs at least "
+              f"{critical['bound']:.3f}s")
+
+
+def _report_cache(cache, max_bytes=None, max_age=None):
+    """
+    Print and record this build's render cache hit/miss counts.
+    
+    Also evicts entries if a size or age limit was given.
+    
+    Args:
+        cache (RenderCache, optional): The build's cache, or None
+        max_bytes (int, optional): Size budget for the cache
+        max_age (float, optional): Maximum seconds since an entry was used
+    """
+    if cache is None:
+        return
+    cache.record_stats()
+    print(f"Render cache: {cache.hits} hits, {cache.misses} misses")
+    if max_bytes is not None or max_age is not None:
+        result = cache.gc(max_bytes, max_age)
+        print(f"Render cache: evicted {result['removed']} entries ({result['freed']} bytes)")
+
+
+def cache_main(argv):
+    """
+    Entry point for `main.py cache`: inspect or prune a render cache.
+    
+    Args:
+        argv (list): Command line arguments after "cache"
+    """
+    parser = argparse.ArgumentParser(prog="main.py cache", description="Manage a render cache directory.")
+    parser.add_argument("action", choices=("stats", "gc"), help="Report cache statistics or evict entries")
+    parser.add_argument("--cache-dir", required=True, metavar="DIR", help="Render cache directory")
+    parser.add_argument("--max-bytes", type=parse_size, metavar="SIZE",
+                        help="Evict least recently used entries above this size (e.g. 2G)")
+    parser.add_argument("--max-age", type=parse_age, metavar="AGE",
+                        help="Evict entries unused for longer than this (e.g. 7d)")
+    args = parser.parse_args(argv)
+    
+    cache = RenderCache(args.cache_dir)
+    if args.action == "gc":
+        result = cache.gc(args.max_bytes, args.max_age)
+        print(f"Removed {result['removed']} entries, freed {result['freed']} bytes")
+    stats = cache.stats()
+    print(f"Entries: {stats['entries']}")
+    print(f"Size: {stats['bytes']} bytes")
+    print(f"Hits: {stats['hits']}, misses: {stats['misses']}, hit rate: {stats['hit_rate']:.1%}")
+
+
+def _ninja_escape(path):
+    """Escape a path for use in a build.ninja build statement."""
+    return path.replace('$', '$$').replace(' ', '$ ').replace(':', '$:')
+
+
+def write_ninja_file(ninja_path, dir_path_content, template_path, static_dir, dest_dir_path,
+                     basepath="/"):
+    """
+    Write a build.ninja that renders each page as its own build step.
+    
+    Pages are rendered by render.py, which writes a depfile so Ninja knows
+    each page depends on its markdown source and the template. Static files
+    are copied one by one. Regenerate the file when pages are added or removed.
+    
+    Args:
+        ninja_path (str): Path of the build.ninja file to write
+        dir_path_content (str): Path to the content directory
+        template_path (str): Path to the HTML template file
+        static_dir (str): Path to the static files directory
+        dest_dir_path (str): Path to the destination directory
+        basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+        
+    Returns:
+        int: Number of build statements written
+    """
+    render_script = os.path.relpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "render.py"))
+    lines = [
+        "# Generated by `main.py ninja`; regenerate when pages are added or removed",
+        f"basepath = {basepath}",
+        f"template = {_ninja_escape(template_path)}",
+        "",
+        "rule render",
+        f"  command = {sys.executable} {render_script} --quiet --basepath $basepath "
+        "--template $template --depfile $out.d $in $out",
+        "  depfile = $out.d",
+        "  deps = gcc",
+        "  description = RENDER $out",
+        "",
+        "rule copy",
+        "  command = cp $in $out",
+        "  description = COPY $out",
+        "",
+    ]
+    count = 0
+    for src_path, dest_path in find_markdown_files(dir_path_content, dest_dir_path):
+        lines.append(f"build {_ninja_escape(dest_path)}: render {_ninja_escape(src_path)}")
+        count += 1
+    static = DirectorySource(static_dir)
+    for rel_path in static.list_files("."):
+        src_path = os.path.join(static_dir, rel_path)
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        lines.append(f"build {_ninja_escape(dest_path)}: copy {_ninja_escape(src_path)}")
+        count += 1
+    with open(ninja_path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    return count
+
+
+def ninja_main(argv):
+    """
+    Entry point for `main.py ninja`: write a build.ninja for the site.
+    
+    Args:
+        argv (list): Command line arguments after "ninja"
+    """
+    parser = argparse.ArgumentParser(prog="main.py ninja",
+                                     description="Write a build.ninja that renders pages with render.py.")
+    parser.add_argument("basepath", nargs="?", default="/", help='Base path for the site (default: "/")')
+    parser.add_argument("-o", "--output", default="docs", help="Directory the site is built into (default: docs)")
+    parser.add_argument("-f", "--file", default="build.ninja", help="Ninja file to write (default: build.ninja)")
+    args = parser.parse_args(argv)
+    
+    count = write_ninja_file(args.file, "content", "template.html", "static", args.output, args.basepath)
+    print(f"Wrote {args.file} with {count} build statements")
+
+
+def _print_rebuild(result):
+    print(f"Rendered {result['rendered']} pages, wrote {result['written']} outputs, "
+          f"removed {result['removed']} in {result['seconds']:.3f}s")
+    for path in result["ignored"]:
+        print(f"Ignored {path}: not an input of the site")
+
+
+def daemon_main(argv):
+    """
+    Entry point for `main.py daemon`: keep the site's state warm and serve rebuilds.
+    
+    Args:
+        argv (list): Command line arguments after "daemon"
+    """
+    parser = argparse.ArgumentParser(prog="main.py daemon",
+                                     description="Build the site, then serve rebuild requests on a unix socket.")
+    parser.add_argument("basepath", nargs="?", default="/", help='Base path for the site (default: "/")')
+    parser.add_argument("-o", "--output", default="docs", help="Directory to write the site to (default: docs)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET,
+                        help=f"Unix socket to listen on (default: {DEFAULT_SOCKET})")
+    args = parser.parse_args(argv)
+    try:
+        check_output_dir(args.output, ["content", "static"], "template.html")
+    except ValueError as e:
+        parser.error(str(e))
+    
+    daemon = BuildDaemon("content", "template.html", "static", args.output, args.basepath)
+    _print_rebuild(daemon.rebuild())
+    print(f"Build daemon listening on {args.socket}")
+    try:
+        serve(daemon, args.socket)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    except KeyboardInterrupt:
+        pass
+    print("Build daemon stopped")
+
+
+def client_main(argv):
+    """
+    Entry point for `main.py client`: send a request to a running build daemon.
+    
+    Args:
+        argv (list): Command line arguments after "client"
+    """
+    parser = argparse.ArgumentParser(prog="main.py client", description="Talk to a running build daemon.")
+    parser.add_argument("op", choices=("rebuild", "status", "stop"), help="Request to send")
+    parser.add_argument("paths", nargs="*",
+                        help="With rebuild: only check these input files (e.g. content/index.md)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET,
+                        help=f"Unix socket of the daemon (default: {DEFAULT_SOCKET})")
+    args = parser.parse_args(argv)
+    if args.paths and args.op != "rebuild":
+        parser.error("paths can only be given with rebuild")
+    
+    message = {"op": args.op}
+    if args.paths:
+        message["paths"] = args.paths
+    try:
+        response = request(args.socket, message)
+    except OSError as e:
+        sys.exit(f"No build daemon on {args.socket}: {e}")
+    if not response["ok"]:
+        sys.exit(f"Daemon error: {response['error']}")
+    if args.op == "rebuild":
+        _print_rebuild(response)
+    elif args.op == "status":
+        print(f"Pages: {response['pages']}, static files: {response['static']}")
+        print(f"Builds: {response['builds']}, uptime: {response['uptime']:.0f}s")
+        if response["last_build"]:
+            _print_rebuild(response["last_build"])
+    else:
+        print("Build daemon stopping")
+
+
+def merge_main(argv):
+    """
+    Entry point for `main.py merge`: combine shard builds into one site.
+    
+    Args:
+        argv (list): Command line arguments after "merge"
+    """
+    parser = argparse.ArgumentParser(prog="main.py merge",
+                                     description="Merge shard build outputs into the final site.")
+    parser.add_argument("shard_dirs", nargs="+", help="Output directories of the shard builds")
+    parser.add_argument("-o", "--output", default="docs", help="Directory to merge into (default: docs)")
+    args = parser.parse_args(argv)
+    try:
+        check_output_dir(args.output, ["content", "static"], "template.html")
+    except ValueError as e:
+        parser.error(str(e))
+    
+    expected = [
+        os.path.relpath(src_path, "content").replace(os.sep, '/')
+        for src_path, _ in find_markdown_files("content", args.output)
+    ]
+    try:
+        # Validate before touching the output directory
+        check_shards(args.shard_dirs, expected)
+    except ShardMergeError as e:
+        sys.exit(str(e))
     
     print("Starting static file copy process...")
-    copy_static(static_dir, docs_dir)
+    copy_static("static", args.output)
     print("Static file copy completed!")
     
-    # Generate all pages recursively
-    print(f"\nGenerating pages with basepath: {basepath}")
-    generate_pages_recursive(
-        "content", 
-        "template.html", 
-        "docs",
-        basepath
-    )
+    count = merge_shards(args.shard_dirs, args.output, expected)
+    print(f"Merged {count} pages from {len(args.shard_dirs)} shards into {args.output}")
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "merge":
+        return merge_main(argv[1:])
+    if argv and argv[0] == "cache":
+        return cache_main(argv[1:])
+    if argv and argv[0] == "ninja":
+        return ninja_main(argv[1:])
+    if argv and argv[0] == "daemon":
+        return daemon_main(argv[1:])
+    if argv and argv[0] == "client":
+        return client_main(argv[1:])
+    
+    parser = argparse.ArgumentParser(description="Generate the static site from markdown content.")
+    parser.add_argument("basepath", nargs="?", default="/",
+                        help='Base path for the site (default: "/")')
+    parser.add_argument("-o", "--output", default="docs",
+                        help="Directory to write the site to (default: docs), or an archive ending in "
+                             ".zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz")
+    parser.add_argument("--target", action="append", type=parse_target, metavar="BASEPATH=DIR",
+                        help="Build for this basepath into DIR instead of the basepath argument and "
+                             "--output; repeat to build several variants while rendering each page once")
+    parser.add_argument("--only", action="append", metavar="GLOB",
+                        help="Only render pages matching GLOB (relative to content/, e.g. 'blog/*'), "
+                             "leaving the rest of the output untouched; repeatable")
+    # Each of these picks its own way of building, so only one can be used
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true",
+                      help="Only re-render pages whose inputs changed since the last build")
+    mode.add_argument("--git-changes", action="store_true",
+                      help="Incremental build that asks git what changed since the last built commit")
+    parser.add_argument("--from-git", metavar="COMMIT",
+                        help="Build the site as of COMMIT, reading files from git objects without a checkout")
+    parser.add_argument("--from-archive", metavar="ARCHIVE",
+                        help="Build the site from a zip or tar archive (optionally compressed) "
+                             "containing content/, static/ and template.html, without extracting it")
+    parser.add_argument("--atomic", action="store_true",
+                        help="Build into a staging directory, hardlinking unchanged files from the "
+                             "previous build, and swap it into place when done")
+    parser.add_argument("--static-check", choices=("mtime", "digest"), default="mtime",
+                        help="How static files are compared with the existing output: by size and "
+                             "mtime, hashing only on mismatch (default), or always by digest")
+    parser.add_argument("--copy-strategy", choices=COPY_STRATEGIES, default="auto",
+                        help="How changed static files are copied: reflink (copy-on-write clone), "
+                             "kernel (copy_file_range/sendfile), hardlink (shares the source file) or "
+                             "copy; auto picks the cheapest the file systems support (default)")
+    parser.add_argument("--deploy-manifest", metavar="FILE",
+                        help="Write the size and digest of every output file to FILE, with a diff "
+                             "(added/modified/deleted) against the FILE of the previous build")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of workers for page rendering (0 = one per CPU)")
+    parser.add_argument("--executor", choices=EXECUTORS, default="processes",
+                        help="Worker pool used with --jobs (threads suit free-threaded CPython, "
+                             "interpreters need Python 3.14+ and fall back to processes)")
+    mode.add_argument("--shard", type=parse_shard, metavar="I/N",
+                      help="Only build shard I of N into --output; combine shards with `main.py merge`")
+    mode.add_argument("--coordinator", action="store_true",
+                      help="Serve pages to `--worker` processes instead of rendering locally")
+    parser.add_argument("--listen", type=parse_address, default=("127.0.0.1", 8765), metavar="HOST:PORT",
+                        help="Address the coordinator listens on (default: 127.0.0.1:8765)")
+    parser.add_argument("--worker", type=parse_address, metavar="HOST:PORT",
+                        help="Render pages for the coordinator at HOST:PORT, then exit")
+    parser.add_argument("--timings", default=TIMINGS_FILENAME, metavar="FILE",
+                        help="Where parallel builds record per-page render times, used to render the "
+                             f"slowest pages first next time (default: {TIMINGS_FILENAME})")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="Share rendered pages with other builds through this cache directory")
+    parser.add_argument("--cache-max-bytes", type=parse_size, metavar="SIZE",
+                        help="After the build, evict least recently used cache entries above this size")
+    parser.add_argument("--cache-max-age", type=parse_age, metavar="AGE",
+                        help="After the build, evict cache entries unused for longer than this")
+    args = parser.parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else default_jobs()
+    basepath = args.basepath
+    
+    if args.worker:
+        host, port = args.worker
+        print(f"Worker connecting to coordinator at {host}:{port}")
+        rendered = run_worker(host, port)
+        print(f"Worker finished: {rendered} pages rendered")
+        return
+    
+    static_dir = "static"
+    docs_dir = args.output
+    # Also checked for --from-git and --from-archive, whose output would
+    # still prune the working tree's inputs
+    dest_dirs = [dest_dir_path for _, dest_dir_path in args.target] if args.target else [docs_dir]
+    for dest_dir_path in dest_dirs:
+        try:
+            check_output_dir(dest_dir_path, ["content", static_dir], "template.html")
+        except ValueError as e:
+            parser.error(str(e))
+    if is_archive_path(docs_dir) and (args.incremental or args.git_changes or args.shard or args.coordinator):
+        parser.error("--incremental, --git-changes, --shard and --coordinator need a directory --output")
+    if args.atomic and (args.incremental or args.git_changes or args.shard):
+        parser.error("--atomic rebuilds the whole site and cannot be combined with "
+                     "--incremental, --git-changes or --shard")
+    if args.deploy_manifest and (is_archive_path(docs_dir) or args.incremental or args.git_changes
+                                 or args.shard):
+        parser.error("--deploy-manifest needs a full build into a directory --output")
+    old_deploy_files = load_deploy_files(args.deploy_manifest) if args.deploy_manifest else {}
+    cache = RenderCache(args.cache_dir) if args.cache_dir else None
+    # Longest-first scheduling reorders writes, which archives cannot take
+    timings = BuildTimings(args.timings) if jobs > 1 and not is_archive_path(docs_dir) else None
+    
+    if args.only:
+        if (args.incremental or args.git_changes or args.from_git or args.from_archive or args.atomic
+                or args.deploy_manifest or args.shard or args.coordinator or args.target
+                or is_archive_path(docs_dir)):
+            parser.error("--only updates part of a directory --output and cannot be combined with "
+                         "other build modes")
+        pages, stale = find_pages_matching("content", docs_dir, args.only, static_dir)
+        print(f"Generating {len(pages)} pages matching {', '.join(args.only)} with basepath: {basepath}")
+        with DirectoryOutput(docs_dir, prune=False) as output:
+            generate_pages(pages, "template.html", basepath, jobs, args.executor, cache, output, timings)
+        for dest_path in stale:
+            remove_output(dest_path, docs_dir)
+        print(f"Partial build: {len(pages)} pages ({output.written} written, "
+              f"{output.skipped} unchanged), {len(stale)} removed")
+        _report_timings(timings, jobs)
+        _report_cache(cache, args.cache_max_bytes, args.cache_max_age)
+        return
+    
+    if args.target:
+        if (args.incremental or args.git_changes or args.from_git or args.from_archive or args.atomic
+                or args.deploy_manifest or args.shard or args.coordinator or args.cache_dir
+                or any(is_archive_path(dest_dir_path) for _, dest_dir_path in args.target)):
+            parser.error("--target only supports full builds into directories")
+        try:
+            check_target_dirs(args.target)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Generating {len(args.target)} targets: "
+              + ", ".join(f"{dest_dir_path} ({basepath})" for basepath, dest_dir_path in args.target))
+        outputs = generate_site_targets("content", "template.html", static_dir, args.target,
+                                        jobs, args.executor)
+        for (_, dest_dir_path), output in zip(args.target, outputs):
+            print(f"{dest_dir_path}: ", end="")
+            _report_output(output)
+        print("Page generation completed!")
+        return
+    
+    if args.from_git or args.from_archive:
+        if args.incremental or args.git_changes or args.shard or args.coordinator or args.jobs != 1:
+            parser.error("--from-git and --from-archive build the whole site serially and cannot be "
+                         "combined with --incremental, --git-changes, --shard, --coordinator or --jobs")
+        try:
+            source = GitSource(args.from_git) if args.from_git else open_source(args.from_archive)
+        except (GitError, OSError, ValueError) as e:
+            sys.exit(str(e))
+        with source:
+            if args.from_git:
+                print(f"Building commit {source.commit} with basepath: {basepath}")
+            else:
+                print(f"Building {args.from_archive} with basepath: {basepath}")
+            try:
+                with open_output(docs_dir, args.atomic, track=bool(args.deploy_manifest),
+                                 copy_strategy=args.copy_strategy) as output:
+                    count = generate_site_from_source(source, "content", "template.html", static_dir,
+                                                      docs_dir, basepath, cache, output)
+            except FileNotFoundError as e:
+                sys.exit(str(e))
+        _report_output(output)
+        _report_deploy(args.deploy_manifest, output, old_deploy_files)
+        print(f"Page generation completed! {count} pages written")
+        _report_cache(cache, args.cache_max_bytes, args.cache_max_age)
+        return
+    
+    if args.shard:
+        # Shard builds contain only their pages; static files are added by the merge
+        index, count = args.shard
+        print(f"Generating shard {index}/{count} with basepath: {basepath}")
+        with DirectoryOutput(docs_dir, prune=False) as output:
+            counts = generate_pages_incremental("content", "template.html", docs_dir, basepath,
+                                                jobs, args.executor, args.shard, cache, timings,
+                                                output=output)
+        print(f"Shard build: {counts['rendered']} rendered, "
+              f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+        _report_output(output)
+        _report_timings(timings, jobs)
+        _report_cache(cache, args.cache_max_bytes, args.cache_max_age)
+        return
+    
+    # One walk of the input trees serves every stage below (git builds ask git instead)
+    file_index = None if args.git_changes else FileIndex(["content", static_dir])
+    static_files = None
+    with open_output(docs_dir, args.atomic, prune=not (args.incremental or args.git_changes),
+                      track=bool(args.deploy_manifest), trust_mtime=args.static_check == "mtime",
+                      copy_strategy=args.copy_strategy) as output:
+        # Copy static files to docs directory (git builds only copy what changed)
+        if args.incremental:
+            # Without pruning, outputs of deleted static files are found via the manifest
+            print("Starting static file sync...")
+            recorded = load_manifest(os.path.join(docs_dir, MANIFEST_FILENAME)).get("static")
+            static_files = sync_static(static_dir, docs_dir, recorded,
+                                       DirectorySource(index=file_index), output)
+            print("Static file sync completed!")
+        elif not args.git_changes:
+            print("Starting static file copy process...")
+            copy_static(static_dir, docs_dir, source=DirectorySource(index=file_index), output=output)
+            print("Static file copy completed!")
+    
+        # Generate all pages recursively
+        print(f"\nGenerating pages with basepath: {basepath}")
+        if args.coordinator:
+            pages = find_markdown_files("content", docs_dir, file_index)
+            with open("template.html", 'r') as f:
+                template_content = f.read()
+            coordinator = BuildCoordinator(pages, template_content,
+                                           lambda dest_path, html: write_page(dest_path, html, output),
+                                           basepath, *args.listen)
+            host, port = coordinator.address
+            print(f"Coordinator serving {len(pages)} pages on {host}:{port}")
+            try:
+                coordinator.serve()
+            finally:
+                coordinator.close()
+        elif args.git_changes:
+            counts = generate_site_from_git("content", "template.html", static_dir, docs_dir, basepath,
+                                            jobs, args.executor, cache, timings, output)
+            print(f"Git incremental build: {counts['rendered']} rendered, {counts['removed']} removed, "
+                  f"{counts['moved']} moved")
+        elif args.incremental:
+            counts = generate_pages_incremental("content", "template.html", docs_dir, basepath,
+                                                jobs, args.executor, cache=cache, timings=timings,
+                                                index=file_index, static_files=static_files,
+                                                output=output)
+            print(f"Incremental build: {counts['rendered']} rendered, "
+                  f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+        elif jobs > 1 and not (cache is not None and is_archive_path(docs_dir)):
+            # Cache hits are written ahead of misses, so archives only use the
+            # cache in the in-order serial build below
+            pages = find_markdown_files("content", docs_dir, file_index)
+            generate_pages(pages, "template.html", basepath, jobs, args.executor, cache, output, timings)
+        else:
+            generate_pages_recursive(
+                "content", 
+                "template.html", 
+                docs_dir,
+                basepath,
+                source=DirectorySource(index=file_index),
+                cache=cache,
+                output=output
+            )
+    _report_output(output)
+    _report_deploy(args.deploy_manifest, output, old_deploy_files)
     print("Page generation completed!")
+    _report_timings(timings, jobs)
+    _report_cache(cache, args.cache_max_bytes, args.cache_max_age)
     
     # Create a demo TextNode
     node = TextNode("This is some anchor text", TextType.LINK, "https://www.boot.dev")
@@ -0,0 +1,148 @@
+"""
+Build manifest module for incremental site generation.
+
+This module records which inputs went into each generated page so that a
+later build can tell which pages actually need to be re-rendered. The
+manifest is a small JSON file stored next to the generated output.
+
+Each input file is tracked by a stat signature (size and mtime) and a
+content digest. Change detection checks the cheap stat signature first and
+only falls back to hashing the file when the signature differs, so an
+unchanged tree costs one stat call per file.
+"""
+
+import hashlib
+import json
+import os
+
+
+# Bump this whenever a change to the markdown/HTML pipeline alters the
+# rendered output, so that incremental builds re-render every page.
+GENERATOR_VERSION = "1"
+
+MANIFEST_FILENAME = ".build-manifest.json"
+
+
+def file_digest(path):
+    """Compute the SHA-256 hex digest of a file's contents.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def new_manifest(basepath="/"):
+    """Create an empty manifest for the given build settings.
+
+    Args:
+        basepath (str): Base path the pages are rendered with
+
+    Returns:
+        dict: Manifest with no recorded inputs
+    """
+    return {
+        "generator": GENERATOR_VERSION,
+        "basepath": basepath,
+        "template": None,
+        "pages": {},
+    }
+
+
+def load_manifest(path):
+    """Load a manifest from disk.
+
+    A missing or unreadable manifest is treated as an empty one, which
+    simply makes the next build a full rebuild.
+
+    Args:
+        path (str): Path to the manifest file
+
+    Returns:
+        dict: The loaded manifest, or an empty manifest
+    """
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return new_manifest(None)
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("pages"), dict):
+        return new_manifest(None)
+    return manifest
+
+
+def save_manifest(manifest, path):
+    """Atomically write a manifest to disk.
+
+    The manifest is written to a temporary file first and then renamed over
+    the old one, so an interrupted build never leaves a truncated manifest.
+
+    Args:
+        manifest (dict): Manifest to save
+        path (str): Destination path of the manifest file
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def check_input(path, entry, st=None):
+    """Check whether an input file differs from its recorded state.
+
+    Compares the file's size and mtime against the recorded entry first.
+    Only when those differ is the file hashed and compared by digest, so a
+    touched but otherwise unchanged file is still reported as unchanged.
+
+    Args:
+        path (str): Path to the input file
+        entry (dict, optional): Previously recorded state, or None
+        st (os.stat_result, optional): The file's stat result if already
+            known, e.g. from a FileIndex, to save a stat call
+
+    Returns:
+        tuple: (changed, new_entry) where changed is a bool and new_entry is
+            the state to record for this file in the new manifest
+    """
+    if st is None:
+        st = os.stat(path)
+    if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        return False, entry
+
+    new_entry = dict(entry or {})
+    new_entry["size"] = st.st_size
+    new_entry["mtime_ns"] = st.st_mtime_ns
+    new_entry["digest"] = file_digest(path)
+
+    changed = entry is None or entry.get("digest") != new_entry["digest"]
+    return changed, new_entry
+
+
+def settings_changed(manifest, basepath, template_entry):
+    """Check whether build-wide settings differ from the recorded ones.
+
+    A change to the generator version, basepath or template affects every
+    page, so any of them forces a full re-render.
+
+    Args:
+        manifest (dict): Previously recorded manifest
+        basepath (str): Base path of the current build
+        template_entry (dict): Current state of the template file
+
+    Returns:
+        bool: True if every page must be re-rendered
+    """
+    old_template = manifest.get("template") or {}
+    return (
+        manifest.get("generator") != GENERATOR_VERSION or
+        manifest.get("basepath") != basepath or
+        old_template.get("digest") != template_entry.get("digest")
+    )
@@ -16,11 +16,17 @@ Key Features:
 - Nested list support with proper HTML structure
 - Robust error handling for malformed markdown
 - Integration with TextNode and HTMLNode systems
+
+Thread safety: all functions here are pure. They keep no module-level
+mutable state and only build new node objects, so documents can be
+converted concurrently from multiple threads, including on free-threaded
+(no-GIL) CPython builds.
 """
 
 import re
 from enum import Enum
-from textnode import TextNode, TextType
+from htmlnode import ParentNode
+from textnode import TextNode, TextType, text_node_to_html_node
 
 
 class BlockType(Enum):
@@ -350,8 +356,6 @@ def text_to_children(text):
     
     Uses existing text_to_textnodes and text_node_to_html_node functions.
     """
-    from textnode import text_node_to_html_node
-    
     # Convert text to TextNodes using existing function
     text_nodes = text_to_textnodes(text)
     
@@ -383,8 +387,6 @@ def markdown_to_html_node(markdown):
         >>> html_node.to_html()
         '<div><h1>Hello</h1><p>This is <b>bold</b> text.</p></div>'
     """
-    from htmlnode import ParentNode
-    
     # Split markdown into blocks
     blocks = markdown_to_blocks(markdown)
     
@@ -417,7 +419,6 @@ def markdown_to_html_node(markdown):
 
 def paragraph_to_html_node(block):
     """Convert a paragraph block to an HTML p node."""
-    from htmlnode import ParentNode
     # Join multiple lines in paragraph with spaces
     paragraph_text = " ".join(line.strip() for line in block.split('\n'))
     children = text_to_children(paragraph_text)
@@ -426,8 +427,6 @@ def paragraph_to_html_node(block):
 
 def heading_to_html_node(block):
     """Convert a heading block to an HTML h1-h6 node."""
-    from htmlnode import ParentNode
-    
     # Count the number of # characters
     level = 0
     for char in block:
@@ -447,9 +446,6 @@ def heading_to_html_node(block):
 
 def code_block_to_html_node(block):
     """Convert a code block to HTML pre/code nodes."""
-    from htmlnode import ParentNode
-    from textnode import text_node_to_html_node
-    
     # Remove the opening and closing backticks
     code_content = block[3:-3]  # Remove ``` from start and end
     
@@ -470,8 +466,6 @@ def code_block_to_html_node(block):
 
 def quote_to_html_node(block):
     """Convert a quote block to HTML blockquote node."""
-    from htmlnode import ParentNode
-    
     # Remove the > characters from each line
     lines = block.split('\n')
     quote_lines = []
@@ -493,8 +487,6 @@ def quote_to_html_node(block):
 
 def unordered_list_to_html_node(block):
     """Convert an unordered list block to HTML ul/li nodes."""
-    from htmlnode import ParentNode
-    
     lines = block.split('\n')
     list_items = []
     
@@ -510,8 +502,6 @@ def unordered_list_to_html_node(block):
 
 def ordered_list_to_html_node(block):
     """Convert an ordered list block to HTML ol/li nodes."""
-    from htmlnode import ParentNode
-    
     lines = block.split('\n')
     list_items = []
     
@@ -0,0 +1,78 @@
+"""
+Page rendering module for turning markdown documents into finished HTML pages.
+
+This module holds the pure part of page generation: given the markdown text,
+the template text and the basepath it produces the final HTML string. It does
+no file I/O of its own, so the same code can be shared by the serial build in
+main.py and by worker processes in parallel builds.
+"""
+
+from markdown import markdown_to_html_node
+
+
+def extract_title(markdown):
+    """
+    Extract the title from markdown content.
+    Looks for the first h1 heading (# Title).
+
+    Args:
+        markdown (str): Markdown content
+
+    Returns:
+        str: The title text without the # symbol
+
+    Raises:
+        ValueError: If no h1 heading is found
+    """
+    lines = markdown.split('\n')
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('# '):
+            return stripped[2:].strip()
+
+    raise ValueError("No h1 heading found in markdown")
+
+
+def apply_basepath(html, basepath):
+    """
+    Point the root-relative links and images of a page at a basepath.
+
+    A page rendered with basepath "/" can be turned into the page for any
+    other basepath with this, without parsing the markdown again.
+
+    Args:
+        html (str): HTML page rendered with basepath "/"
+        basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+
+    Returns:
+        str: The page with its root-relative URLs under basepath
+    """
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
+
+
+def render_page(markdown_content, template_content, basepath="/"):
+    """
+    Render a markdown document into a complete HTML page.
+
+    Args:
+        markdown_content (str): Markdown source of the page
+        template_content (str): HTML template with {{ Title }} and {{ Content }}
+        basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+
+    Returns:
+        str: The final HTML page
+    """
+    # Convert markdown to HTML
+    html_node = markdown_to_html_node(markdown_content)
+    html_content = html_node.to_html()
+
+    # Extract title from markdown
+    title = extract_title(markdown_content)
+
+    # Replace placeholders in template
+    final_html = template_content.replace("{{ Title }}", title)
+    final_html = final_html.replace("{{ Content }}", html_content)
+
+    # Fix paths for basepath
+    return apply_basepath(final_html, basepath)
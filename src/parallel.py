@@ -0,0 +1,314 @@
+"""
+Parallel page rendering module.
+
+Spreads the CPU-bound part of page generation (markdown parsing, HTML
+rendering and template substitution) across a pool of worker processes.
+Each worker reads the template once when it starts; the rendered HTML is
+sent back to the parent process, which does all of the writing so output is
+identical to a serial build.
+
+generate_pages_pipelined() additionally moves file reads and writes onto
+their own threads with bounded queues in between, so large builds run in
+constant memory while disk I/O overlaps with rendering. Its rendering stage
+can also run on a thread pool, which is safe because the markdown pipeline
+keeps no shared mutable state (see markdown.py), or on a pool of
+subinterpreters with their own GILs on Python 3.14+.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from page import render_page
+
+try:
+    from concurrent.futures import InterpreterPoolExecutor
+except ImportError:  # Python < 3.14
+    InterpreterPoolExecutor = None
+
+
+class PageRenderError(Exception):
+    """Raised when a page fails to render in a worker.
+
+    The message always starts with the markdown source path so a failure
+    in a large parallel build can be traced back to its page.
+    """
+
+
+# Names accepted by the executor option of generate_pages_pipelined
+EXECUTORS = ("processes", "threads", "interpreters")
+
+# Directory holding this module, so subinterpreters can import it
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Template text loaded once per worker process by _init_worker. This is the
+# only module-level state and it is never touched by the thread executor.
+_worker_template = None
+
+
+def _init_worker(template_path):
+    """Load the template into a worker process.
+
+    Args:
+        template_path (str): Path to the HTML template
+    """
+    global _worker_template
+    with open(template_path, 'r') as f:
+        _worker_template = f.read()
+
+
+def _render_in_worker(src_path, basepath):
+    """Render a single markdown file inside a worker process.
+
+    Args:
+        src_path (str): Path to the markdown file
+        basepath (str): Base path for the site
+
+    Returns:
+        str: The final HTML page
+
+    Raises:
+        PageRenderError: If reading or rendering the page fails
+    """
+    try:
+        with open(src_path, 'r') as f:
+            markdown_content = f.read()
+        return render_page(markdown_content, _worker_template, basepath)
+    except Exception as e:
+        raise PageRenderError(f"{src_path}: {type(e).__name__}: {e}") from e
+
+
+def default_jobs():
+    """Return the default number of worker processes (one per CPU)."""
+    return os.cpu_count() or 1
+
+
+def _render_path_in_interpreter(src_path, template_path, basepath):
+    """Render a single markdown file inside a subinterpreter.
+
+    Only paths and the basepath cross the interpreter boundary. Each
+    interpreter has its own copy of this module, so the template is loaded
+    on the first call and reused for the rest of the build.
+
+    Args:
+        src_path (str): Path to the markdown file
+        template_path (str): Path to the HTML template
+        basepath (str): Base path for the site
+
+    Returns:
+        tuple: (html, seconds) with the final HTML page and the time it
+            took to read and render
+    """
+    if _worker_template is None:
+        _init_worker(template_path)
+    start = time.perf_counter()
+    html = _render_in_worker(src_path, basepath)
+    return html, time.perf_counter() - start
+
+
+def _render_text(src_path, markdown_content, template_content, basepath):
+    """Render already-read markdown text, tagging failures with the source path.
+
+    Args:
+        src_path (str): Path the markdown was read from, for error messages
+        markdown_content (str): Markdown source of the page
+        template_content (str): HTML template text
+        basepath (str): Base path for the site
+
+    Returns:
+        tuple: (html, seconds) with the final HTML page and the time it
+            took to render
+
+    Raises:
+        PageRenderError: If rendering the page fails
+    """
+    try:
+        start = time.perf_counter()
+        html = render_page(markdown_content, template_content, basepath)
+        return html, time.perf_counter() - start
+    except Exception as e:
+        raise PageRenderError(f"{src_path}: {type(e).__name__}: {e}") from e
+
+
+def _render_text_in_worker(src_path, markdown_content, basepath):
+    """Render already-read markdown text inside a worker process.
+
+    Uses the template loaded by _init_worker, so only the markdown text has
+    to be sent to the worker.
+    """
+    return _render_text(src_path, markdown_content, _worker_template, basepath)
+
+
+def open_pool(executor, jobs, template_path, basepath):
+    """Create the executor used for the rendering stage.
+
+    Callers that build repeatedly can open the pool once and pass it to
+    generate_pages_pipelined for every build (see builder.py).
+
+    Args:
+        executor (str): One of EXECUTORS
+        jobs (int): Number of workers
+        template_path (str): Path to the HTML template
+        basepath (str): Base path for the site
+
+    Returns:
+        tuple: (pool, submit, needs_text) where submit(src_path, markdown_content)
+            schedules a page and returns a future for (html, seconds), and
+            needs_text says whether the pool expects the markdown to be read
+            for it (False means it reads src_path itself)
+
+    Raises:
+        ValueError: If the executor name is not recognised
+    """
+    if executor == "threads":
+        # Threads share one immutable copy of the template; the rendering
+        # code keeps no mutable module state, so no locking is needed.
+        with open(template_path, 'r') as f:
+            template_content = f.read()
+        pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="page-render")
+
+        def submit(src_path, markdown_content):
+            return pool.submit(_render_text, src_path, markdown_content, template_content, basepath)
+        return pool, submit, True
+
+    if executor == "interpreters" and InterpreterPoolExecutor is not None:
+        # Subinterpreters start without the script directory on sys.path, so
+        # add it before any task (and this module) is unpickled there.
+        bootstrap = f"import sys\nif {_SRC_DIR!r} not in sys.path: sys.path.insert(0, {_SRC_DIR!r})"
+        pool = InterpreterPoolExecutor(max_workers=jobs, initializer=exec, initargs=(bootstrap,))
+
+        def submit(src_path, markdown_content):
+            return pool.submit(_render_path_in_interpreter, src_path, template_path, basepath)
+        return pool, submit, False
+
+    if executor == "interpreters":
+        print("InterpreterPoolExecutor requires Python 3.14+; falling back to processes")
+        executor = "processes"
+
+    if executor == "processes":
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                   initargs=(template_path,))
+
+        def submit(src_path, markdown_content):
+            return pool.submit(_render_text_in_worker, src_path, markdown_content, basepath)
+        return pool, submit, True
+
+    raise ValueError(f"Unknown executor: {executor} (expected one of {', '.join(EXECUTORS)})")
+
+
+# Marks the end of the stream in the pipeline queues
+_DONE = object()
+
+
+def generate_pages_pipelined(pages, template_path, write, basepath="/", jobs=None,
+                             max_pending=None, executor="processes", pool=None, durations=None):
+    """Generate pages with reading, rendering and writing running concurrently.
+
+    The build is split into three stages connected by bounded queues:
+
+    1. A reader thread reads markdown files from disk.
+    2. The calling thread hands the markdown text to a worker pool.
+    3. A writer thread waits for rendered pages in order and writes them.
+
+    Because both queues are bounded, at most about 2 * max_pending pages are
+    held in memory at any time, however large the site is. Disk reads and
+    writes overlap with parsing, so neither the disk nor the CPUs sit idle.
+
+    Args:
+        pages (list): List of (source_path, dest_path) tuples
+        template_path (str): Path to the HTML template
+        write (callable): Called as write(dest_path, html) from the writer thread
+        basepath (str): Base path for the site
+        jobs (int, optional): Number of worker processes. Defaults to the CPU count.
+        max_pending (int, optional): Queue bound per stage. Defaults to 4 * jobs.
+        executor (str): "processes" for a process pool, "threads" for a
+            thread pool, which avoids pickling costs on free-threaded CPython,
+            or "interpreters" for a Python 3.14 subinterpreter pool, which
+            falls back to processes on older interpreters
+        pool (tuple, optional): An open pool from open_pool() to render on
+            instead of starting one; it is left open for later builds
+        durations (dict, optional): Filled with source_path -> seconds the
+            worker spent rendering each page (see timings.py)
+
+    Raises:
+        PageRenderError: If any page fails to read, render or write
+    """
+    if not pages:
+        return
+
+    jobs = jobs or default_jobs()
+    max_pending = max_pending or jobs * 4
+    read_queue = queue.Queue(maxsize=max_pending)
+    write_queue = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    errors = []
+
+    def fail(src_path, e):
+        if not isinstance(e, PageRenderError):
+            e = PageRenderError(f"{src_path}: {type(e).__name__}: {e}")
+        errors.append(e)
+        stop.set()
+
+    def read_stage():
+        for src_path, dest_path in pages:
+            if stop.is_set():
+                break
+            markdown_content = None
+            if needs_text:
+                try:
+                    with open(src_path, 'r') as f:
+                        markdown_content = f.read()
+                except OSError as e:
+                    fail(src_path, e)
+                    break
+            read_queue.put((src_path, dest_path, markdown_content))
+        read_queue.put(_DONE)
+
+    def write_stage():
+        while True:
+            item = write_queue.get()
+            if item is _DONE:
+                return
+            src_path, dest_path, future = item
+            if stop.is_set():
+                # Keep draining so the other stages never block on a full queue
+                future.cancel()
+                continue
+            try:
+                html, seconds = future.result()
+                if durations is not None:
+                    durations[src_path] = seconds
+                print(f"Generating page from {src_path} to {dest_path} using {template_path}")
+                write(dest_path, html)
+            except Exception as e:
+                fail(src_path, e)
+
+    owns_pool = pool is None
+    if owns_pool:
+        pool = open_pool(executor, jobs, template_path, basepath)
+    pool, submit, needs_text = pool
+    reader = threading.Thread(target=read_stage, name="page-reader", daemon=True)
+    writer = threading.Thread(target=write_stage, name="page-writer", daemon=True)
+    reader.start()
+    writer.start()
+
+    try:
+        while True:
+            item = read_queue.get()
+            if item is _DONE:
+                break
+            src_path, dest_path, markdown_content = item
+            if stop.is_set():
+                continue
+            write_queue.put((src_path, dest_path, submit(src_path, markdown_content)))
+        write_queue.put(_DONE)
+        writer.join()
+    finally:
+        if owns_pool:
+            pool.shutdown()
+    reader.join()
+
+    if errors:
+        raise errors[0]
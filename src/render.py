@@ -0,0 +1,158 @@
+"""
+Single-page rendering entry point for external build tools.
+
+Build systems such as Ninja or Make can render each page as its own build
+step, so they can schedule the work and skip pages that are up to date:
+
+    python3 src/render.py [--basepath PATH] [--template FILE] [--depfile FILE] [--quiet] SRC DEST
+
+This renders exactly one markdown file and never walks the content tree or
+touches static/. With --depfile it also writes a Make-style dependency file
+listing the inputs of DEST (the markdown source and the template), which
+Ninja reads through `depfile = $out.d` and `deps = gcc`.
+
+The build tool may start this script thousands of times, so it only imports
+the page rendering modules; arguments are parsed by hand rather than with
+argparse, which would double the import time.
+"""
+
+import os
+import sys
+
+from page import render_page
+
+
+USAGE = "usage: render.py [--basepath PATH] [--template FILE] [--depfile FILE] [--quiet] SRC DEST"
+
+
+def html_output_path(key):
+    """
+    Map a content-relative markdown path to its output path.
+    
+    Args:
+        key (str): Content-relative path of a markdown file, using '/'
+        
+    Returns:
+        str: Output-relative path of the generated HTML file
+    """
+    directory, filename = os.path.split(key)
+    return os.path.join(directory, filename.replace('.md', '.html')).replace(os.sep, '/')
+
+
+def write_page(dest_path, html, output=None):
+    """
+    Write a rendered HTML page, creating its directory if needed.
+    
+    Args:
+        dest_path (str): Path where the generated HTML should be saved
+        html (str): The final HTML page
+        output (optional): Output backend to write through instead of
+            writing dest_path directly (see archive.py, staging.py and
+            directory.py)
+    """
+    if output is not None:
+        output.write_bytes(dest_path, html.encode('utf-8'))
+        return
+    
+    # Ensure destination directory exists
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir and not os.path.exists(dest_dir):
+        os.makedirs(dest_dir, exist_ok=True)
+    
+    # Write the final HTML to the destination
+    with open(dest_path, 'w') as f:
+        f.write(html)
+
+
+def generate_page(from_path, template_path, dest_path, basepath="/"):
+    """
+    Generate an HTML page from markdown content and template.
+    
+    Args:
+        from_path (str): Path to the markdown file
+        template_path (str): Path to the HTML template
+        dest_path (str): Path where the generated HTML should be saved
+        basepath (str): Base path for the site (e.g., "/" or "/repo-name/")
+        
+    Returns:
+        str: The final HTML that was written
+    """
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    
+    # Read the markdown file
+    with open(from_path, 'r') as f:
+        markdown_content = f.read()
+    
+    # Read the template file
+    with open(template_path, 'r') as f:
+        template_content = f.read()
+    
+    final_html = render_page(markdown_content, template_content, basepath)
+    write_page(dest_path, final_html)
+    return final_html
+
+
+def _escape_dep_path(path):
+    """Escape a path for a Make/Ninja depfile."""
+    path = path.replace(os.sep, '/')
+    for char in (' ', '#'):
+        path = path.replace(char, '\\' + char)
+    return path.replace('$', '$$')
+
+
+def write_depfile(depfile_path, target, inputs):
+    """
+    Write a Make-style dependency file for one output.
+    
+    Args:
+        depfile_path (str): Path of the depfile to write
+        target (str): The output the dependencies belong to
+        inputs (list): Paths of every file the output was built from
+    """
+    lines = [_escape_dep_path(target) + ":"]
+    lines.extend(_escape_dep_path(path) for path in inputs)
+    with open(depfile_path, 'w') as f:
+        f.write(" \\\n  ".join(lines) + "\n")
+
+
+def main(argv=None):
+    """
+    Entry point for `render.py`: render one markdown file to one HTML page.
+    
+    Args:
+        argv (list, optional): Arguments; defaults to sys.argv[1:]
+    """
+    args = list(sys.argv[1:] if argv is None else argv)
+    options = {"--basepath": "/", "--template": "template.html", "--depfile": None}
+    positional = []
+    while args:
+        arg = args.pop(0)
+        if arg in options:
+            if not args:
+                sys.exit(f"{USAGE}\nrender.py: {arg} needs a value")
+            options[arg] = args.pop(0)
+        elif arg.startswith("--") and arg.partition("=")[0] in options:
+            name, _, value = arg.partition("=")
+            options[name] = value
+        elif arg in ("-q", "--quiet"):
+            # Build tools show any output of a step, so keep it empty
+            sys.stdout = open(os.devnull, 'w')
+        elif arg in ("-h", "--help"):
+            print(USAGE)
+            return
+        else:
+            positional.append(arg)
+    if len(positional) != 2:
+        sys.exit(USAGE)
+    
+    src_path, dest_path = positional
+    try:
+        generate_page(src_path, options["--template"], dest_path, options["--basepath"])
+    except (OSError, ValueError) as e:
+        sys.exit(f"render.py: {src_path}: {e}")
+    if options["--depfile"]:
+        write_depfile(options["--depfile"], dest_path, [src_path, options["--template"]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Content sharding module for splitting a build across several machines.
+
+Each page is assigned to a shard by a stable hash of its content-relative
+path, so every machine agrees on the split without talking to the others.
+A shard build renders only its own pages into a separate output directory
+with a partial manifest; merge_shards() then combines those directories
+into the final site and checks that every page was built exactly once.
+"""
+
+import hashlib
+import os
+import shutil
+
+from manifest import MANIFEST_FILENAME, load_manifest, save_manifest
+
+
+class ShardMergeError(ValueError):
+    """Raised when shard outputs cannot be combined into a complete site."""
+
+
+def parse_shard(spec):
+    """Parse a shard specification of the form "i/N".
+
+    Shards are numbered from 1, so "1/4" is the first of four shards.
+
+    Args:
+        spec (str): Shard specification
+
+    Returns:
+        tuple: (index, count)
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}': expected i/N, e.g. 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}': index must be between 1 and {count}")
+    return index, count
+
+
+def shard_of(key, count):
+    """Return the 1-based shard a page belongs to.
+
+    Uses SHA-1 of the content-relative path rather than hash(), which is
+    randomised per process and would differ between machines.
+
+    Args:
+        key (str): Content-relative path of the markdown file, using '/'
+        count (int): Total number of shards
+
+    Returns:
+        int: Shard index between 1 and count
+    """
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def check_shards(shard_dirs, expected_keys):
+    """Check that shard builds together cover the site exactly once.
+
+    Every expected page must have been rendered by exactly one shard, no
+    shard may contain pages that are not expected, every page's output file
+    must exist, and all shards must have used the same generator version,
+    basepath and template.
+
+    Args:
+        shard_dirs (list): Output directories of the individual shard builds
+        expected_keys (iterable): Content-relative paths of every page
+
+    Returns:
+        list: The partial manifest of each shard, in shard_dirs order
+
+    Raises:
+        ShardMergeError: If pages are missing, duplicated or unexpected, an
+            output file is missing, or the shards were built with different
+            settings
+    """
+    manifests = []
+    owners = {}
+    for shard_dir in shard_dirs:
+        manifest_path = os.path.join(shard_dir, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            raise ShardMergeError(f"No manifest found in shard directory: {shard_dir}")
+        manifest = load_manifest(manifest_path)
+        manifests.append(manifest)
+        for key in manifest["pages"]:
+            owners.setdefault(key, []).append(shard_dir)
+
+    problems = []
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for key, entry in sorted(manifest["pages"].items()):
+            output = entry.get("output")
+            if not output or not os.path.isfile(os.path.join(shard_dir, output)):
+                problems.append(f"missing output file: {os.path.join(shard_dir, output or key)} (for {key})")
+    settings = {(m.get("generator"), m.get("basepath"), (m.get("template") or {}).get("digest"))
+                for m in manifests}
+    if len(settings) > 1:
+        problems.append("shards were built with different generator, basepath or template")
+
+    expected_keys = set(expected_keys)
+    for key in sorted(expected_keys - set(owners)):
+        problems.append(f"missing page: {key}")
+    for key in sorted(set(owners) - expected_keys):
+        problems.append(f"unexpected page: {key}")
+    for key, dirs in sorted(owners.items()):
+        if len(dirs) > 1:
+            problems.append(f"duplicate page: {key} (in {', '.join(dirs)})")
+    if problems:
+        raise ShardMergeError("Cannot merge shards:\n  " + "\n  ".join(problems))
+    return manifests
+
+
+def merge_shards(shard_dirs, dest_dir, expected_keys):
+    """Merge shard output directories and manifests into one site.
+
+    The shards are validated with check_shards() before anything is copied.
+
+    Args:
+        shard_dirs (list): Output directories of the individual shard builds
+        dest_dir (str): Directory to merge into (must already exist)
+        expected_keys (iterable): Content-relative paths of every page
+
+    Returns:
+        int: Number of pages merged
+
+    Raises:
+        ShardMergeError: If the shards do not cover the site exactly once
+    """
+    manifests = check_shards(shard_dirs, expected_keys)
+
+    merged = dict(manifests[0]) if manifests else {}
+    merged.pop("shard", None)
+    merged["pages"] = {}
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for key, entry in manifest["pages"].items():
+            src_path = os.path.join(shard_dir, entry["output"])
+            dest_path = os.path.join(dest_dir, entry["output"])
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            print(f"Merging {src_path} -> {dest_path}")
+            shutil.copyfile(src_path, dest_path)
+            merged["pages"][key] = entry
+
+    save_manifest(merged, os.path.join(dest_dir, MANIFEST_FILENAME))
+    return len(merged["pages"])
@@ -0,0 +1,590 @@
+"""
+Input sources for reading the site's content, template and static files.
+
+A source gives the build read access to a tree of files without caring
+where they live. Paths are always relative to the root of the source and
+use '/' as the separator.
+
+- DirectorySource reads an ordinary checkout on disk.
+- GitSource reads a commit straight from the object database through one
+  long-lived `git cat-file --batch` process, so historical builds need no
+  checkout at all and every file comes with its blob SHA for free.
+- ZipSource and TarSource read members of an archive directly, so a site
+  shipped as one tarball can be built without extracting it first.
+
+Every source provides list_files(), is_dir(), size(), read_bytes(),
+copy_to(), copy_file() and blob_id(), and can be used as a context manager.
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+import threading
+import zipfile
+
+from gitchanges import GitError, run_git
+
+
+# Chunk size used when streaming file contents to an output file
+_CHUNK_SIZE = 1024 * 1024
+
+
+class DirectorySource:
+    """Reads files from a directory on disk.
+
+    Attributes:
+        root (str): Directory all paths are relative to
+        index (FileIndex): Listings and stat results to use instead of the
+            disk for the directories it covers, or None
+    """
+
+    def __init__(self, root=".", index=None):
+        """Initialize the source.
+
+        Args:
+            root (str): Directory all paths are relative to
+            index (FileIndex, optional): Index of the input trees built at
+                the start of the build (see fileindex.py)
+        """
+        self.root = root
+        self.index = index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release any resources held by the source."""
+
+    def _path(self, path):
+        return os.path.join(self.root, path)
+
+    def list_files(self, directory):
+        """List every file below a directory, recursively.
+
+        Args:
+            directory (str): Directory relative to the source root
+
+        Returns:
+            list: Sorted paths relative to directory, using '/'
+        """
+        base = self._path(directory)
+        if self.index is not None:
+            files = self.index.list_files(base)
+            if files is not None:
+                return files
+        files = []
+        for dirpath, dirnames, filenames in os.walk(base):
+            rel_dir = os.path.relpath(dirpath, base)
+            for filename in filenames:
+                rel = filename if rel_dir == "." else os.path.join(rel_dir, filename)
+                files.append(rel.replace(os.sep, '/'))
+        # Same order as the git and zip sources, so outputs match between them
+        return sorted(files)
+
+    def is_dir(self, path):
+        """Return True if path is a directory.
+
+        Args:
+            path (str): Path relative to the source root
+        """
+        return os.path.isdir(self._path(path))
+
+    def size(self, path):
+        """Return the size of a file in bytes.
+
+        Args:
+            path (str): Path relative to the source root
+        """
+        st = self.index.stat(self._path(path)) if self.index is not None else None
+        return st.st_size if st is not None else os.path.getsize(self._path(path))
+
+    def mtime_ns(self, path):
+        """Return the modification time of a file in nanoseconds.
+
+        Args:
+            path (str): Path relative to the source root
+        """
+        st = self.index.stat(self._path(path)) if self.index is not None else None
+        return (st or os.stat(self._path(path))).st_mtime_ns
+
+    def read_bytes(self, path):
+        """Read a whole file.
+
+        Args:
+            path (str): Path relative to the source root
+
+        Returns:
+            bytes: File contents
+        """
+        with open(self._path(path), 'rb') as f:
+            return f.read()
+
+    def copy_to(self, path, fileobj):
+        """Stream a file into an open binary file object.
+
+        Args:
+            path (str): Path relative to the source root
+            fileobj: Writable binary file object
+        """
+        with open(self._path(path), 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                fileobj.write(chunk)
+
+    def copy_file(self, path, dest_path, copier=None):
+        """Copy a file to a path on disk.
+
+        Args:
+            path (str): Path relative to the source root
+            dest_path (str): Destination file path
+            copier (FileCopier, optional): Copies the file with the cheapest
+                method the file systems support (see copier.py); without one
+                the file is copied with shutil.copy
+        """
+        if copier is not None:
+            copier.copy(self._path(path), dest_path)
+        else:
+            shutil.copy(self._path(path), dest_path)
+
+    def blob_id(self, path):
+        """Return a content identifier for a file, if the source has one.
+
+        Directory sources have none; callers should hash the bytes instead.
+        """
+        return None
+
+
+class GitSource:
+    """Reads files from a git commit without checking it out.
+
+    The tree of the commit is listed once with `git ls-tree` and file
+    contents are fetched on demand from a single `git cat-file --batch`
+    process, which is much cheaper than spawning git once per file.
+
+    Attributes:
+        commit (str): The resolved commit SHA
+    """
+
+    def __init__(self, commit, repo_dir="."):
+        """Resolve the commit and index its tree.
+
+        Args:
+            commit (str): Any commit-ish, e.g. "HEAD" or "v1.2"
+            repo_dir (str): Directory inside the repository; paths are
+                relative to this directory
+
+        Raises:
+            GitError: If the commit cannot be resolved
+        """
+        self.commit = run_git(["rev-parse", "--verify", f"{commit}^{{commit}}"], repo_dir).strip()
+        self._blobs = {}
+        self._sizes = {}
+        listing = run_git(["ls-tree", "-r", "-z", "-l", self.commit], repo_dir)
+        for record in listing.split('\0'):
+            if not record:
+                continue
+            info, path = record.split('\t', 1)
+            mode, obj_type, sha, size = info.split()
+            # Skip submodules and symlinks, which have no file content to copy
+            if obj_type == "blob" and mode != "120000":
+                self._blobs[path] = sha
+                self._sizes[path] = int(size)
+
+        self._lock = threading.Lock()
+        self._process = subprocess.Popen(["git", "cat-file", "--batch"], cwd=repo_dir,
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the cat-file process."""
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+        self._process.stdout.close()
+
+    def list_files(self, directory):
+        """List every file below a directory of the commit, recursively.
+
+        Args:
+            directory (str): Directory relative to the repository root
+
+        Returns:
+            list: Sorted paths relative to directory, using '/'
+        """
+        prefix = directory.strip('/') + '/'
+        return sorted(path[len(prefix):] for path in self._blobs if path.startswith(prefix))
+
+    def is_dir(self, path):
+        """Return True if the commit has files below path.
+
+        Args:
+            path (str): Path relative to the repository root
+        """
+        prefix = path.strip('/') + '/'
+        return any(name.startswith(prefix) for name in self._blobs)
+
+    def size(self, path):
+        """Return the size of a file in the commit in bytes.
+
+        Args:
+            path (str): Path relative to the repository root
+        """
+        self.blob_id(path)
+        return self._sizes[path]
+
+    def mtime_ns(self, path):
+        """Return None: commits carry no file modification times to compare
+        outputs against, so callers compare contents instead.
+        """
+        return None
+
+    def blob_id(self, path):
+        """Return the blob SHA of a file in the commit.
+
+        Args:
+            path (str): Path relative to the repository root
+
+        Returns:
+            str: The blob SHA
+
+        Raises:
+            FileNotFoundError: If the commit has no such file
+        """
+        try:
+            return self._blobs[path]
+        except KeyError:
+            raise FileNotFoundError(f"{path} does not exist in commit {self.commit[:12]}")
+
+    def _stream(self, path, fileobj):
+        sha = self.blob_id(path)
+        with self._lock:
+            self._process.stdin.write(sha.encode('ascii') + b"\n")
+            self._process.stdin.flush()
+            header = self._process.stdout.readline().split()
+            if len(header) != 3 or header[1] != b"blob":
+                raise GitError(f"git cat-file could not read {path} ({sha})")
+            remaining = int(header[2])
+            while remaining:
+                chunk = self._process.stdout.read(min(remaining, _CHUNK_SIZE))
+                if not chunk:
+                    raise GitError(f"git cat-file ended while reading {path}")
+                fileobj.write(chunk)
+                remaining -= len(chunk)
+            # Each object is followed by a newline
+            self._process.stdout.read(1)
+
+    def read_bytes(self, path):
+        """Read a whole file from the commit.
+
+        Args:
+            path (str): Path relative to the repository root
+
+        Returns:
+            bytes: File contents
+        """
+        buffer = io.BytesIO()
+        self._stream(path, buffer)
+        return buffer.getvalue()
+
+    def copy_to(self, path, fileobj):
+        """Stream a file from the commit into an open binary file object.
+
+        Args:
+            path (str): Path relative to the repository root
+            fileobj: Writable binary file object
+        """
+        self._stream(path, fileobj)
+
+    def copy_file(self, path, dest_path, copier=None):
+        """Copy a file from the commit to a path on disk.
+
+        Args:
+            path (str): Path relative to the repository root
+            dest_path (str): Destination file path
+            copier (FileCopier, optional): Counts the streamed bytes
+        """
+        with open(dest_path, 'wb') as f:
+            self._stream(path, f)
+        if copier is not None:
+            copier.record("copy", self.size(path))
+
+
+def _member_path(name):
+    """Normalize an archive member name to a '/'-separated relative path.
+
+    Returns:
+        str: The relative path, or None for absolute names and names with a
+            '..' component, which would point outside the output directory
+    """
+    name = name.replace('\\', '/')
+    if name.startswith('/') or '..' in name.split('/'):
+        print(f"Skipping unsafe archive member: {name}")
+        return None
+    while name.startswith('./'):
+        name = name[2:]
+    return name
+
+
+def _files_below(names, directory):
+    """Select the names below a directory, relative to it, keeping their order."""
+    prefix = directory.strip('/') + '/'
+    return [name[len(prefix):] for name in names if name.startswith(prefix)]
+
+
+class ZipSource:
+    """Reads files from a zip archive without extracting it.
+
+    Attributes:
+        path (str): Path of the archive
+    """
+
+    def __init__(self, path):
+        """Open the archive and index its members.
+
+        Args:
+            path (str): Path of the zip file
+        """
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._members = {}
+        for info in self._zip.infolist():
+            path = None if info.is_dir() else _member_path(info.filename)
+            if path:
+                self._members[path] = info
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the archive."""
+        self._zip.close()
+
+    def _member(self, path):
+        try:
+            return self._members[path]
+        except KeyError:
+            raise FileNotFoundError(f"{path} does not exist in {self.path}")
+
+    def list_files(self, directory):
+        """List every file below a directory of the archive, recursively.
+
+        Args:
+            directory (str): Directory relative to the archive root
+
+        Returns:
+            list: Sorted paths relative to directory, using '/'
+        """
+        return sorted(_files_below(self._members, directory))
+
+    def is_dir(self, path):
+        """Return True if the archive has files below path.
+
+        Args:
+            path (str): Path relative to the archive root
+        """
+        return bool(_files_below(self._members, path))
+
+    def size(self, path):
+        """Return the uncompressed size of a member in bytes.
+
+        Args:
+            path (str): Path relative to the archive root
+        """
+        return self._member(path).file_size
+
+    def mtime_ns(self, path):
+        """Return None: archives carry no file modification times to compare
+        outputs against, so callers compare contents instead.
+        """
+        return None
+
+    def read_bytes(self, path):
+        """Read a whole member.
+
+        Args:
+            path (str): Path relative to the archive root
+
+        Returns:
+            bytes: File contents
+        """
+        return self._zip.read(self._member(path))
+
+    def copy_to(self, path, fileobj):
+        """Stream a member into an open binary file object.
+
+        Args:
+            path (str): Path relative to the archive root
+            fileobj: Writable binary file object
+        """
+        with self._zip.open(self._member(path)) as f:
+            shutil.copyfileobj(f, fileobj, _CHUNK_SIZE)
+
+    def copy_file(self, path, dest_path, copier=None):
+        """Stream a member to a path on disk.
+
+        Args:
+            path (str): Path relative to the archive root
+            dest_path (str): Destination file path
+            copier (FileCopier, optional): Counts the streamed bytes
+        """
+        with open(dest_path, 'wb') as f:
+            self.copy_to(path, f)
+        if copier is not None:
+            copier.record("copy", self.size(path))
+
+    def blob_id(self, path):
+        """Archives have no content identifiers; callers hash the bytes."""
+        return None
+
+
+class TarSource:
+    """Reads files from a tar archive, optionally compressed, without extracting it.
+
+    Compressed tar files can only be read sequentially, and seeking back to
+    an earlier member means decompressing from the start again. list_files()
+    therefore returns members in archive order rather than sorted, so a
+    caller that reads files in the order listed streams through the archive
+    once.
+
+    Attributes:
+        path (str): Path of the archive
+    """
+
+    def __init__(self, path):
+        """Open the archive and index its members.
+
+        Args:
+            path (str): Path of a .tar, .tar.gz, .tar.bz2 or .tar.xz file
+        """
+        self.path = path
+        self._tar = tarfile.open(path, "r:*")
+        self._lock = threading.Lock()
+        self._members = {}
+        for info in self._tar.getmembers():
+            path = _member_path(info.name) if info.isfile() else None
+            if path:
+                self._members[path] = info
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the archive."""
+        self._tar.close()
+
+    def _member(self, path):
+        try:
+            return self._members[path]
+        except KeyError:
+            raise FileNotFoundError(f"{path} does not exist in {self.path}")
+
+    def list_files(self, directory):
+        """List every file below a directory of the archive, recursively.
+
+        Args:
+            directory (str): Directory relative to the archive root
+
+        Returns:
+            list: Paths relative to directory, using '/', in archive order
+        """
+        return _files_below(self._members, directory)
+
+    def is_dir(self, path):
+        """Return True if the archive has files below path.
+
+        Args:
+            path (str): Path relative to the archive root
+        """
+        return bool(_files_below(self._members, path))
+
+    def size(self, path):
+        """Return the size of a member in bytes.
+
+        Args:
+            path (str): Path relative to the archive root
+        """
+        return self._member(path).size
+
+    def mtime_ns(self, path):
+        """Return None: archives carry no file modification times to compare
+        outputs against, so callers compare contents instead.
+        """
+        return None
+
+    def read_bytes(self, path):
+        """Read a whole member.
+
+        Args:
+            path (str): Path relative to the archive root
+
+        Returns:
+            bytes: File contents
+        """
+        buffer = io.BytesIO()
+        self.copy_to(path, buffer)
+        return buffer.getvalue()
+
+    def copy_to(self, path, fileobj):
+        """Stream a member into an open binary file object.
+
+        Args:
+            path (str): Path relative to the archive root
+            fileobj: Writable binary file object
+        """
+        member = self._member(path)
+        # Members share the archive's file position
+        with self._lock, self._tar.extractfile(member) as f:
+            shutil.copyfileobj(f, fileobj, _CHUNK_SIZE)
+
+    def copy_file(self, path, dest_path, copier=None):
+        """Stream a member to a path on disk.
+
+        Args:
+            path (str): Path relative to the archive root
+            dest_path (str): Destination file path
+            copier (FileCopier, optional): Counts the streamed bytes
+        """
+        with open(dest_path, 'wb') as f:
+            self.copy_to(path, f)
+        if copier is not None:
+            copier.record("copy", self.size(path))
+
+    def blob_id(self, path):
+        """Archives have no content identifiers; callers hash the bytes."""
+        return None
+
+
+def open_source(path):
+    """Open a directory, zip file or tar file as an input source.
+
+    Args:
+        path (str): Directory or archive path
+
+    Returns:
+        A DirectorySource, ZipSource or TarSource
+
+    Raises:
+        ValueError: If path is neither a directory nor a supported archive
+    """
+    if os.path.isdir(path):
+        return DirectorySource(path)
+    if zipfile.is_zipfile(path):
+        return ZipSource(path)
+    if os.path.isfile(path) and tarfile.is_tarfile(path):
+        return TarSource(path)
+    raise ValueError(f"Cannot read '{path}': expected a directory, zip file or tar file")
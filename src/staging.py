@@ -0,0 +1,218 @@
+"""
+Staging directory output with an atomic swap into place.
+
+A regular build deletes the output directory first, so a web server reading
+from it sees a missing or half-built site until the build finishes. A
+staged build instead writes into a sibling directory and, once everything
+succeeded, exchanges the two directories in a single rename. Readers see
+either the complete old site or the complete new one.
+
+Outputs that are byte-identical to the file at the same path in the
+previous build are hardlinked instead of written, so unchanged files cost
+no copied bytes and keep their page-cache pages warm.
+
+The exchange uses Linux renameat2(RENAME_EXCHANGE) when available. Elsewhere
+it falls back to two renames, which leaves the output path briefly missing
+but never half-written.
+"""
+
+import ctypes
+import errno
+import hashlib
+import os
+import shutil
+import sys
+import threading
+
+from copier import FileCopier
+from directory import file_matches, output_key, source_digest, stat_matches
+
+
+# Constants from <fcntl.h> and <linux/fs.h>
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+
+def _renameat2_exchange(path_a, path_b):
+    """Atomically exchange two paths with renameat2(RENAME_EXCHANGE).
+
+    Returns:
+        bool: False if the kernel, C library or file system does not
+            support the exchange, in which case nothing was changed
+
+    Raises:
+        OSError: If the exchange is supported but failed
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        return False  # glibc before 2.28 or a libc without the wrapper
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    renameat2.restype = ctypes.c_int
+    if renameat2(_AT_FDCWD, os.fsencode(path_a), _AT_FDCWD, os.fsencode(path_b), _RENAME_EXCHANGE) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+        return False
+    raise OSError(err, os.strerror(err), path_a)
+
+
+def swap_directories(new_dir, live_dir):
+    """Move new_dir into place at live_dir and delete the old live_dir.
+
+    Args:
+        new_dir (str): Fully built directory
+        live_dir (str): Directory being served, which may not exist yet
+
+    Returns:
+        bool: True if the swap was atomic
+    """
+    if not os.path.exists(live_dir):
+        os.rename(new_dir, live_dir)
+        return True
+    if _renameat2_exchange(new_dir, live_dir):
+        # new_dir now holds the previous build
+        shutil.rmtree(new_dir)
+        return True
+
+    old_dir = new_dir + ".old"
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+    os.rename(live_dir, old_dir)
+    os.rename(new_dir, live_dir)
+    shutil.rmtree(old_dir)
+    return False
+
+
+class StagingOutput:
+    """Builds into a sibling staging directory, then swaps it into place.
+
+    Build functions treat the live output path as their destination
+    directory, exactly as with the archive outputs in archive.py; every
+    path below it is redirected into the staging directory.
+
+    Attributes:
+        path (str): The live output directory
+        staging_dir (str): Directory the new build is written to
+        written (int): Outputs written to the staging directory
+        linked (int): Outputs hardlinked from the previous build
+        atomic (bool): Whether the final swap was atomic, once closed
+        files (dict): Output-relative path -> {"size", "digest"} of every
+            output, or None when not tracking (see deploy.py)
+        trust_mtime (bool): Link copied files whose previous output has the
+            source's size and mtime without hashing them
+        copier (FileCopier): Copies static files and counts the bytes moved
+    """
+
+    def __init__(self, path, track=False, trust_mtime=True, copier=None):
+        """Create an empty staging directory next to path.
+
+        Args:
+            path (str): The live output directory
+            track (bool): Record the size and digest of every output in files
+            trust_mtime (bool): Compare copied files by size and mtime first
+                (see DirectoryOutput)
+            copier (FileCopier, optional): Copy strategy for static files that
+                changed; defaults to FileCopier("auto")
+        """
+        self.path = path
+        self.trust_mtime = trust_mtime
+        self.copier = copier if copier is not None else FileCopier()
+        self.files = {} if track else None
+        self._lock = threading.Lock()
+        parent, name = os.path.split(os.path.abspath(path))
+        self.staging_dir = os.path.join(parent, f".{name}.staging")
+        self.written = 0
+        self.linked = 0
+        self.atomic = None
+        if os.path.exists(self.staging_dir):
+            # Left behind by an interrupted build
+            shutil.rmtree(self.staging_dir)
+        os.makedirs(self.staging_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _paths(self, dest_path):
+        """Return (staged_path, previous_path) for an output path.
+
+        Raises:
+            ValueError: If dest_path is not below the output directory
+        """
+        rel = output_key(dest_path, self.path)
+        staged_path = os.path.join(self.staging_dir, rel)
+        os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+        return staged_path, os.path.join(self.path, rel)
+
+    def _link_previous(self, previous_path, staged_path):
+        try:
+            os.link(previous_path, staged_path)
+        except OSError:
+            return False  # e.g. a file system without hardlinks
+        return True
+
+    def _record(self, dest_path, linked, size, digest):
+        with self._lock:
+            if linked:
+                self.linked += 1
+            else:
+                self.written += 1
+            if self.files is not None:
+                self.files[output_key(dest_path, self.path)] = {"size": size, "digest": digest}
+
+    def write_bytes(self, dest_path, data):
+        """Add a file with the given contents.
+
+        Args:
+            dest_path (str): Output path below the live directory
+            data (bytes): File contents
+        """
+        staged_path, previous_path = self._paths(dest_path)
+        digest = hashlib.sha256(data).hexdigest()
+        linked = (file_matches(previous_path, len(data), digest)
+                  and self._link_previous(previous_path, staged_path))
+        if not linked:
+            with open(staged_path, 'wb') as f:
+                f.write(data)
+        self._record(dest_path, linked, len(data), digest)
+
+    def copy_from(self, source, src_path, dest_path):
+        """Copy a file from an input source into the staging directory.
+
+        Args:
+            source: Input source (see sources.py)
+            src_path (str): Path of the file within the source
+            dest_path (str): Output path below the live directory
+        """
+        staged_path, previous_path = self._paths(dest_path)
+        size = source.size(src_path)
+        mtime_ns = source.mtime_ns(src_path)
+        digest = source_digest(source, src_path) if self.files is not None else None
+        if self.trust_mtime and mtime_ns is not None and stat_matches(previous_path, size, mtime_ns):
+            matches = True
+        else:
+            matches = file_matches(previous_path, size, digest or (lambda: source_digest(source, src_path)))
+        linked = matches and self._link_previous(previous_path, staged_path)
+        if not linked:
+            source.copy_file(src_path, staged_path, self.copier)
+        if mtime_ns is not None:
+            os.utime(staged_path, ns=(mtime_ns, mtime_ns))
+        self._record(dest_path, linked, size, digest)
+
+    def close(self):
+        """Swap the finished build into place."""
+        self.atomic = swap_directories(self.staging_dir, self.path)
+
+    def abort(self):
+        """Discard the staging directory, leaving the live site untouched."""
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
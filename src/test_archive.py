@@ -0,0 +1,92 @@
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from archive import DEFAULT_EPOCH, is_archive_path, open_archive_output
+from fixtures import read_tree, write_file
+from main import copy_static, find_markdown_files, generate_pages, generate_pages_recursive
+
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestArchiveOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(6):
+            write_file(os.path.join(self.content, f"section{i % 2}", f"page{i}.md"), f"# Page {i}\n\nBody {i}")
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, "images", "logo.bin"), bytes(range(256)) * 40)
+
+    def _build(self, dest, jobs=1):
+        with open_archive_output(dest) as output:
+            copy_static(self.static, dest, output=output)
+            if jobs == 1:
+                generate_pages_recursive(self.content, self.template, dest, "/r/", output=output)
+            else:
+                pages = sorted(find_markdown_files(self.content, dest))
+                generate_pages(pages, self.template, "/r/", jobs=jobs, output=output)
+        return dest
+
+    def _directory_build(self):
+        dest = os.path.join(self.tmp.name, "dir")
+        copy_static(self.static, dest)
+        generate_pages_recursive(self.content, self.template, dest, "/r/")
+        return read_tree(dest)
+
+    def test_is_archive_path(self):
+        for path in ("site.zip", "site.tar", "site.tar.gz", "site.tgz", "site.tar.bz2", "site.tar.xz"):
+            self.assertTrue(is_archive_path(path), path)
+        self.assertFalse(is_archive_path("docs"))
+
+    def test_tar_matches_directory_build(self):
+        dest = self._build(os.path.join(self.tmp.name, "site.tar.gz"))
+        with tarfile.open(dest) as tar:
+            files = {m.name: tar.extractfile(m).read() for m in tar.getmembers()}
+            self.assertEqual({m.mtime for m in tar.getmembers()}, {DEFAULT_EPOCH})
+        self.assertEqual(files, self._directory_build())
+
+    def test_zip_matches_directory_build(self):
+        dest = self._build(os.path.join(self.tmp.name, "site.zip"))
+        with zipfile.ZipFile(dest) as zf:
+            files = {name: zf.read(name) for name in zf.namelist()}
+        self.assertEqual(files, self._directory_build())
+
+    def test_archives_are_reproducible(self):
+        for suffix in (".tar.gz", ".tar.xz", ".zip"):
+            first = self._build(os.path.join(self.tmp.name, "a" + suffix))
+            second = self._build(os.path.join(self.tmp.name, "b" + suffix), jobs=2)
+            with open(first, "rb") as a, open(second, "rb") as b:
+                self.assertEqual(a.read(), b.read(), suffix)
+
+    def test_source_date_epoch(self):
+        with mock.patch.dict(os.environ, {"SOURCE_DATE_EPOCH": "1700000000"}):
+            dest = self._build(os.path.join(self.tmp.name, "site.tar"))
+        with tarfile.open(dest) as tar:
+            self.assertEqual({m.mtime for m in tar.getmembers()}, {1700000000})
+
+    def test_failed_build_leaves_no_archive(self):
+        dest = os.path.join(self.tmp.name, "site.tar.gz")
+        write_file(os.path.join(self.content, "bad.md"), "no heading")
+        with self.assertRaises(Exception):
+            self._build(dest)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["content", "static", "template.html"])
+
+    def test_rejects_paths_outside_archive(self):
+        dest = os.path.join(self.tmp.name, "site.zip")
+        with open_archive_output(dest) as output:
+            with self.assertRaises(ValueError):
+                output.write_bytes(os.path.join(self.tmp.name, "other.html"), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
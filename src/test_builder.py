@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from builder import Site
+from fixtures import read_file, write_file
+
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+
+    def _site(self, **options):
+        site = Site(self.content, self.template, self.static, self.docs, **options)
+        self.addCleanup(site.close)
+        return site
+
+    def test_build(self):
+        result = self._site().build()
+        self.assertEqual(result, {"pages": 2, "rendered": 2})
+        self.assertEqual(read_file(os.path.join(self.docs, "blog", "post.html")),
+                         "<title>Post</title><div><h1>Post</h1></div>")
+        self.assertEqual(read_file(os.path.join(self.docs, "index.css")), "body {}")
+
+    def test_repeated_builds_reuse_the_pool(self):
+        site = self._site(jobs=2, executor="threads")
+        site.build()
+        pool = site._pool
+        write_file(os.path.join(self.content, "index.md"), "# Changed")
+        site.build()
+        self.assertIs(site._pool, pool)
+        self.assertIn("Changed", read_file(os.path.join(self.docs, "index.html")))
+
+        write_file(self.template, "<h1>{{ Title }}</h1>")
+        site.build()
+        self.assertIsNot(site._pool, pool)
+        self.assertEqual(read_file(os.path.join(self.docs, "index.html")), "<h1>Changed</h1>")
+
+    def test_changing_the_basepath_restarts_the_pool(self):
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post.html)")
+        site = self._site(jobs=2, executor="threads", cache_dir=os.path.join(self.tmp.name, "cache"))
+        site.build()
+        pool = site._pool
+        site.basepath = "/repo/"
+        site.build()
+        self.assertIsNot(site._pool, pool)
+        self.assertIn('href="/repo/blog/post.html"', read_file(os.path.join(self.docs, "index.html")))
+
+        # The cache holds the page under each basepath's own key
+        site.basepath = "/"
+        site.build()
+        self.assertIn('href="/blog/post.html"', read_file(os.path.join(self.docs, "index.html")))
+
+    def test_build_paths(self):
+        site = self._site()
+        site.build()
+        write_file(os.path.join(self.content, "index.md"), "# Changed")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Not requested")
+        write_file(os.path.join(self.static, "new.css"), "p {}")
+        result = site.build_paths([os.path.join(self.content, "index.md"),
+                                   os.path.join(self.static, "new.css"), "README.md"])
+        self.assertEqual(result, {"rendered": 1, "copied": 1, "removed": 0, "ignored": ["README.md"]})
+        self.assertIn("Changed", read_file(os.path.join(self.docs, "index.html")))
+        self.assertIn("<h1>Post</h1>", read_file(os.path.join(self.docs, "blog", "post.html")))
+        self.assertEqual(read_file(os.path.join(self.docs, "new.css")), "p {}")
+
+    def test_build_paths_removes_deleted_inputs(self):
+        site = self._site()
+        site.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        result = site.build_paths([os.path.join(self.content, "blog", "post.md")])
+        self.assertEqual(result["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_build_paths_with_template_renders_every_page(self):
+        site = self._site()
+        site.build()
+        write_file(self.template, "<h1>{{ Title }}</h1>")
+        self.assertEqual(site.build_paths([self.template])["rendered"], 2)
+        self.assertEqual(read_file(os.path.join(self.docs, "blog", "post.html")), "<h1>Post</h1>")
+
+    def test_cache_is_shared_between_sites(self):
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        self.assertEqual(self._site(cache_dir=cache_dir).build()["rendered"], 2)
+        self.docs = os.path.join(self.tmp.name, "other")
+        site = self._site(cache_dir=cache_dir)
+        self.assertEqual(site.build()["rendered"], 0)
+        self.assertEqual(site.cache.hits, 2)
+        self.assertIn("<h1>Home</h1>", read_file(os.path.join(self.docs, "index.html")))
+
+    def test_render_string(self):
+        site = self._site(basepath="/repo/")
+        self.assertEqual(site.render_string("# Hi\n\n[x](/a)"),
+                         '<title>Hi</title><div><h1>Hi</h1><p><a href="/repo/a">x</a></p></div>')
+        self.assertFalse(os.path.exists(self.docs))
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            Site(executor="fibers")
+
+
+if __name__ == "__main__":
+    unittest.main()
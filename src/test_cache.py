@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from cache import STATS_FILENAME, RenderCache, cache_key, parse_age, parse_size
+from directory import DirectoryOutput
+from fixtures import write_file
+from main import find_markdown_files, generate_pages
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_depends_on_every_input(self):
+        base = cache_key(b"# A", b"<t>", "/")
+        self.assertEqual(base, cache_key(b"# A", b"<t>", "/"))
+        self.assertNotEqual(base, cache_key(b"# B", b"<t>", "/"))
+        self.assertNotEqual(base, cache_key(b"# A", b"<u>", "/"))
+        self.assertNotEqual(base, cache_key(b"# A", b"<t>", "/repo/"))
+
+    def test_field_boundaries_matter(self):
+        self.assertNotEqual(cache_key(b"ab", b"c", "/"), cache_key(b"a", b"bc", "/"))
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.tmp.name, "cache"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        key = cache_key(b"# A", b"<t>", "/")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "<p>ü</p>")
+        self.assertEqual(self.cache.get(key), "<p>ü</p>")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_record_stats_accumulates(self):
+        self.cache.hits, self.cache.misses = 3, 1
+        self.cache.record_stats()
+        other = RenderCache(self.cache.cache_dir)
+        other.hits, other.misses = 1, 1
+        self.assertEqual(other.record_stats(), {"hits": 4, "misses": 2})
+        with open(os.path.join(self.cache.cache_dir, STATS_FILENAME)) as f:
+            self.assertEqual(json.load(f)["hits"], 4)
+
+
+class TestParsing(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("2K"), 2048)
+        self.assertEqual(parse_size("1.5MB"), 1572864)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_parse_age(self):
+        self.assertEqual(parse_age("30"), 30)
+        self.assertEqual(parse_age("2h"), 7200)
+        self.assertEqual(parse_age("7d"), 604800)
+        with self.assertRaises(ValueError):
+            parse_age("soon")
+
+
+class TestCacheEviction(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.tmp.name, "cache"))
+        self.keys = [cache_key(str(i).encode(), b"", "/") for i in range(5)]
+        now = time.time()
+        for age, key in enumerate(reversed(self.keys)):
+            self.cache.put(key, "x" * 100)
+            # keys[0] is the oldest entry, keys[4] the most recently used
+            path = self.cache._entry_path(key)
+            os.utime(path, (now - age * 3600, now - age * 3600))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stats(self):
+        stats = self.cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (5, 500))
+        self.assertEqual(stats["hit_rate"], 0.0)
+
+    def test_gc_by_size_evicts_least_recently_used(self):
+        result = self.cache.gc(max_bytes=250)
+        self.assertEqual(result, {"removed": 3, "freed": 300})
+        self.assertIsNone(self.cache.get(self.keys[0]))
+        self.assertIsNotNone(self.cache.get(self.keys[4]))
+
+    def test_hit_refreshes_last_use(self):
+        self.cache.get(self.keys[0])
+        self.cache.gc(max_bytes=100)
+        self.assertIsNotNone(self.cache.get(self.keys[0]))
+        self.assertIsNone(self.cache.get(self.keys[4]))
+
+    def test_gc_by_age(self):
+        result = self.cache.gc(max_age=2.5 * 3600)
+        self.assertEqual(result["removed"], 2)
+        self.assertEqual(self.cache.stats()["entries"], 3)
+
+
+class TestGenerateWithCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(4):
+            write_file(os.path.join(self.content, f"page{i}.md"), f"# Page {i}")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _build(self, out, jobs=1):
+        cache = RenderCache(self.cache_dir)
+        pages = find_markdown_files(self.content, os.path.join(self.tmp.name, out))
+        generate_pages(pages, self.template, "/", jobs, cache=cache)
+        return cache
+
+    def test_second_build_is_served_from_cache(self):
+        first = self._build("one")
+        self.assertEqual((first.hits, first.misses), (0, 4))
+        write_file(os.path.join(self.content, "page0.md"), "# Changed")
+        second = self._build("two", jobs=2)
+        self.assertEqual((second.hits, second.misses), (3, 1))
+        with open(os.path.join(self.tmp.name, "two", "page1.html")) as f:
+            self.assertEqual(f.read(), "<title>Page 1</title><div><h1>Page 1</h1></div>")
+        with open(os.path.join(self.tmp.name, "two", "page0.html")) as f:
+            self.assertIn("Changed", f.read())
+
+    def test_cached_pages_survive_pruning(self):
+        self._build("out")
+        out = os.path.join(self.tmp.name, "out")
+        with DirectoryOutput(out) as output:
+            pages = find_markdown_files(self.content, out)
+            generate_pages(pages, self.template, "/", 2, cache=RenderCache(self.cache_dir), output=output)
+        self.assertEqual((output.skipped, output.removed), (4, 0))
+        self.assertEqual(sorted(os.listdir(out)), [f"page{i}.html" for i in range(4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from coordinator import BuildCoordinator, parse_address, run_worker
+from fixtures import read_tree, write_file
+from main import find_markdown_files, generate_pages_recursive, write_page
+from parallel import PageRenderError
+
+
+TEMPLATE = "<title>{{ Title }}</title><a href=\"/\">home</a>{{ Content }}"
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+class TestParseAddress(unittest.TestCase):
+    def test_host_and_port(self):
+        self.assertEqual(parse_address("10.0.0.1:9000"), ("10.0.0.1", 9000))
+
+    def test_default_host(self):
+        self.assertEqual(parse_address(":9000"), ("127.0.0.1", 9000))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_address("localhost")
+
+
+class TestCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.out = os.path.join(self.tmp.name, "out")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(10):
+            write_file(os.path.join(self.content, f"dir{i % 2}", f"page{i}.md"), f"# Page {i}\n\n**{i}**")
+        self.pages = find_markdown_files(self.content, self.out)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _coordinator(self, basepath="/"):
+        coordinator = BuildCoordinator(self.pages, TEMPLATE, write_page, basepath)
+        self.addCleanup(coordinator.close)
+        return coordinator
+
+    def test_worker_processes_build_whole_site(self):
+        coordinator = self._coordinator("/repo/")
+        host, port = coordinator.address
+        workers = [
+            subprocess.Popen([sys.executable, MAIN, "--worker", f"{host}:{port}"],
+                             stdout=subprocess.DEVNULL)
+            for _ in range(2)
+        ]
+        try:
+            coordinator.serve(timeout=30)
+        finally:
+            for worker in workers:
+                self.assertEqual(worker.wait(timeout=30), 0)
+
+        expected = os.path.join(self.tmp.name, "expected")
+        generate_pages_recursive(self.content, self.template, expected, "/repo/")
+        self.assertEqual(read_tree(self.out), read_tree(expected))
+
+    def test_lost_worker_page_is_requeued(self):
+        coordinator = self._coordinator()
+        host, port = coordinator.address
+        server = threading.Thread(target=coordinator.serve, kwargs={"timeout": 30})
+        server.start()
+
+        # A worker that takes a page and dies before answering
+        with socket.create_connection((host, port)) as sock, sock.makefile('rb') as rfile:
+            sock.sendall(b'{"op": "hello"}\n{"op": "next"}\n')
+            rfile.readline()
+            taken = json.loads(rfile.readline())
+            self.assertEqual(taken["op"], "page")
+
+        # A late worker finishes everything, including the lost page
+        self.assertEqual(run_worker(host, port), len(self.pages))
+        server.join()
+        self.assertEqual(len(read_tree(self.out)), len(self.pages))
+
+    def test_render_error_fails_build(self):
+        write_file(self.pages[3][0], "no heading")
+        coordinator = self._coordinator()
+        host, port = coordinator.address
+        worker = threading.Thread(target=run_worker, args=(host, port))
+        worker.start()
+        with self.assertRaises(PageRenderError) as ctx:
+            coordinator.serve(timeout=30)
+        worker.join()
+        self.assertIn(self.pages[3][0], str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
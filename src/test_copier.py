@@ -0,0 +1,84 @@
+import errno
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from copier import FileCopier
+from directory import DirectoryOutput
+from fixtures import read_bytes, write_file
+from sources import DirectorySource
+
+
+def _unsupported(*args):
+    raise OSError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+
+
+class TestFileCopier(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data = bytes(range(256)) * 64
+        self.src = os.path.join(self.tmp.name, "static", "image.bin")
+        self.dest = os.path.join(self.tmp.name, "docs", "image.bin")
+        write_file(self.src, self.data)
+        os.makedirs(os.path.dirname(self.dest))
+
+    def test_every_strategy_copies_the_bytes(self):
+        for strategy in ("auto", "reflink", "kernel", "hardlink", "copy"):
+            with self.subTest(strategy=strategy):
+                copier = FileCopier(strategy)
+                method = copier.copy(self.src, self.dest)
+                self.assertEqual(read_bytes(self.dest), self.data)
+                self.assertEqual(copier.methods, {method: 1})
+                self.assertEqual(copier.bytes_copied + copier.bytes_shared, len(self.data))
+                os.remove(self.dest)
+
+    def test_plain_copy_moves_bytes_and_not_the_mode(self):
+        os.chmod(self.src, 0o755)
+        copier = FileCopier("copy")
+        self.assertEqual(copier.copy(self.src, self.dest), "copy")
+        self.assertEqual((copier.bytes_copied, copier.bytes_shared), (len(self.data), 0))
+        self.assertFalse(os.stat(self.dest).st_mode & stat.S_IXUSR)
+
+    def test_hardlink_shares_the_source(self):
+        copier = FileCopier("hardlink")
+        self.assertEqual(copier.copy(self.src, self.dest), "hardlink")
+        self.assertTrue(os.path.samefile(self.src, self.dest))
+        self.assertEqual((copier.bytes_copied, copier.bytes_shared), (0, len(self.data)))
+
+    def test_auto_detects_once_per_file_system(self):
+        with mock.patch.object(FileCopier, "_reflink", return_value=False) as reflink, \
+                mock.patch("os.copy_file_range", side_effect=_unsupported, create=True):
+            copier = FileCopier()
+            self.assertEqual(copier.copy(self.src, self.dest), "kernel")  # via sendfile
+            self.assertEqual(copier.copy(self.src, self.dest + ".2"), "kernel")
+        self.assertEqual(reflink.call_count, 1)
+        self.assertEqual(read_bytes(self.dest + ".2"), self.data)
+
+    def test_falls_back_to_plain_copy(self):
+        with mock.patch.object(FileCopier, "_reflink", return_value=False), \
+                mock.patch.object(FileCopier, "_kernel", return_value=False):
+            copier = FileCopier("reflink")
+            self.assertEqual(copier.copy(self.src, self.dest), "copy")
+        self.assertEqual(read_bytes(self.dest), self.data)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            FileCopier("teleport")
+
+    def test_directory_output_reports_bytes_moved(self):
+        copier = FileCopier("copy")
+        out = os.path.dirname(self.dest)
+        source = DirectorySource(self.tmp.name)
+        with DirectoryOutput(out, copier=copier) as output:
+            output.copy_from(source, "static/image.bin", self.dest)
+        with DirectoryOutput(out, copier=copier) as output:
+            output.copy_from(source, "static/image.bin", self.dest)
+        self.assertEqual(copier.methods, {"copy": 1})
+        self.assertEqual(copier.bytes_copied, len(self.data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from daemon import BuildDaemon, request, serve
+from fixtures import read_file, write_file
+
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestBuildDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        self.daemon = BuildDaemon(self.content, self.template, self.static, self.docs)
+        self.daemon.rebuild()
+
+    def test_initial_build(self):
+        self.assertEqual(self.daemon.last_build["rendered"], 2)
+        self.assertEqual(self.daemon.last_build["written"], 3)
+        self.assertIn("<title>Post</title>", read_file(os.path.join(self.docs, "blog", "post.html")))
+        self.assertEqual(read_file(os.path.join(self.docs, "index.css")), "body {}")
+
+    def test_rebuild_without_changes_does_nothing(self):
+        result = self.daemon.rebuild()
+        self.assertEqual((result["rendered"], result["written"], result["removed"]), (0, 0, 0))
+
+    def test_rebuild_changed_added_and_removed_pages(self):
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Edited")
+        write_file(os.path.join(self.content, "new.md"), "# New")
+        os.remove(os.path.join(self.content, "index.md"))
+        result = self.daemon.rebuild()
+        self.assertEqual((result["rendered"], result["removed"]), (2, 1))
+        self.assertIn("Edited", read_file(os.path.join(self.docs, "blog", "post.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "new.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_deleted_output_is_restored_without_rendering(self):
+        os.remove(os.path.join(self.docs, "index.html"))
+        result = self.daemon.rebuild()
+        self.assertEqual((result["rendered"], result["written"]), (0, 1))
+        self.assertIn("<title>Home</title>", read_file(os.path.join(self.docs, "index.html")))
+
+    def test_rebuild_paths(self):
+        write_file(os.path.join(self.content, "index.md"), "# Changed")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Also changed")
+        result = self.daemon.rebuild([os.path.join(self.content, "index.md"), "README.md"])
+        self.assertEqual(result["rendered"], 1)
+        self.assertEqual(result["ignored"], ["README.md"])
+        self.assertIn("Changed", read_file(os.path.join(self.docs, "index.html")))
+        self.assertIn("<title>Post</title>", read_file(os.path.join(self.docs, "blog", "post.html")))
+
+    def test_template_path_rerenders_every_page(self):
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        result = self.daemon.rebuild([self.template])
+        self.assertEqual(result["rendered"], 2)
+        self.assertIn("<h1>Home</h1>", read_file(os.path.join(self.docs, "index.html")))
+
+
+class TestServe(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        content = os.path.join(self.tmp.name, "content")
+        static = os.path.join(self.tmp.name, "static")
+        template = os.path.join(self.tmp.name, "template.html")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        write_file(template, TEMPLATE)
+        write_file(os.path.join(content, "index.md"), "# Home")
+        os.makedirs(static)
+        self.socket = os.path.join(self.tmp.name, "daemon.sock")
+        self.daemon = BuildDaemon(content, template, static, self.docs)
+        ready = threading.Event()
+        self.thread = threading.Thread(target=serve, args=(self.daemon, self.socket, ready))
+        self.thread.start()
+        ready.wait(5)
+
+    def tearDown(self):
+        if self.thread.is_alive():
+            request(self.socket, {"op": "stop"})
+            self.thread.join(5)
+
+    def test_requests(self):
+        response = request(self.socket, {"op": "rebuild"})
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["rendered"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+        status = request(self.socket, {"op": "status"})
+        self.assertEqual((status["pages"], status["builds"]), (1, 1))
+
+        response = request(self.socket, {"op": "bogus"})
+        self.assertFalse(response["ok"])
+
+    def test_second_daemon_refuses_socket(self):
+        with self.assertRaises(RuntimeError):
+            serve(self.daemon, self.socket)
+
+    def test_stop(self):
+        self.assertTrue(request(self.socket, {"op": "stop"})["ok"])
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket))
+
+
+if __name__ == "__main__":
+    unittest.main()
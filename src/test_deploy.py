@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+
+from deploy import diff_files, load_deploy_files, write_deploy_manifest
+from directory import DirectoryOutput
+from fixtures import write_file
+from main import copy_static, generate_pages_recursive
+from staging import StagingOutput
+
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestDiffFiles(unittest.TestCase):
+    def test_diff(self):
+        old = {"a.html": {"size": 1, "digest": "1"}, "b.html": {"size": 1, "digest": "2"},
+               "c.html": {"size": 1, "digest": "3"}}
+        new = {"a.html": {"size": 1, "digest": "1"}, "b.html": {"size": 1, "digest": "9"},
+               "d.html": {"size": 1, "digest": "4"}}
+        self.assertEqual(diff_files(old, new),
+                         {"added": ["d.html"], "modified": ["b.html"], "deleted": ["c.html"]})
+
+    def test_missing_manifest_is_empty(self):
+        self.assertEqual(load_deploy_files("/nonexistent/deploy.json"), {})
+
+
+class TestDeployManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.manifest = os.path.join(self.tmp.name, "deploy.json")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+
+    def _build(self, output_class):
+        old_files = load_deploy_files(self.manifest)
+        with output_class(self.docs, track=True) as output:
+            copy_static(self.static, self.docs, output=output)
+            generate_pages_recursive(self.content, self.template, self.docs, "/", output=output)
+        return write_deploy_manifest(self.manifest, output.files, old_files)
+
+    def test_records_every_output_with_digest(self):
+        diff = self._build(DirectoryOutput)
+        self.assertEqual(diff["added"], ["blog/post.html", "index.css", "index.html"])
+        with open(self.manifest) as f:
+            files = json.load(f)["files"]
+        with open(os.path.join(self.docs, "index.css"), "rb") as f:
+            data = f.read()
+        self.assertEqual(files["index.css"], {"size": len(data), "digest": hashlib.sha256(data).hexdigest()})
+
+    def test_diff_against_previous_build(self):
+        for output_class in (DirectoryOutput, StagingOutput):
+            self._build(output_class)
+            unchanged = self._build(output_class)
+            self.assertEqual(unchanged, {"added": [], "modified": [], "deleted": []})
+
+        write_file(os.path.join(self.content, "index.md"), "# New home")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        write_file(os.path.join(self.static, "extra.css"), "a {}")
+        diff = self._build(StagingOutput)
+        self.assertEqual(diff, {"added": ["extra.css"], "modified": ["index.html"],
+                                "deleted": ["blog/post.html"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
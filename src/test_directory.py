@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from directory import DirectoryOutput
+from fixtures import read_file, write_file
+from sources import DirectorySource
+
+
+class TestDirectoryOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.out = os.path.join(self.tmp.name, "out")
+        self.page = os.path.join(self.out, "blog", "post.html")
+
+    def test_unchanged_file_is_not_rewritten(self):
+        with DirectoryOutput(self.out) as output:
+            self.assertTrue(output.write_bytes(self.page, b"<p>hi</p>"))
+        os.utime(self.page, (1000000000, 1000000000))
+        with DirectoryOutput(self.out) as output:
+            self.assertFalse(output.write_bytes(self.page, b"<p>hi</p>"))
+        self.assertEqual((output.written, output.skipped), (0, 1))
+        self.assertEqual(os.stat(self.page).st_mtime, 1000000000)
+
+    def test_same_size_different_bytes_is_written(self):
+        with DirectoryOutput(self.out) as output:
+            output.write_bytes(self.page, b"<p>hi</p>")
+        with DirectoryOutput(self.out) as output:
+            self.assertTrue(output.write_bytes(self.page, b"<p>ho</p>"))
+        self.assertEqual(read_file(self.page), "<p>ho</p>")
+
+    def test_hardlinked_file_is_replaced_not_modified(self):
+        with DirectoryOutput(self.out) as output:
+            output.write_bytes(self.page, b"old")
+        other = os.path.join(self.tmp.name, "other.html")
+        os.link(self.page, other)
+        with DirectoryOutput(self.out) as output:
+            output.write_bytes(self.page, b"new")
+        self.assertEqual(read_file(other), "old")
+        self.assertEqual(read_file(self.page), "new")
+
+    def test_copy_from_skips_identical_static_files(self):
+        write_file(os.path.join(self.tmp.name, "static", "site.css"), "body {}")
+        source = DirectorySource(self.tmp.name)
+        dest = os.path.join(self.out, "site.css")
+        with DirectoryOutput(self.out) as output:
+            self.assertTrue(output.copy_from(source, "static/site.css", dest))
+            self.assertFalse(output.copy_from(source, "static/site.css", dest))
+        self.assertEqual(read_file(dest), "body {}")
+
+    def test_copy_from_trusts_matching_size_and_mtime(self):
+        src = os.path.join(self.tmp.name, "static", "site.css")
+        write_file(src, "body {}")
+        source = DirectorySource(self.tmp.name)
+        dest = os.path.join(self.out, "site.css")
+        with DirectoryOutput(self.out) as output:
+            output.copy_from(source, "static/site.css", dest)
+        self.assertEqual(os.stat(dest).st_mtime_ns, os.stat(src).st_mtime_ns)
+
+        # Same size and mtime: not even read, so the edit goes unnoticed
+        mtime_ns = os.stat(dest).st_mtime_ns
+        write_file(dest, "p    {}")
+        os.utime(dest, ns=(mtime_ns, mtime_ns))
+        with DirectoryOutput(self.out) as output:
+            self.assertFalse(output.copy_from(source, "static/site.css", dest))
+        self.assertEqual(read_file(dest), "p    {}")
+        with DirectoryOutput(self.out, trust_mtime=False) as output:
+            self.assertTrue(output.copy_from(source, "static/site.css", dest))
+        self.assertEqual(read_file(dest), "body {}")
+
+    def test_paths_outside_the_output_are_refused(self):
+        outside = os.path.join(self.out, "..", "escaped.html")
+        with DirectoryOutput(self.out) as output:
+            with self.assertRaises(ValueError):
+                output.write_bytes(outside, b"<p>hi</p>")
+        self.assertFalse(os.path.exists(outside))
+
+    def test_link_from_shares_the_file(self):
+        existing = os.path.join(self.tmp.name, "shared.css")
+        write_file(existing, "body {}")
+        dest = os.path.join(self.out, "site.css")
+        write_file(dest, "body {}")
+        with DirectoryOutput(self.out) as output:
+            self.assertTrue(output.link_from(existing, dest))
+            self.assertFalse(output.link_from(existing, dest))
+        self.assertTrue(os.path.samefile(existing, dest))
+        self.assertEqual((output.written, output.skipped), (1, 1))
+
+    def test_prune_removes_files_not_produced(self):
+        stale = os.path.join(self.out, "old", "gone.html")
+        write_file(stale, "stale")
+        with DirectoryOutput(self.out) as output:
+            output.write_bytes(self.page, b"<p>hi</p>")
+        self.assertEqual(output.removed, 1)
+        self.assertFalse(os.path.exists(os.path.dirname(stale)))
+        self.assertTrue(os.path.exists(self.page))
+
+    def test_no_prune_when_disabled_or_failed(self):
+        stale = os.path.join(self.out, "stale.html")
+        write_file(stale, "stale")
+        with DirectoryOutput(self.out, prune=False) as output:
+            output.write_bytes(self.page, b"x")
+        with self.assertRaises(RuntimeError):
+            with DirectoryOutput(self.out) as output:
+                raise RuntimeError("build failed")
+        self.assertTrue(os.path.exists(stale))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fileindex import FileIndex
+from fixtures import write_file
+from main import find_markdown_files
+from sources import DirectorySource
+
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post")
+        write_file(os.path.join(self.content, "blog.md"), "# Blog")
+        write_file(os.path.join(self.static, "images", "a.png"), "png")
+        self.index = FileIndex([self.content, self.static, os.path.join(self.tmp.name, "missing")])
+
+    def test_lists_like_directory_source(self):
+        for root in (self.content, self.static, os.path.join(self.content, "blog")):
+            self.assertEqual(self.index.list_files(root), DirectorySource().list_files(root))
+        self.assertEqual(self.index.list_files(os.path.join(self.tmp.name, "missing")), [])
+        self.assertIsNone(self.index.list_files(self.tmp.name))
+
+    def test_stat_results_are_cached(self):
+        path = os.path.join(self.static, "images", "a.png")
+        self.assertEqual(self.index.stat(path).st_size, 3)
+        self.assertEqual(self.index.stat(path).st_ino, os.stat(path).st_ino)
+        self.assertIsNone(self.index.stat(os.path.join(self.static, "nope")))
+
+    def test_stages_do_not_touch_the_disk(self):
+        source = DirectorySource(index=self.index)
+        with mock.patch("os.walk") as walk, mock.patch("os.stat") as stat, \
+                mock.patch("os.scandir") as scandir:
+            self.assertEqual(source.list_files(self.static), ["images/a.png"])
+            self.assertEqual(source.size(os.path.join(self.static, "images", "a.png")), 3)
+            pages = find_markdown_files(self.content, "out", self.index)
+        walk.assert_not_called()
+        stat.assert_not_called()
+        scandir.assert_not_called()
+        self.assertEqual([dest for _, dest in pages],
+                         [os.path.join("out", "blog.html"), os.path.join("out", "blog", "post.html"),
+                          os.path.join("out", "index.html")])
+
+
+if __name__ == "__main__":
+    unittest.main()
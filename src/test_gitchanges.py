@@ -0,0 +1,113 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from directory import DirectoryOutput
+from fixtures import write_file
+from gitchanges import changed_files, head_commit, under
+from main import generate_site_from_git
+from manifest import MANIFEST_FILENAME, load_manifest
+
+
+def _git(*args):
+    subprocess.run(["git", *args], check=True, capture_output=True)
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class TestGitChanges(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        _git("init", "-q")
+        _git("config", "user.email", "test@example.com")
+        _git("config", "user.name", "Test")
+        write_file("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        write_file("content/index.md", "# Home\n\nWelcome home")
+        write_file("content/blog/post.md", "# Post\n\nA long post body that stays the same")
+        write_file("static/style.css", "body {}")
+        write_file("static/images/a.png", "png")
+        self._commit("initial")
+
+    def _commit(self, message):
+        _git("add", "-A")
+        _git("commit", "-q", "-m", message)
+
+    def _build(self):
+        return generate_site_from_git("content", "template.html", "static", "docs")
+
+    def test_changed_files_reports_statuses(self):
+        base = head_commit()
+        write_file("content/index.md", "# Home\n\nChanged")
+        _git("mv", "content/blog/post.md", "content/blog/renamed.md")
+        os.remove("static/style.css")
+        write_file("content/new.md", "# New")
+        changes = sorted(changed_files(base, ["content", "static"]), key=str)
+        self.assertIn(("M", "content/index.md", "content/index.md"), changes)
+        self.assertIn(("R", "content/blog/post.md", "content/blog/renamed.md"), changes)
+        self.assertIn(("D", "static/style.css", None), changes)
+        self.assertIn(("A", None, "content/new.md"), changes)
+
+    def test_under(self):
+        self.assertEqual(under("content/blog/a.md", "content"), "blog/a.md")
+        self.assertIsNone(under("contentx/a.md", "content"))
+
+    def test_first_build_falls_back_and_records_commit(self):
+        counts = self._build()
+        self.assertEqual(counts["rendered"], 2)
+        self.assertTrue(os.path.exists("docs/images/a.png"))
+        manifest = load_manifest(os.path.join("docs", MANIFEST_FILENAME))
+        self.assertEqual(manifest["commit"], head_commit())
+
+    def test_only_changed_files_are_processed(self):
+        self._build()
+        write_file("content/index.md", "# Home\n\nEdited")
+        _git("mv", "content/blog/post.md", "content/blog/moved.md")
+        os.remove("static/images/a.png")
+        write_file("static/new.css", "p {}")
+        self._commit("edit")
+
+        counts = self._build()
+        self.assertEqual(counts, {"rendered": 1, "removed": 0, "moved": 1, "static": 2})
+        with open("docs/index.html") as f:
+            self.assertIn("Edited", f.read())
+        self.assertTrue(os.path.exists("docs/blog/moved.html"))
+        self.assertFalse(os.path.exists("docs/blog/post.html"))
+        self.assertFalse(os.path.exists("docs/images"))
+        self.assertTrue(os.path.exists("docs/new.css"))
+        manifest = load_manifest(os.path.join("docs", MANIFEST_FILENAME))
+        self.assertEqual(sorted(manifest["pages"]), ["blog/moved.md", "index.md"])
+
+    def test_static_files_go_through_the_output(self):
+        self._build()
+        write_file("static/new.css", "p {}")
+        os.chmod("static/new.css", 0o755)
+        with DirectoryOutput("docs", prune=False) as output:
+            counts = generate_site_from_git("content", "template.html", "static", "docs", output=output)
+        self.assertEqual(counts["static"], 1)
+        self.assertEqual(output.written, 1)
+        self.assertEqual(os.stat("docs/new.css").st_mtime_ns, os.stat("static/new.css").st_mtime_ns)
+        self.assertFalse(os.stat("docs/new.css").st_mode & 0o100)
+
+    def test_uncommitted_change_is_rechecked_after_revert(self):
+        self._build()
+        write_file("content/index.md", "# Home\n\nDraft")
+        self.assertEqual(self._build()["rendered"], 1)
+        _git("checkout", "--", "content/index.md")
+        self.assertEqual(self._build()["rendered"], 1)
+        with open("docs/index.html") as f:
+            self.assertIn("Welcome home", f.read())
+        self.assertEqual(self._build()["rendered"], 0)
+
+    def test_template_change_rebuilds_everything(self):
+        self._build()
+        write_file("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        self._commit("template")
+        self.assertEqual(self._build()["rendered"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
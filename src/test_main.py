@@ -0,0 +1,201 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+import main
+from fixtures import read_file, read_tree, write_file
+from main import (
+    check_output_dir,
+    check_target_dirs,
+    find_pages_matching,
+    generate_page,
+    generate_pages_incremental,
+    generate_pages_recursive,
+    generate_site_targets,
+    sync_static,
+)
+
+
+TEMPLATE = "<title>{{ Title }}</title><link href=\"/index.css\">{{ Content }}"
+
+
+class TestGenerateSiteTargets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n![logo](/logo.png) [post](/blog/post)")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+
+    def _targets(self, jobs):
+        targets = [("/", os.path.join(self.tmp.name, "root")),
+                   ("/repo/", os.path.join(self.tmp.name, "repo"))]
+        generate_site_targets(self.content, self.template, self.static, targets, jobs, "threads")
+        return [read_tree(dest) for _, dest in targets]
+
+    def test_matches_separate_builds(self):
+        for basepath, out in (("/", "root"), ("/repo/", "repo")):
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "ref-" + out),
+                                     basepath)
+        root, repo = self._targets(jobs=1)
+        self.assertEqual(repo["index.html"], read_tree(os.path.join(self.tmp.name, "ref-repo"))["index.html"])
+        self.assertEqual(root["index.html"], read_tree(os.path.join(self.tmp.name, "ref-root"))["index.html"])
+        self.assertIn(b'href="/repo/blog/post"', repo["index.html"])
+        self.assertEqual(self._targets(jobs=2), [root, repo])
+
+    def test_static_files_are_hardlinked(self):
+        self._targets(jobs=1)
+        self.assertTrue(os.path.samefile(os.path.join(self.tmp.name, "root", "index.css"),
+                                         os.path.join(self.tmp.name, "repo", "index.css")))
+
+    def test_nested_target_directories_are_refused(self):
+        check_target_dirs([("/", "out"), ("/x/", "outx")])
+        for dirs in (("out", "out/x"), ("out/x", "out"), ("out", "./out")):
+            with self.subTest(dirs=dirs), self.assertRaises(ValueError):
+                check_target_dirs([("/", dirs[0]), ("/x/", dirs[1])])
+        targets = [("/", os.path.join(self.tmp.name, "out")), ("/x/", os.path.join(self.tmp.name, "out", "x"))]
+        with self.assertRaises(ValueError):
+            generate_site_targets(self.content, self.template, self.static, targets)
+        self.assertFalse(os.path.exists(targets[0][1]))
+
+
+class TestFindPagesMatching(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        for key in ("index.md", "blog/a/index.md", "blog/b/index.md", "notes/c.md"):
+            write_file(os.path.join(self.content, key), "# Page")
+
+    def _keys(self, pages):
+        return [os.path.relpath(src, self.content).replace(os.sep, "/") for src, _ in pages]
+
+    def test_glob_selects_pages(self):
+        pages, stale = find_pages_matching(self.content, self.docs, ["blog/*", "index.md"])
+        self.assertEqual(self._keys(pages), ["blog/a/index.md", "blog/b/index.md", "index.md"])
+        self.assertEqual(pages[0][1], os.path.join(self.docs, "blog", "a", "index.html"))
+        self.assertEqual(stale, [])
+
+    def test_outputs_of_deleted_matching_pages_are_stale(self):
+        for key in ("blog/gone/index.html", "other/gone.html"):
+            write_file(os.path.join(self.docs, key), "")
+        _, stale = find_pages_matching(self.content, self.docs, ["blog/*"])
+        self.assertEqual(stale, [os.path.join(self.docs, "blog", "gone", "index.html")])
+
+    def test_copied_static_html_is_not_stale(self):
+        static = os.path.join(self.tmp.name, "static")
+        write_file(os.path.join(static, "embed.html"), "<p>embed</p>")
+        write_file(os.path.join(self.docs, "embed.html"), "<p>embed</p>")
+        write_file(os.path.join(self.docs, "gone.html"), "")
+        _, stale = find_pages_matching(self.content, self.docs, ["*"], static)
+        self.assertEqual(stale, [os.path.join(self.docs, "gone.html")])
+
+    def test_manifest_decides_what_is_stale(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write_file(template, TEMPLATE)
+        generate_pages_incremental(self.content, template, self.docs)
+        os.remove(os.path.join(self.content, "notes", "c.md"))
+        write_file(os.path.join(self.docs, "notes", "other.html"), "not a page")
+        _, stale = find_pages_matching(self.content, self.docs, ["notes/*"])
+        self.assertEqual(stale, [os.path.join(self.docs, "notes", "c.html")])
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        for rel_path in ("index.css", "images/logo.png"):
+            write_file(os.path.join(self.static, *rel_path.split("/")), rel_path)
+
+    def test_removes_only_recorded_static_outputs(self):
+        recorded = sync_static(self.static, self.docs, None)
+        self.assertEqual(recorded, ["images/logo.png", "index.css"])
+        page = os.path.join(self.docs, "images", "index.html")
+        write_file(page, "<h1>Page</h1>")
+
+        os.remove(os.path.join(self.static, "images", "logo.png"))
+        self.assertEqual(sync_static(self.static, self.docs, recorded), ["index.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "logo.png")))
+        self.assertTrue(os.path.exists(page))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.css")))
+
+
+class TestCheckOutputDir(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        write_file(os.path.join("content", "index.md"), "# Home")
+        write_file(os.path.join("static", "index.css"), "body {}")
+        write_file("template.html", TEMPLATE)
+
+    def test_outputs_next_to_the_inputs_are_allowed(self):
+        for dest in ("docs", "site.zip", os.path.join("build", "docs"), os.path.abspath("docs")):
+            check_output_dir(dest, ["content", "static"], "template.html")
+
+    def test_outputs_overlapping_an_input_are_refused(self):
+        for dest in ("content", "static/", os.path.join("content", "out"), ".", "..",
+                     os.path.join("static", "site.zip")):
+            with self.subTest(dest=dest), self.assertRaises(ValueError):
+                check_output_dir(dest, ["content", "static"], "template.html")
+        with self.assertRaises(ValueError):
+            check_output_dir("theme", ["content", "static"], os.path.join("theme", "template.html"))
+
+    def test_build_into_content_is_refused_before_pruning(self):
+        for argv in (["-o", "content"], ["--target", "/=docs", "--target", "/x/=."], ["merge", "-o", "static"]):
+            with self.subTest(argv=argv), redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                main.main(argv)
+        self.assertEqual(sorted(read_tree(".")), ["content/index.md", "static/index.css", "template.html"])
+
+
+class TestMainArguments(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+
+    def _refused(self, argv):
+        with self.subTest(argv=argv), redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as ctx:
+            main.main(argv)
+        self.assertEqual(ctx.exception.code, 2)
+
+    def test_source_builds_refuse_modes_they_do_not_support(self):
+        for option in (["--shard", "1/3"], ["--incremental"], ["--git-changes"], ["--coordinator"],
+                       ["--jobs", "2"]):
+            self._refused(["--from-archive", "site.zip", "-o", "out"] + option)
+        self.assertFalse(os.path.exists("out"))
+
+    def test_build_modes_are_exclusive(self):
+        modes = (["--incremental"], ["--git-changes"], ["--shard", "1/2"], ["--coordinator"])
+        for i, first in enumerate(modes):
+            for second in modes[i + 1:]:
+                self._refused(first + second)
+        self.assertEqual(os.listdir("."), [])
+
+
+class TestGeneratePage(unittest.TestCase):
+    def test_renders_one_page(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "docs", "index.html")
+            write_file(src, "# Home\n\n[post](/blog/post)")
+            write_file(template, "<title>{{ Title }}</title>{{ Content }}")
+            html = generate_page(src, template, dest, "/repo/")
+            self.assertEqual(read_file(dest), html)
+            self.assertIn('href="/repo/blog/post"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import time
+import unittest
+
+from directory import DirectoryOutput
+from fixtures import write_file
+from main import generate_pages_incremental
+from manifest import MANIFEST_FILENAME, check_input, load_manifest
+
+
+TEMPLATE = "<title>{{ Title }}</title><a href=\"/x\"></a>{{ Content }}"
+
+
+class TestCheckInput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.md")
+        with open(self.path, "w") as f:
+            f.write("# Hello")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_new_file_is_changed(self):
+        changed, entry = check_input(self.path, None)
+        self.assertTrue(changed)
+        self.assertEqual(entry["size"], 7)
+        self.assertIn("digest", entry)
+
+    def test_same_stat_is_unchanged(self):
+        _, entry = check_input(self.path, None)
+        changed, new_entry = check_input(self.path, entry)
+        self.assertFalse(changed)
+        self.assertEqual(new_entry, entry)
+
+    def test_touched_file_falls_back_to_digest(self):
+        _, entry = check_input(self.path, None)
+        future = time.time() + 100
+        os.utime(self.path, (future, future))
+        changed, new_entry = check_input(self.path, entry)
+        self.assertFalse(changed)
+        self.assertNotEqual(new_entry["mtime_ns"], entry["mtime_ns"])
+
+    def test_modified_file_is_changed(self):
+        _, entry = check_input(self.path, None)
+        with open(self.path, "w") as f:
+            f.write("# Goodbye")
+        changed, _ = check_input(self.path, entry)
+        self.assertTrue(changed)
+
+
+class TestGeneratePagesIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post\n\nText")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _build(self, basepath="/"):
+        return generate_pages_incremental(self.content, self.template, self.docs, basepath)
+
+    def test_first_build_renders_everything(self):
+        counts = self._build()
+        self.assertEqual(counts, {"rendered": 2, "unchanged": 0, "removed": 0})
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+        manifest = load_manifest(os.path.join(self.docs, MANIFEST_FILENAME))
+        self.assertEqual(sorted(manifest["pages"]), ["blog/post.md", "index.md"])
+
+    def test_second_build_skips_unchanged(self):
+        self._build()
+        counts = self._build()
+        self.assertEqual(counts, {"rendered": 0, "unchanged": 2, "removed": 0})
+
+    def test_changed_page_is_rerendered(self):
+        self._build()
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        counts = self._build()
+        self.assertEqual(counts, {"rendered": 1, "unchanged": 1, "removed": 0})
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn("Changed", f.read())
+
+    def test_template_or_basepath_change_rebuilds_all(self):
+        self._build()
+        self.assertEqual(self._build("/repo/")["rendered"], 2)
+        write_file(self.template, TEMPLATE + "<footer></footer>")
+        self.assertEqual(self._build("/repo/")["rendered"], 2)
+
+    def test_deleted_source_removes_output(self):
+        self._build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        counts = self._build()
+        self.assertEqual(counts["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_identical_rerender_is_not_rewritten(self):
+        self._build()
+        page = os.path.join(self.docs, "index.html")
+        os.utime(page, (1000000000, 1000000000))
+        # A different source that renders to the same page
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome\n")
+        with DirectoryOutput(self.docs, prune=False) as output:
+            counts = generate_pages_incremental(self.content, self.template, self.docs, output=output)
+        self.assertEqual(counts["rendered"], 1)
+        self.assertEqual((output.written, output.skipped), (0, 1))
+        self.assertEqual(os.stat(page).st_mtime, 1000000000)
+
+    def test_missing_output_is_rerendered(self):
+        self._build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        self.assertEqual(self._build()["rendered"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
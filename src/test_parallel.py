@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import parallel
+from fixtures import read_tree, write_file
+from main import find_markdown_files, generate_pages, generate_pages_recursive
+from markdown import markdown_to_html_node
+from parallel import PageRenderError, generate_pages_pipelined
+from render import write_page
+
+
+TEMPLATE = "<title>{{ Title }}</title><link href=\"/index.css\">{{ Content }}"
+
+
+class TestGeneratePagesParallel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(12):
+            write_file(os.path.join(self.content, f"section{i % 3}", f"page{i}.md"),
+                       f"# Page {i}\n\nSome **bold** text and a [link](/other).\n\n- item {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_output_matches_serial_build(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/repo/")
+        pages = find_markdown_files(self.content, parallel)
+        generate_pages(pages, self.template, "/repo/", jobs=3)
+        self.assertEqual(read_tree(serial), read_tree(parallel))
+
+    def test_thread_executor_matches_serial_build(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        threaded = os.path.join(self.tmp.name, "threaded")
+        generate_pages_recursive(self.content, self.template, serial, "/repo/")
+        pages = find_markdown_files(self.content, threaded)
+        generate_pages(pages, self.template, "/repo/", jobs=4, executor="threads")
+        self.assertEqual(read_tree(serial), read_tree(threaded))
+
+    def test_interpreter_executor_matches_serial_build(self):
+        # Falls back to the process pool before Python 3.14
+        serial = os.path.join(self.tmp.name, "serial")
+        interp = os.path.join(self.tmp.name, "interp")
+        generate_pages_recursive(self.content, self.template, serial, "/repo/")
+        pages = find_markdown_files(self.content, interp)
+        generate_pages(pages, self.template, "/repo/", jobs=2, executor="interpreters")
+        self.assertEqual(read_tree(serial), read_tree(interp))
+
+    def test_interpreter_pool_sends_only_paths(self):
+        # A thread pool stands in for InterpreterPoolExecutor before Python 3.14
+        submitted = []
+
+        class StandIn(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                submitted.append((fn, args))
+                return super().submit(fn, *args)
+
+        serial = os.path.join(self.tmp.name, "serial")
+        interp = os.path.join(self.tmp.name, "interp")
+        generate_pages_recursive(self.content, self.template, serial, "/repo/")
+        pages = find_markdown_files(self.content, interp)
+        durations = {}
+        self.addCleanup(setattr, parallel, "_worker_template", None)
+        with mock.patch.object(parallel, "InterpreterPoolExecutor", StandIn), \
+                mock.patch.object(parallel, "_init_worker", wraps=parallel._init_worker) as init:
+            generate_pages_pipelined(pages, self.template, write_page, "/repo/", 2,
+                                     executor="interpreters", durations=durations)
+        self.assertEqual(read_tree(serial), read_tree(interp))
+        self.assertEqual(submitted, [(parallel._render_path_in_interpreter, (src, self.template, "/repo/"))
+                                     for src, _ in pages])
+        # Loaded on first use; the stand-in's threads share one module, real
+        # interpreters each load their own copy
+        self.assertIn(init.call_count, (1, 2))
+        self.assertEqual(sorted(durations), sorted(src for src, _ in pages))
+        self.assertTrue(all(seconds >= 0 for seconds in durations.values()))
+
+    def test_unknown_executor_raises(self):
+        pages = find_markdown_files(self.content, "out")
+        with self.assertRaises(ValueError):
+            generate_pages(pages, self.template, "/", jobs=2, executor="fibers")
+
+
+class TestGeneratePagesPipelined(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(20):
+            write_file(os.path.join(self.content, f"page{i:02d}.md"), f"# Page {i}\n\nBody {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_every_page_in_order(self):
+        written = []
+        pages = find_markdown_files(self.content, "out")
+        generate_pages_pipelined(pages, self.template, lambda dest, html: written.append((dest, html)),
+                                 "/", jobs=2, max_pending=1)
+        self.assertEqual([dest for dest, _ in written], [dest for _, dest in pages])
+        self.assertIn("<title>Page 7</title>", written[7][1])
+
+    def test_render_error_stops_build(self):
+        bad = os.path.join(self.content, "page05.md")
+        write_file(bad, "no heading")
+        pages = find_markdown_files(self.content, "out")
+        with self.assertRaises(PageRenderError) as ctx:
+            generate_pages_pipelined(pages, self.template, lambda dest, html: None, "/", jobs=2)
+        self.assertIn(bad, str(ctx.exception))
+
+    def test_write_error_reports_source_path(self):
+        def write(dest, html):
+            raise OSError("disk full")
+        pages = find_markdown_files(self.content, "out")
+        with self.assertRaises(PageRenderError) as ctx:
+            generate_pages_pipelined(pages, self.template, write, "/", jobs=2)
+        self.assertIn("page00.md", str(ctx.exception))
+        self.assertIn("disk full", str(ctx.exception))
+
+
+class TestThreadSafety(unittest.TestCase):
+    def test_concurrent_conversion_matches_serial(self):
+        documents = [
+            f"# Doc {i}\n\nText with **bold {i}**, _italic_ and `code`.\n\n"
+            f"> quote {i}\n\n- a {i}\n- b\n\n1. one\n2. two\n\n```\ncode {i}\n```"
+            for i in range(50)
+        ]
+        expected = [markdown_to_html_node(doc).to_html() for doc in documents]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for _ in range(5):
+                results = list(pool.map(lambda doc: markdown_to_html_node(doc).to_html(), documents))
+                self.assertEqual(results, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
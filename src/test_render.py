@@ -0,0 +1,71 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+import render
+from fixtures import read_file, write_file
+from main import write_ninja_file
+from render import write_depfile
+
+
+class TestRenderMain(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src = os.path.join(self.tmp.name, "content", "post.md")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.dest = os.path.join(self.tmp.name, "docs", "post.html")
+        write_file(self.src, "# Post\n\n[home](/index.html)")
+        write_file(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def test_renders_one_page_with_depfile(self):
+        depfile = self.dest + ".d"
+        with redirect_stdout(io.StringIO()):
+            render.main(["--basepath", "/repo/", "--template", self.template,
+                         "--depfile", depfile, self.src, self.dest])
+        html = read_file(self.dest)
+        self.assertIn("<title>Post</title>", html)
+        self.assertIn('href="/repo/index.html"', html)
+        self.assertEqual(read_file(depfile), f"{self.dest}: \\\n  {self.src} \\\n  {self.template}\n")
+
+    def test_missing_source_exits(self):
+        with redirect_stdout(io.StringIO()), self.assertRaises(SystemExit) as ctx:
+            render.main(["--template", self.template, self.src + ".missing", self.dest])
+        self.assertIn("post.md.missing", str(ctx.exception.code))
+
+    def test_wrong_arguments_exit_with_usage(self):
+        with self.assertRaises(SystemExit) as ctx:
+            render.main([self.src])
+        self.assertEqual(ctx.exception.code, render.USAGE)
+
+    def test_depfile_escapes_special_characters(self):
+        depfile = os.path.join(self.tmp.name, "out.d")
+        write_depfile(depfile, "docs/a b.html", ["content/a b.md", "content/c#1$.md"])
+        self.assertEqual(read_file(depfile), "docs/a\\ b.html: \\\n  content/a\\ b.md \\\n  content/c\\#1$$.md\n")
+
+
+class TestNinjaFile(unittest.TestCase):
+    def test_one_build_statement_per_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            static = os.path.join(tmp, "static")
+            write_file(os.path.join(content, "index.md"), "# Home")
+            write_file(os.path.join(content, "blog", "post.md"), "# Post")
+            write_file(os.path.join(static, "index.css"), "body {}")
+            ninja_path = os.path.join(tmp, "build.ninja")
+            count = write_ninja_file(ninja_path, content, os.path.join(tmp, "template.html"), static,
+                                     os.path.join(tmp, "docs"), "/repo/")
+            text = read_file(ninja_path)
+        self.assertEqual(count, 3)
+        self.assertIn("basepath = /repo/", text)
+        self.assertIn("deps = gcc", text)
+        self.assertIn(f"build {os.path.join(tmp, 'docs', 'blog', 'post.html')}: render "
+                      f"{os.path.join(content, 'blog', 'post.md')}", text)
+        self.assertIn(f"build {os.path.join(tmp, 'docs', 'index.css')}: copy "
+                      f"{os.path.join(static, 'index.css')}", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
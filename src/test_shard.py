@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+from main import generate_pages_incremental
+from manifest import MANIFEST_FILENAME, load_manifest
+from shard import ShardMergeError, check_shards, merge_shards, parse_shard, shard_of
+
+
+class TestParseShard(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+
+    def test_invalid(self):
+        for spec in ["0/4", "5/4", "1/0", "a/b", "3"]:
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+
+class TestShardOf(unittest.TestCase):
+    def test_stable_and_in_range(self):
+        self.assertEqual(shard_of("blog/tom/index.md", 4), shard_of("blog/tom/index.md", 4))
+        for i in range(100):
+            self.assertIn(shard_of(f"page{i}.md", 3), (1, 2, 3))
+
+    def test_single_shard(self):
+        self.assertEqual(shard_of("index.md", 1), 1)
+
+
+class TestShardBuildAndMerge(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.keys = []
+        for i in range(15):
+            key = f"section{i % 3}/page{i}.md"
+            path = os.path.join(self.content, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(f"# Page {i}")
+            self.keys.append(key)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _build_shards(self, count):
+        dirs = []
+        for index in range(1, count + 1):
+            out = os.path.join(self.tmp.name, f"shard{index}")
+            generate_pages_incremental(self.content, self.template, out, shard=(index, count))
+            dirs.append(out)
+        return dirs
+
+    def test_shards_are_disjoint_and_merge_completely(self):
+        dirs = self._build_shards(3)
+        dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(dest)
+        self.assertEqual(merge_shards(dirs, dest, self.keys), 15)
+        merged = load_manifest(os.path.join(dest, MANIFEST_FILENAME))
+        self.assertEqual(sorted(merged["pages"]), sorted(self.keys))
+        self.assertNotIn("shard", merged)
+        self.assertTrue(os.path.exists(os.path.join(dest, "section1", "page4.html")))
+
+    def test_missing_shard_is_reported(self):
+        dirs = self._build_shards(3)
+        dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(dest)
+        with self.assertRaises(ShardMergeError) as ctx:
+            merge_shards(dirs[:2], dest, self.keys)
+        self.assertIn("missing page", str(ctx.exception))
+
+    def test_missing_output_file_is_reported(self):
+        dirs = self._build_shards(3)
+        pages = load_manifest(os.path.join(dirs[0], MANIFEST_FILENAME))["pages"]
+        os.remove(os.path.join(dirs[0], next(iter(pages.values()))["output"]))
+        with self.assertRaises(ShardMergeError) as ctx:
+            check_shards(dirs, self.keys)
+        self.assertIn("missing output file", str(ctx.exception))
+
+    def test_duplicate_shard_is_reported(self):
+        dirs = self._build_shards(2)
+        dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(dest)
+        with self.assertRaises(ShardMergeError) as ctx:
+            merge_shards(dirs + dirs[:1], dest, self.keys)
+        self.assertIn("duplicate page", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from cache import RenderCache
+from directory import DirectoryOutput
+from fixtures import write_file
+from main import generate_site_from_source
+from sources import DirectorySource, GitSource, TarSource, ZipSource, open_source
+
+
+def _git(*args):
+    subprocess.run(["git", *args], check=True, capture_output=True)
+
+
+class TestDirectorySource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        write_file(os.path.join(self.tmp.name, "static", "b.css"), "b")
+        write_file(os.path.join(self.tmp.name, "static", "img", "a.png"), b"\x89PNG")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_list_and_read(self):
+        source = DirectorySource(self.tmp.name)
+        self.assertEqual(source.list_files("static"), ["b.css", "img/a.png"])
+        self.assertEqual(source.read_bytes("static/img/a.png"), b"\x89PNG")
+        self.assertIsNone(source.blob_id("static/b.css"))
+        self.assertTrue(source.is_dir("static/img"))
+        self.assertFalse(source.is_dir("content"))
+
+
+class TestArchiveSources(unittest.TestCase):
+    FILES = {
+        "template.html": "<title>{{ Title }}</title>{{ Content }}",
+        "content/index.md": "# Home\n\nWelcome",
+        "content/blog/post.md": "# Post\n\n*hi*",
+        "static/css/site.css": "body {}",
+        "static/images/logo.bin": bytes(range(256)) * 100,
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.tree = os.path.join(self.tmp.name, "tree")
+        for path, data in self.FILES.items():
+            write_file(os.path.join(self.tree, path), data)
+
+        self.tar_path = os.path.join(self.tmp.name, "site.tar.gz")
+        with tarfile.open(self.tar_path, "w:gz") as tar:
+            # Archives made with `tar czf site.tgz .` prefix members with ./
+            tar.add(self.tree, arcname=".")
+        self.zip_path = os.path.join(self.tmp.name, "site.zip")
+        with zipfile.ZipFile(self.zip_path, "w") as zf:
+            for path in sorted(self.FILES):
+                zf.write(os.path.join(self.tree, path), path)
+
+    def test_open_source_detects_type(self):
+        for path, cls in [(self.tree, DirectorySource), (self.tar_path, TarSource),
+                          (self.zip_path, ZipSource)]:
+            with open_source(path) as source:
+                self.assertIsInstance(source, cls)
+        with self.assertRaises(ValueError):
+            open_source(os.path.join(self.tree, "template.html"))
+
+    def test_list_and_read(self):
+        for path in (self.tar_path, self.zip_path):
+            with open_source(path) as source:
+                self.assertEqual(sorted(source.list_files("content")), ["blog/post.md", "index.md"])
+                self.assertTrue(source.is_dir("static"))
+                self.assertFalse(source.is_dir("missing"))
+                self.assertEqual(source.read_bytes("static/images/logo.bin"),
+                                 self.FILES["static/images/logo.bin"])
+                with self.assertRaises(FileNotFoundError):
+                    source.read_bytes("content/missing.md")
+
+    def test_build_matches_directory_build(self):
+        outputs = []
+        for path in (self.tree, self.tar_path, self.zip_path):
+            dest = os.path.join(self.tmp.name, "out-" + os.path.basename(path))
+            with open_source(path) as source:
+                count = generate_site_from_source(source, "content", "template.html", "static", dest, "/r/")
+            self.assertEqual(count, 2)
+            files = {}
+            for rel in ["index.html", "blog/post.html", "css/site.css", "images/logo.bin"]:
+                with open(os.path.join(dest, rel), "rb") as f:
+                    files[rel] = f.read()
+            outputs.append(files)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+
+    def test_template_is_read_once(self):
+        for path in (self.tar_path, self.zip_path):
+            dest = os.path.join(self.tmp.name, "out-" + os.path.basename(path))
+            with open_source(path) as source:
+                reads = []
+                read_bytes = source.read_bytes
+                source.read_bytes = lambda name: reads.append(name) or read_bytes(name)
+                generate_site_from_source(source, "content", "template.html", "static", dest)
+            self.assertEqual(reads.count("template.html"), 1)
+            self.assertEqual(len(reads), 3)
+
+    def test_members_outside_the_root_are_skipped(self):
+        evil = ["static/../../../evil.txt", "/tmp/evil-absolute.txt", "static/ok.txt"]
+        tar_path = os.path.join(self.tmp.name, "evil.tar")
+        with tarfile.open(tar_path, "w") as tar:
+            for name in list(self.FILES) + evil:
+                data = self.FILES.get(name, b"pwned")
+                data = data.encode() if isinstance(data, str) else data
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        zip_path = os.path.join(self.tmp.name, "evil.zip")
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            for name in list(self.FILES) + evil:
+                zf.writestr(name, self.FILES.get(name, b"pwned"))
+
+        for path in (tar_path, zip_path):
+            dest = os.path.join(self.tmp.name, "a", "b", "out")
+            with open_source(path) as source, DirectoryOutput(dest) as output:
+                self.assertEqual(source.list_files("static"),
+                                 sorted(["css/site.css", "images/logo.bin", "ok.txt"]))
+                generate_site_from_source(source, "content", "template.html", "static", dest,
+                                          output=output)
+            self.assertTrue(os.path.exists(os.path.join(dest, "ok.txt")))
+            self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "evil.txt")))
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class TestGitSource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        _git("init", "-q")
+        _git("config", "user.email", "test@example.com")
+        _git("config", "user.name", "Test")
+        write_file("template.html", "<title>{{ Title }}</title><img src=\"/x.png\">{{ Content }}")
+        write_file("content/index.md", "# Old home")
+        write_file("content/blog/post.md", "# Post\n\n**bold**")
+        write_file("static/images/big.bin", bytes(range(256)) * 5000)
+        _git("add", "-A")
+        _git("commit", "-q", "-m", "first")
+        self.first = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                                    text=True, check=True).stdout.strip()
+        write_file("content/index.md", "# New home")
+        _git("commit", "-q", "-am", "second")
+
+    def test_reads_historical_commit(self):
+        with GitSource(self.first) as source:
+            self.assertEqual(source.list_files("content"), ["blog/post.md", "index.md"])
+            self.assertEqual(source.read_bytes("content/index.md"), b"# Old home")
+            self.assertEqual(len(source.blob_id("content/index.md")), 40)
+
+    def test_streams_binary_files(self):
+        with GitSource("HEAD") as source:
+            buffer = io.BytesIO()
+            source.copy_to("static/images/big.bin", buffer)
+            self.assertEqual(buffer.getvalue(), bytes(range(256)) * 5000)
+            # The batch process stays usable after a large object
+            self.assertEqual(source.read_bytes("content/index.md"), b"# New home")
+
+    def test_missing_file(self):
+        with GitSource("HEAD") as source:
+            with self.assertRaises(FileNotFoundError):
+                source.read_bytes("content/nope.md")
+
+    def test_build_matches_working_tree_build(self):
+        with GitSource("HEAD") as source:
+            generate_site_from_source(source, "content", "template.html", "static", "from_git", "/r/")
+        with DirectorySource(".") as source:
+            generate_site_from_source(source, "content", "template.html", "static", "from_dir", "/r/")
+        for rel in ["index.html", "blog/post.html", "images/big.bin"]:
+            with open(os.path.join("from_git", rel), "rb") as a, open(os.path.join("from_dir", rel), "rb") as b:
+                self.assertEqual(a.read(), b.read())
+
+    def test_blob_ids_are_used_as_cache_keys(self):
+        cache = RenderCache("cache")
+        with GitSource(self.first) as source:
+            generate_site_from_source(source, "content", "template.html", "static", "out", "/", cache)
+        cache = RenderCache("cache")
+        with GitSource("HEAD") as source:
+            generate_site_from_source(source, "content", "template.html", "static", "out", "/", cache)
+        # Only index.md changed between the commits
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
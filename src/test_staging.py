@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import staging
+from fixtures import read_file, write_file
+from main import copy_static, generate_pages_recursive
+from staging import StagingOutput, swap_directories
+
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestStagingOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+
+    def _build(self):
+        with StagingOutput(self.docs) as output:
+            copy_static(self.static, self.docs, output=output)
+            generate_pages_recursive(self.content, self.template, self.docs, "/", output=output)
+        return output
+
+    def test_first_build_creates_site(self):
+        output = self._build()
+        self.assertEqual((output.written, output.linked), (3, 0))
+        self.assertIn("<title>Post</title>", read_file(os.path.join(self.docs, "blog", "post.html")))
+        self.assertEqual(os.listdir(self.tmp.name).count(".docs.staging"), 0)
+
+    def test_unchanged_outputs_are_hardlinked(self):
+        self._build()
+        inode = os.stat(os.path.join(self.docs, "index.html")).st_ino
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Edited")
+        output = self._build()
+        self.assertEqual((output.written, output.linked), (1, 2))
+        self.assertEqual(os.stat(os.path.join(self.docs, "index.html")).st_ino, inode)
+        self.assertIn("Edited", read_file(os.path.join(self.docs, "blog", "post.html")))
+
+    def test_removed_pages_disappear(self):
+        self._build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self._build()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+
+    def test_failed_build_keeps_live_site(self):
+        self._build()
+        write_file(os.path.join(self.content, "bad.md"), "no heading")
+        with self.assertRaises(ValueError):
+            self._build()
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, ".docs.staging")))
+
+
+class TestSwapDirectories(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.live = os.path.join(self.tmp.name, "live")
+        self.new = os.path.join(self.tmp.name, "new")
+        write_file(os.path.join(self.live, "a.html"), "old")
+        write_file(os.path.join(self.new, "a.html"), "new")
+
+    def test_swap(self):
+        swap_directories(self.new, self.live)
+        self.assertEqual(read_file(os.path.join(self.live, "a.html")), "new")
+        self.assertEqual(os.listdir(self.tmp.name), ["live"])
+
+    def test_fallback_without_renameat2(self):
+        with mock.patch.object(staging, "_renameat2_exchange", return_value=False):
+            self.assertFalse(swap_directories(self.new, self.live))
+        self.assertEqual(read_file(os.path.join(self.live, "a.html")), "new")
+        self.assertEqual(os.listdir(self.tmp.name), ["live"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+
+from fixtures import write_file
+from main import find_markdown_files, generate_pages
+from timings import BuildTimings
+
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestBuildTimings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "timings.json")
+        self.small = os.path.join(self.tmp.name, "small.md")
+        self.large = os.path.join(self.tmp.name, "large.md")
+        self.slow = os.path.join(self.tmp.name, "slow.md")
+        write_file(self.small, "# S")
+        write_file(self.large, "# L\n\n" + "word " * 1000)
+        write_file(self.slow, "# Slow")
+        self.pages = [(self.small, "s"), (self.large, "l"), (self.slow, "x")]
+
+    def test_without_history_largest_first(self):
+        self.assertEqual(BuildTimings(self.path).order(self.pages)[0], (self.large, "l"))
+
+    def test_recorded_durations_win_over_size(self):
+        timings = BuildTimings(self.path)
+        timings.durations = {self.small: 0.001, self.large: 0.002, self.slow: 2.0}
+        timings.save()
+        order = BuildTimings(self.path).order(self.pages)
+        self.assertEqual(order, [(self.slow, "x"), (self.large, "l"), (self.small, "s")])
+
+    def test_pages_without_history_are_estimated_from_size(self):
+        timings = BuildTimings(self.path)
+        timings.durations = {self.small: 0.003}
+        timings.save()
+        costs = BuildTimings(self.path).expected_costs(self.pages)
+        self.assertAlmostEqual(costs[self.large], os.path.getsize(self.large) * 0.001)
+        self.assertAlmostEqual(costs[self.slow], 0.006)
+
+    def test_save_forgets_deleted_pages(self):
+        timings = BuildTimings(self.path)
+        timings.durations = {self.small: 0.1, self.large: 0.2}
+        timings.save()
+        os.remove(self.large)
+        timings = BuildTimings(self.path)
+        timings.durations = {self.slow: 0.3}
+        timings.save()
+        with open(self.path) as f:
+            self.assertEqual(sorted(json.load(f)["pages"]), sorted([self.small, self.slow]))
+
+    def test_critical_path(self):
+        timings = BuildTimings(self.path)
+        self.assertIsNone(timings.critical_path(2))
+        timings.durations = {self.small: 1.0, self.large: 3.0, self.slow: 4.0}
+        self.assertEqual(timings.critical_path(2), {"page": self.slow, "seconds": 4.0, "total": 8.0, "bound": 4.0})
+        self.assertEqual(timings.critical_path(1)["bound"], 8.0)
+
+    def test_parallel_build_records_every_page(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write_file(template, TEMPLATE)
+        content = os.path.join(self.tmp.name, "content")
+        for i in range(5):
+            write_file(os.path.join(content, f"page{i}.md"), f"# Page {i}")
+        timings = BuildTimings(self.path)
+        pages = find_markdown_files(content, os.path.join(self.tmp.name, "out"))
+        generate_pages(pages, template, "/", 2, "threads", timings=timings)
+        self.assertEqual(sorted(timings.durations), [src for src, _ in pages])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "out", "page4.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
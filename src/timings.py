@@ -0,0 +1,123 @@
+"""
+Per-page render timings for longest-job-first scheduling.
+
+A parallel build finishes when its last worker does. If a few very large
+pages happen to be handed out last, every other worker sits idle while they
+render. Scheduling pages in descending order of expected cost starts the
+long ones first, so the short ones fill in around them.
+
+The expected cost of a page is how long it took to render in the previous
+build. Pages without a recorded time (new pages, or the first build) are
+estimated from their markdown size, scaled by the average seconds per byte
+of the pages that do have one.
+
+Timings are kept in a small JSON file in the working directory rather than
+in the output directory, so they are neither deployed nor pruned:
+
+    {"version": 1, "pages": {"content/blog/post.md": 0.0123, ...}}
+"""
+
+import json
+import os
+
+from manifest import save_manifest
+
+
+TIMINGS_VERSION = 1
+
+TIMINGS_FILENAME = ".build-timings.json"
+
+
+class BuildTimings:
+    """Render durations from previous builds plus those of the current one.
+
+    Attributes:
+        path (str): The timings file
+        pages (dict): Source path -> seconds, from previous builds
+        durations (dict): Source path -> seconds, measured in this build
+    """
+
+    def __init__(self, path=TIMINGS_FILENAME):
+        """Load the timings file; a missing or unreadable file is empty.
+
+        Args:
+            path (str): The timings file
+        """
+        self.path = path
+        self.durations = {}
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        pages = data.get("pages") if isinstance(data, dict) else None
+        self.pages = pages if isinstance(pages, dict) else {}
+
+    def expected_costs(self, pages):
+        """Estimate how long each page will take to render.
+
+        Args:
+            pages (list): List of (source_path, dest_path) tuples
+
+        Returns:
+            dict: Source path -> expected cost, in seconds when there is
+                any history and in bytes of markdown otherwise
+        """
+        sizes = {}
+        for src_path, _ in pages:
+            try:
+                sizes[src_path] = os.path.getsize(src_path)
+            except OSError:
+                sizes[src_path] = 0
+        timed = [src_path for src_path in sizes if src_path in self.pages]
+        timed_bytes = sum(sizes[src_path] for src_path in timed)
+        rate = sum(self.pages[src_path] for src_path in timed) / timed_bytes if timed_bytes else 1
+        return {src_path: self.pages.get(src_path, size * rate) for src_path, size in sizes.items()}
+
+    def order(self, pages):
+        """Sort pages longest expected render first.
+
+        Ties keep their original order, so a build without history still
+        renders pages of equal size in a stable order.
+
+        Args:
+            pages (list): List of (source_path, dest_path) tuples
+
+        Returns:
+            list: The same pages, most expensive first
+        """
+        costs = self.expected_costs(pages)
+        return sorted(pages, key=lambda page: -costs[page[0]])
+
+    def save(self):
+        """Merge this build's durations into the file, if any were measured."""
+        if not self.durations:
+            return
+        self.pages.update(self.durations)
+        # Forget pages that have been deleted
+        self.pages = {src_path: seconds for src_path, seconds in self.pages.items()
+                      if src_path in self.durations or os.path.exists(src_path)}
+        save_manifest({"version": TIMINGS_VERSION, "pages": self.pages}, self.path)
+
+    def critical_path(self, jobs):
+        """Summarise what bounds this build's rendering time.
+
+        Args:
+            jobs (int): Number of workers the pages were rendered on
+
+        Returns:
+            dict: The slowest "page" and its "seconds", the "total" render
+                time, and the "bound": no schedule on this many workers can
+                render faster than max(slowest page, total / jobs). None if
+                nothing was rendered.
+        """
+        if not self.durations:
+            return None
+        page = max(self.durations, key=self.durations.get)
+        total = sum(self.durations.values())
+        return {
+            "page": page,
+            "seconds": self.durations[page],
+            "total": total,
+            "bound": max(self.durations[page], total / jobs),
+        }